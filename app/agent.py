@@ -1,5 +1,11 @@
 import sys
 import os
+import asyncio
+import queue
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
 from pathlib import Path
 import json
 import emoji
@@ -11,34 +17,81 @@ sys.path.append(str(project_root))
 
 from strands import Agent, tool
 from strands.models import BedrockModel
-from models.dynamodb import DynamoDBService
-from mcp import stdio_client, StdioServerParameters
-from strands.tools.mcp import MCPClient
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from models.dynamodb import DynamoDBService, RebookingConflictError, SeatUnavailableError
+from models.async_dynamodb import AsyncDynamoDBService
+from app.mcp_pool import get_shared_pool
+from app.session_manager import AgentSessionManager
+from app.intent_router import IntentRouter
+from app.response_cache import ResponseCache
+from app.messages import format_delay_message
+from app.rebooking_solver import RebookingSolver
 
 class DelayCompanionAgent:
     """DelayCompanion airline assistant agent using Strands Agent SDK"""
-    def __init__(self):
-   
-        """Initialize the DelayCompanion agent"""
+    def __init__(self, mcp_pool=None, max_sessions=1000, session_ttl=1800, history_window=40,
+                 max_concurrent_turns=256, turn_timeout=120.0, fast_path=True, cache_responses=True):
+        """
+        Initialize the DelayCompanion agent
+
+        Args:
+            mcp_pool: Optional MCPServerPool; defaults to the process-wide shared pool
+            max_sessions: Maximum number of passenger conversations kept in memory
+            session_ttl: Seconds after which an idle conversation is dropped
+            history_window: Maximum number of messages kept per conversation
+            max_concurrent_turns: Maximum number of aprocess_query turns in flight per event loop
+            turn_timeout: Default timeout in seconds for one aprocess_query turn
+            fast_path: Answer simple gate/delay/seat/rebooking questions without the LLM
+            cache_responses: Reuse answers across passengers on a flight while its state is unchanged
+        """
+        # Warm MCP server sessions are shared across turns and agent instances
+        self.mcp_pool = mcp_pool or get_shared_pool()
         # Initialize DynamoDB service
-        self.stdio_mcp_client = MCPClient(lambda: stdio_client(
-        StdioServerParameters(
-        command="uvx", 
-        args=["awslabs.dynamodb-mcp-server@latest"],
-        env = {
-        "DDB-MCP-READONLY": "true",
-        "AWS_PROFILE": "default",
-        "AWS_REGION": "us-west-2",
-        "FASTMCP_LOG_LEVEL": "DEBUG"
-        }
-    )
-))
-        self.mailMCP_client = MCPClient(lambda: stdio_client(StdioServerParameters(
-            command="npx",
-            args=["@gongrzhe/server-gmail-autoauth-mcp"]
-        )))
         self.db_service = DynamoDBService()
-       
+        self.async_db_service = AsyncDynamoDBService()
+        self.max_concurrent_turns = max_concurrent_turns
+        self.turn_timeout = turn_timeout
+        # aprocess_query limits, one per event loop it is awaited on
+        self._turn_semaphores = weakref.WeakKeyDictionary()
+        self._async_guard = threading.Lock()
+        self.router = IntentRouter(seat_availability=self.db_service.get_seat_availability) if fast_path else None
+        self.response_cache = ResponseCache() if cache_responses else None
+        self.rebooking_solver = RebookingSolver()
+        # Tools served from this process's data layer, offered next to the MCP servers' tools
+        self.local_tools = [
+            self.get_delayed_flights,
+            self.get_flight_details,
+            self.get_passenger_details,
+            self.get_rebooking_options,
+            self.rebook_passenger,
+            self.propose_rebooking_plan,
+            self.generate_handoff_context,
+            self.format_delay_message
+        ]
+        # The Bedrock model is stateless and shared by every conversation
+        self.model = BedrockModel(
+            model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            region_name="us-west-2",
+            temperature=0.2
+        )
+        self.history_window = history_window
+        self.sessions = AgentSessionManager(
+            self._build_agent,
+            generation_source=lambda: self.mcp_pool.generation,
+            max_sessions=max_sessions,
+            idle_ttl=session_ttl
+        )
+
+    def _build_agent(self, messages=None):
+        """Build a Strands Agent bound to the shared model, warm MCP tools and the local tools"""
+        return Agent(
+            model=self.model,
+            messages=messages,
+            tools=[*self.mcp_pool.get_tools(), *self.local_tools],
+            system_prompt=self._get_system_prompt(),
+            callback_handler=None,
+            conversation_manager=SlidingWindowConversationManager(window_size=self.history_window)
+        )
     
     def _get_system_prompt(self):
         """Get the system prompt for the agent"""
@@ -103,7 +156,7 @@ NOTE:
     @tool
     def get_rebooking_options(self, flight_id: str):
         """
-        Get available rebooking options for a delayed flight
+        Get available rebooking options for a delayed flight with the seats left on each
         
         Args:
             flight_id: The unique identifier for the delayed flight
@@ -112,7 +165,8 @@ NOTE:
         return options
     
     @tool
-    def rebook_passenger(self, passenger_id: str, new_flight_id: str, seat_preference: str = None):
+    def rebook_passenger(self, passenger_id: str, new_flight_id: str, seat_preference: str = None,
+                         current_flight_id: str = None):
         """
         Rebook a passenger on a new flight
         
@@ -120,30 +174,97 @@ NOTE:
             passenger_id: The unique identifier for the passenger
             new_flight_id: The flight ID for the new booking
             seat_preference: Optional seat preference (window, aisle, etc.)
+            current_flight_id: Optional flight ID the passenger is currently booked on
         """
-        success = self.db_service.update_passenger_rebooking(
-            passenger_id, 
-            new_flight_id, 
-            seat_preference
-        )
-        
-        if success:
-            # Get updated passenger and flight details
+        if current_flight_id is None:
             passenger = self.db_service.get_passenger(passenger_id)
-            flight = self.db_service.get_flight(new_flight_id)
+            if not passenger:
+                return {"success": False, "message": f"Passenger {passenger_id} was not found."}
+            current_flight_id = passenger.get('flight_id')
+        if current_flight_id == new_flight_id:
+            # Holding a seat here would take a second seat for a passenger already on board
+            return {
+                "success": False,
+                "already_booked": True,
+                "message": f"The passenger is already booked on flight {new_flight_id}."
+            }
+        
+        try:
+            # Reuses a hold the passenger already placed on this flight
+            hold = self.db_service.hold_seat(new_flight_id, passenger_id)
+        except SeatUnavailableError:
+            return {
+                "success": False,
+                "sold_out": True,
+                "message": "There are no seats left on that flight. Please choose another option."
+            }
+        
+        try:
+            # The write returns the updated passenger, so no read-back is needed
+            passenger = self.db_service.update_passenger_rebooking(
+                passenger_id, 
+                new_flight_id, 
+                seat_preference,
+                expected_flight_id=current_flight_id
+            )
+        except RebookingConflictError as e:
+            if hold:
+                self.db_service.release_hold(new_flight_id, passenger_id)
+            return {
+                "success": False,
+                "conflict": True,
+                "current_flight_id": e.current_flight_id,
+                "message": "This booking was changed while the rebooking was in progress. "
+                           "Please review the current booking and try again."
+            }
+        
+        if passenger:
+            if hold:
+                self.db_service.confirm_hold(new_flight_id, passenger_id)
+            # Give back the seat on a rebooking flight the passenger is leaving
+            old_flight_id = passenger['rebooking_history'][-1].get('old_flight_id')
+            if old_flight_id and old_flight_id != new_flight_id:
+                self.db_service.release_seat(old_flight_id)
+            
+            flight = self.db_service.get_flight(new_flight_id) or {}
             
             return {
                 "success": True,
-                "message": f"Successfully rebooked passenger {passenger['name']} on flight {flight['flight_number']}",
+                "message": f"Successfully rebooked passenger {passenger['name']} on flight {flight.get('flight_number', new_flight_id)}",
                 "passenger": passenger,
                 "flight": flight
             }
         else:
+            if hold:
+                self.db_service.release_hold(new_flight_id, passenger_id)
             return {
                 "success": False,
                 "message": "Failed to rebook passenger. Please try again or contact customer service."
             }
     
+    @tool
+    def propose_rebooking_plan(self, flight_id: str, passenger_id: str = None):
+        """
+        Propose the best rebooking flight for everyone on a delayed or cancelled flight
+        
+        Args:
+            flight_id: The unique identifier for the displaced flight
+            passenger_id: Optional passenger whose proposed flight should be returned
+        """
+        plan = self.rebooking_solver.plan_for_flight(self.db_service, flight_id)
+        if plan is None:
+            return {"success": False, "message": f"Flight {flight_id} was not found."}
+        
+        # The full assignment list is for ops; the agent gets the summary
+        summary = {key: value for key, value in plan.items() if key != "assignments"}
+        summary["success"] = True
+        summary["unassigned"] = len(plan["unassigned"])
+        if passenger_id:
+            summary["passenger"] = next(
+                (a for a in plan["assignments"] if a["passenger_id"] == passenger_id), None
+            )
+        return summary
+    
     @tool
     def generate_handoff_context(self, passenger_id: str):
         """
@@ -184,95 +305,344 @@ NOTE:
             terminal: Terminal information
             rebooking_options: List of available rebooking options
         """
-        # Convert delay minutes to hours and minutes
-        hours = delay_minutes // 60
-        mins = delay_minutes % 60
-        delay_text = f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
-        
-        # Map delay reasons to appropriate emojis
-        reason_emojis = {
-            "Weather": "🌧️",
-            "Mechanical": "🔧",
-            "Crew": "👨‍✈️",
-            "Air Traffic Control": "🗼",
-            "Aircraft Late Arrival": "⏱️",
-            "Security": "🔒",
-            "Other": "ℹ️"
-        }
+        return format_delay_message(
+            passenger_name,
+            flight_number,
+            origin,
+            destination,
+            delay_minutes,
+            delay_reason,
+            scheduled_departure,
+            new_departure,
+            gate,
+            terminal,
+            rebooking_options
+        )
+    
+    def _add_context(self, query, passenger_id, passenger, flight):
+        """Build the passenger context and prefix it to the query"""
+        if not passenger:
+            return query, {}
         
-        reason_emoji = reason_emojis.get(delay_reason, "ℹ️")
+        context = {
+            "passenger": passenger,
+            "flight": flight
+        }
         
-        # Format the message with emojis and clear sections
-        message = f"""
-Hello {passenger_name},
-
-❗ **FLIGHT DELAY ALERT** ❗
-
-Your flight {flight_number} from {origin} to {destination} has been delayed by {delay_text}.
-
-📋 **DELAY DETAILS**
-• Reason: {reason_emoji} {delay_reason}
-• Original departure: {scheduled_departure}
-• New departure: {new_departure}
-• Gate: {gate}
-• Terminal: {terminal}
-
-✈️ **REBOOKING OPTIONS**
-"""
+        # Add context to the query
+        query = f"[CONTEXT: Passenger ID: {passenger_id}, Name: {passenger.get('name')}, " \
+               f"Flight: {flight.get('flight_number')}, Status: {flight.get('status')}]\n\n{query}"
+        return query, context
+    
+    def _flight_hint(self, session_id, flight_id=None):
+        """Get the passenger's flight ID from the caller or from the session's previous turn"""
+        if flight_id:
+            return flight_id
+        session = self.sessions.find_session(session_id)
+        return session.flight_id if session is not None else None
+    
+    @staticmethod
+    def _remember_flight(session, context):
+        """Keep the passenger's flight ID on the session for the next turn's context read"""
+        if session is not None and context:
+            session.flight_id = context['passenger'].get('flight_id')
+    
+    def _build_context(self, query, passenger_id=None, flight_id=None):
+        """
+        Load the passenger's flight context and prefix it to the query
         
-        # Add rebooking options
-        if rebooking_options:
-            for i, option in enumerate(rebooking_options, 1):
-                message += f"{i}. Flight {option['flight_number']} - Departs: {option['departure']} - Arrives: {option['arrival']}\n"
-        else:
-            message += "No rebooking options are currently available.\n"
-        
-        # Add assistance information
-        message += """
-📱 **NEED HELP?**
-• Select a rebooking option
-• Request a call with an agent
-• Update your preferences
-
-We apologize for the inconvenience and are working to get you to your destination as soon as possible.
-"""
+        With a flight ID hint the passenger and flight are read in one round trip.
+        """
+        # If passenger ID is provided, add passenger context
+        if not passenger_id:
+            return query, {}
         
-        return message
+        record = self.db_service.get_passenger_with_flight(passenger_id, flight_id=flight_id) or {}
+        return self._add_context(query, passenger_id, record.get('passenger'), record.get('flight'))
     
-    def process_query(self, query, passenger_id=None):
-        """Process a user query with the agent"""
-        context = {}
+    async def _abuild_context(self, query, passenger_id=None, flight_id=None):
+        """Async variant of _build_context using the async DynamoDB service"""
+        if not passenger_id:
+            return query, {}
         
-        # If passenger ID is provided, add passenger context
-        if passenger_id:
-            passenger = self.db_service.get_passenger(passenger_id)
-            if passenger:
-                flight_id = passenger.get('flight_id')
-                flight = self.db_service.get_flight(flight_id)
-                
-                context = {
-                    "passenger": passenger,
-                    "flight": flight
-                }
-                
-                # Add context to the query
-                query = f"[CONTEXT: Passenger ID: {passenger_id}, Name: {passenger.get('name')}, " \
-                       f"Flight: {flight.get('flight_number')}, Status: {flight.get('status')}]\n\n{query}"
-        with self.stdio_mcp_client, self.mailMCP_client:
-            # Get the tools from the MCP server
-            tools = self.stdio_mcp_client.list_tools_sync() + self.mailMCP_client.list_tools_sync()
-            print(f"Available tools: {tools}")
-        # Create the agent with Claude Sonnet model
-            self.agent = Agent(
-            model=BedrockModel(
-                model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-                region_name="us-west-2",
-                temperature=0.2
-            ),
-            tools=tools,
-            system_prompt=self._get_system_prompt()
+        record = await self.async_db_service.get_passenger_with_flight(passenger_id, flight_id=flight_id) or {}
+        return self._add_context(query, passenger_id, record.get('passenger'), record.get('flight'))
+    
+    def _fast_path(self, raw_query, context, started):
+        """Answer from the passenger context or the response cache, or return None"""
+        if self.router is not None:
+            message = self.router.route(raw_query, context, started)
+            if message is not None:
+                return message
+        if self.response_cache is not None:
+            text = self.response_cache.get(raw_query, context.get('passenger'), context.get('flight'))
+            if text is not None:
+                return {"role": "assistant", "content": [{"text": text}]}
+        return None
+    
+    def _record_exchange(self, session, query, message, context):
+        """Add a fast-path exchange to the conversation so later turns can refer to it"""
+        self._remember_flight(session, context)
+        session.agent.messages.append({"role": "user", "content": [{"text": query}]})
+        session.agent.messages.append(message)
+        session.turns += 1
+    
+    @staticmethod
+    def _query_index(messages, query):
+        """Get the index of the latest user message holding query, or None if the window dropped it"""
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if message.get("role") == "user" and any(block.get("text") == query for block in message.get("content", [])):
+                return index
+        return None
+    
+    @staticmethod
+    def _tools_used(messages):
+        """Get the names of the tools called in a list of messages"""
+        return [
+            block["toolUse"].get("name")
+            for message in messages for block in message.get("content", []) if "toolUse" in block
+        ]
+    
+    def _finish_agent_turn(self, started, raw_query, query, context, session, message):
+        """Report the latency of an agent turn and cache its answer (caller holds the session lock)"""
+        self._remember_flight(session, context)
+        if self.router is not None:
+            self.router.record_agent_turn(time.perf_counter() - started)
+        if self.response_cache is None or not context:
+            return
+        start = self._query_index(session.agent.messages, query)
+        if start != 0:
+            # Only first turns stand alone; later answers may lean on earlier messages
+            return
+        text = "".join(block.get("text", "") for block in (message or {}).get("content", []))
+        self.response_cache.put(
+            raw_query,
+            context.get('passenger'),
+            context.get('flight'),
+            text,
+            tools_used=self._tools_used(session.agent.messages)
         )
-        # Process the query with the agent
-            response = self.agent(query)
+    
+    def process_query(self, query, passenger_id=None, session_id=None, flight_id=None):
+        """
+        Process a user query with the agent
+        
+        Simple questions about the passenger's gate, delay, seat or rebooking
+        options are answered by the intent router without calling the model,
+        and questions already answered for another passenger on the same
+        flight are served from the response cache while the flight is unchanged.
+        
+        Args:
+            query: The passenger's message
+            passenger_id: Optional passenger ID used to add flight context
+            session_id: Optional conversation key; defaults to the passenger ID
+            flight_id: Optional flight ID the passenger is known to be on (e.g. from login);
+                defaults to the flight seen on the session's previous turn
+        """
+        started = time.perf_counter()
+        raw_query = query
+        session_id = session_id or passenger_id or "default"
+        query, context = self._build_context(query, passenger_id, self._flight_hint(session_id, flight_id))
+        
+        message = self._fast_path(raw_query, context, started)
+        if message is not None:
+            # Recorded even on the first turn, so a follow-up can refer to this answer
+            session = self.sessions.get_session(session_id)
+            with session.lock:
+                self._record_exchange(session, query, message, context)
+            return message, context
+        
+        # Reuse the conversation for this passenger/session
+        session = self.sessions.get_session(session_id)
+        with session.lock:
+            response = session.agent(query)
+            session.turns += 1
+            self._finish_agent_turn(started, raw_query, query, context, session, response.message)
         
         return response.message, context
+    
+    def stream_query(self, query, passenger_id=None, session_id=None, flight_id=None):
+        """
+        Process a user query and yield events as the agent produces them
+        
+        Yields dicts with a "type" of "text" (a "data" delta), "tool" (the "name"
+        of a tool the agent started calling) and finally "result" (the full
+        "message" and the passenger "context").
+        
+        Args:
+            query: The passenger's message
+            passenger_id: Optional passenger ID used to add flight context
+            session_id: Optional conversation key; defaults to the passenger ID
+            flight_id: Optional flight ID the passenger is known to be on (e.g. from login);
+                defaults to the flight seen on the session's previous turn
+        """
+        started = time.perf_counter()
+        raw_query = query
+        session_id = session_id or passenger_id or "default"
+        query, context = self._build_context(query, passenger_id, self._flight_hint(session_id, flight_id))
+        
+        message = self._fast_path(raw_query, context, started)
+        if message is not None:
+            # Recorded even on the first turn, so a follow-up can refer to this answer
+            session = self.sessions.get_session(session_id)
+            with session.lock:
+                self._record_exchange(session, query, message, context)
+            yield {"type": "text", "data": message["content"][0]["text"]}
+            yield {"type": "result", "message": message, "context": context}
+            return
+        
+        session = self.sessions.get_session(session_id)
+        
+        events = queue.Queue()
+        done = object()
+        
+        async def consume():
+            message = None
+            seen_tool_ids = set()
+            async for event in session.agent.stream_async(query):
+                if "data" in event:
+                    events.put({"type": "text", "data": event["data"]})
+                elif "current_tool_use" in event:
+                    tool_use = event["current_tool_use"]
+                    tool_use_id = tool_use.get("toolUseId")
+                    if tool_use_id and tool_use_id not in seen_tool_ids:
+                        seen_tool_ids.add(tool_use_id)
+                        events.put({"type": "tool", "name": tool_use.get("name")})
+                elif "result" in event:
+                    message = event["result"].message
+                    events.put({"type": "result", "message": message, "context": context})
+            return message
+        
+        def run():
+            # The agent loop runs on its own event loop so callers can stay synchronous
+            try:
+                with session.lock:
+                    message = asyncio.run(consume())
+                    session.turns += 1
+                    self._finish_agent_turn(started, raw_query, query, context, session, message)
+            except Exception as e:
+                events.put(e)
+            finally:
+                events.put(done)
+        
+        threading.Thread(target=run, name="agent-stream", daemon=True).start()
+        
+        while True:
+            event = events.get()
+            if event is done:
+                break
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    async def aprocess_query(self, query, passenger_id=None, session_id=None, timeout=None, flight_id=None):
+        """
+        Process a user query without blocking the event loop
+        
+        Many passenger turns can be awaited concurrently on one event loop, up
+        to max_concurrent_turns per loop. Turns for the same session run one at
+        a time, also against process_query, stream_query and turns awaited on
+        other loops. If the turn times out or
+        is cancelled, the partial exchange is dropped from the conversation.
+        
+        Args:
+            query: The passenger's message
+            passenger_id: Optional passenger ID used to add flight context
+            session_id: Optional conversation key; defaults to the passenger ID
+            timeout: Optional timeout in seconds; defaults to turn_timeout
+            flight_id: Optional flight ID the passenger is known to be on (e.g. from login);
+                defaults to the flight seen on the session's previous turn
+        """
+        semaphore = self._loop_primitive(
+            self._turn_semaphores, lambda: asyncio.Semaphore(self.max_concurrent_turns)
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            raw_query = query
+            session_id = session_id or passenger_id or "default"
+            query, context = await self._abuild_context(
+                query, passenger_id, self._flight_hint(session_id, flight_id)
+            )
+            
+            # Rebooking-option answers read live seat counts
+            message = await asyncio.to_thread(self._fast_path, raw_query, context, started)
+            if message is not None:
+                # Recorded even on the first turn, so a follow-up can refer to this answer
+                session = await asyncio.to_thread(self.sessions.get_session, session_id)
+                async with self._hold_session(session):
+                    self._record_exchange(session, query, message, context)
+                return message, context
+            
+            session = await asyncio.to_thread(self.sessions.get_session, session_id)
+            
+            async with self._hold_session(session):
+                history_length = len(session.agent.messages)
+                try:
+                    result = await asyncio.wait_for(
+                        self._run_turn(session.agent, query),
+                        timeout or self.turn_timeout
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    # Keep the conversation well-formed for the next turn
+                    del session.agent.messages[history_length:]
+                    raise
+                session.turns += 1
+                self._finish_agent_turn(started, raw_query, query, context, session, result.message)
+        
+        return result.message, context
+    
+    def _loop_primitive(self, primitives, factory):
+        """Get the asyncio primitive of the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        with self._async_guard:
+            primitive = primitives.get(loop)
+            if primitive is None:
+                primitive = primitives[loop] = factory()
+            return primitive
+    
+    @asynccontextmanager
+    async def _hold_session(self, session):
+        """
+        Hold a session for one async turn without blocking the event loop
+        
+        Turns on the same loop queue on the loop's asyncio lock; the session's
+        thread lock is then taken in a worker thread, which keeps sync and
+        async turns and turns on other loops from overlapping.
+        """
+        async with self._loop_primitive(session.async_locks, asyncio.Lock):
+            acquiring = asyncio.ensure_future(asyncio.to_thread(session.lock.acquire))
+            try:
+                await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # The worker thread still takes the lock; release it once it has
+                acquiring.add_done_callback(lambda _: session.lock.release())
+                raise
+            try:
+                yield
+            finally:
+                session.lock.release()
+    
+    async def _run_turn(self, agent, query):
+        """Run one agent turn on the current event loop and return its result"""
+        result = None
+        async for event in agent.stream_async(query):
+            if "result" in event:
+                result = event["result"]
+        return result
+
+    def get_session_stats(self):
+        """Get active conversation counts and eviction counters"""
+        return self.sessions.stats()
+
+    def get_response_cache_stats(self):
+        """Get response cache size, hit ratio and evictions, or None if caching is off"""
+        return self.response_cache.stats() if self.response_cache is not None else None
+
+    def get_router_stats(self):
+        """Get fast-path hit rate and latency saved, or None if the fast path is off"""
+        return self.router.stats() if self.router is not None else None
+
+    def get_pool_status(self):
+        """Get the warm/total session counts of the MCP server pool"""
+        return self.mcp_pool.status()
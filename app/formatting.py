@@ -0,0 +1,146 @@
+import re
+
+RESPONSE_FORMATS = ("markdown", "text")
+
+# Literal phrase -> replacement per format; every rule is applied in the same single pass
+PHRASE_RULES = {
+    "Delayed": {
+        "markdown": "🔴 **Delayed**",
+        "text": "🔴 Delayed"
+    },
+    "On Time": {
+        "markdown": "🟢 **On Time**",
+        "text": "🟢 On Time"
+    },
+    "Would you like me to:": {
+        "markdown": "\n---\n### 🤝 How Can I Help You Next?\n\nWould you like me to:",
+        "text": "\n🤝 How Can I Help You Next?\n\nWould you like me to:"
+    },
+    "- Help you explore": "- ✈️ Help you explore",
+    "- Connect you with": "- 📞 Connect you with",
+    "- Provide general": "- 📋 Provide general",
+    "Flight Delay Information": "✈️ Flight Delay Information",
+    "Available Options": "🔄 Available Options",
+    "Rebooking Options": "✈️ Rebooking Options",
+    "Delay Compensation": "💰 Delay Compensation",
+    "Connect with an Agent": "📞 Connect with an Agent"
+}
+
+# Airline code plus flight number, e.g. AA1234
+FLIGHT_NUMBER_PATTERN = r"\b[A-Z]{2}\d{3,4}\b"
+
+
+def message_text(message):
+    """
+    Get the text of an agent message
+
+    Args:
+        message: A Strands message dict ({"role", "content": [blocks]}), a list of
+            content blocks, or plain text
+
+    Returns:
+        The text blocks joined together; tool use and tool result blocks are skipped
+    """
+    if message is None:
+        return ""
+    if isinstance(message, str):
+        return message
+    if isinstance(message, dict):
+        message = message.get('content', "")
+        if isinstance(message, str):
+            return message
+    return "".join(
+        block['text'] for block in message if isinstance(block, dict) and isinstance(block.get('text'), str)
+    )
+
+
+class ResponseFormatter:
+    """Applies the DelayCompanion display rules to agent answers in one pass
+
+    Every rule is compiled into one regex and replaced by a dictionary
+    lookup. The web app uses the markdown format, the terminal CLI text.
+    """
+
+    def __init__(self, fmt="markdown"):
+        """
+        Initialize the formatter
+
+        Args:
+            fmt: Output format, "markdown" or "text"
+        """
+        if fmt not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown response format: {fmt}")
+        self.fmt = fmt
+        self.replacements = {
+            phrase: rule if isinstance(rule, str) else rule[fmt]
+            for phrase, rule in PHRASE_RULES.items()
+        }
+        phrases = "|".join(re.escape(phrase) for phrase in sorted(self.replacements, key=len, reverse=True))
+        # Positions that cannot start any rule are skipped by one character class test
+        first_chars = "A-Z" + "".join(sorted(
+            {re.escape(phrase[0]) for phrase in self.replacements if not "A" <= phrase[0] <= "Z"}
+        ))
+        self.pattern = re.compile(f"(?=[{first_chars}])(?:{phrases}|(?P<flight>{FLIGHT_NUMBER_PATTERN}))")
+        self._replace = self._replace_markdown if fmt == "markdown" else self._replace_text
+
+    def _replace_markdown(self, match):
+        if match.lastgroup == "flight":
+            return f"**{match.group()}**"
+        return self.replacements[match.group()]
+
+    def _replace_text(self, match):
+        if match.lastgroup == "flight":
+            return match.group()
+        return self.replacements[match.group()]
+
+    def format(self, text):
+        """Format a block of text"""
+        return self.pattern.sub(self._replace, text) if text else text
+
+    def format_message(self, message):
+        """Format the text blocks of an agent message (see message_text)"""
+        return self.format(message_text(message))
+
+    def stream(self):
+        """Get a StreamFormatter applying this formatter to streamed text deltas"""
+        return StreamFormatter(self)
+
+
+class StreamFormatter:
+    """Formats streamed text deltas as whole lines become available
+
+    Every rule matches within a single line, so text is only held back
+    until the end of the current line.
+    """
+
+    def __init__(self, formatter):
+        self.formatter = formatter
+        self._pending = ""
+
+    def feed(self, chunk):
+        """Add a text delta and get the formatted text of the lines it completed"""
+        self._pending += chunk
+        cut = self._pending.rfind("\n") + 1
+        if not cut:
+            return ""
+        lines, self._pending = self._pending[:cut], self._pending[cut:]
+        return self.formatter.format(lines)
+
+    def flush(self):
+        """Get the formatted text of an unfinished last line"""
+        text, self._pending = self._pending, ""
+        return self.formatter.format(text)
+
+
+markdown_formatter = ResponseFormatter("markdown")
+text_formatter = ResponseFormatter("text")
+
+
+def apply_delaycompanion_formatting(text):
+    """Apply DelayCompanion-specific markdown formatting to response text"""
+    return markdown_formatter.format(text)
+
+
+def format_agent_response(response):
+    """Format an agent message or its text for display in the web app"""
+    return markdown_formatter.format_message(response)
@@ -0,0 +1,491 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from models.dynamodb import DynamoDBService, LOYALTY_TIER_ORDER
+
+logger = logging.getLogger("delaycompanion.handoffs")
+
+DEFAULT_QUEUE_PATH = Path(
+    os.environ.get("DELAYCOMPANION_CACHE_DIR", Path.home() / ".cache" / "delaycompanion")
+) / "handoffs.db"
+
+# Handoffs a passenger is still waiting on; a new request reuses one of these
+OPEN_STATUSES = ('pending', 'preparing', 'ready')
+
+# Seconds a worker may spend on a packet before another worker picks the job up again
+PREPARE_LEASE = 60
+
+# Seconds without a status check from the passenger's page before an open handoff expires
+HEARTBEAT_TIMEOUT = 60
+
+# Average call length assumed until enough calls were completed to measure it
+DEFAULT_SERVICE_SECONDS = 240
+# Completed calls and the time window used to measure service times and staffed agents
+SERVICE_SAMPLE_SIZE = 50
+AGENT_ACTIVITY_WINDOW = 3600
+
+# Chat messages copied into the packet so the agent can pick up the conversation
+TRANSCRIPT_MESSAGES = 10
+
+# Columns added after the first release, created on queues that predate them
+ADDED_COLUMNS = {
+    'flight_id': "TEXT",
+    'last_seen_at': "REAL"
+}
+
+
+def handoff_priority(passenger):
+    """Get the queue priority of a passenger's handoff (lower is served first)"""
+    tier = (passenger or {}).get('loyalty_tier')
+    return LOYALTY_TIER_ORDER.index(tier) if tier in LOYALTY_TIER_ORDER else len(LOYALTY_TIER_ORDER)
+
+
+def _json_default(value):
+    """Encode the Decimal values returned by DynamoDB"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class HandoffQueue:
+    """Durable SQLite queue of call-center handoffs
+
+    A handoff moves from pending (requested) to preparing (a worker is
+    building its packet) to ready (waiting for a call-center agent), then
+    to assigned and completed once an agent pulls and finishes it. Ready
+    handoffs are served by priority, then in request order. Wait estimates
+    use the real queue position together with the measured call length and
+    the number of agents active in the last hour.
+
+    The passenger's page reports in with touch while it shows the status.
+    An open handoff not seen for heartbeat_timeout seconds, e.g. because the
+    tab was closed, expires, so agents do not call passengers who left.
+    """
+
+    def __init__(self, path=None, default_service_seconds=DEFAULT_SERVICE_SECONDS,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        """
+        Initialize the queue
+
+        Args:
+            path: Optional SQLite database path, or ":memory:"
+            default_service_seconds: Call length assumed before any call was completed
+            heartbeat_timeout: Seconds without touch before an open handoff expires
+        """
+        self.path = str(path or DEFAULT_QUEUE_PATH)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.default_service_seconds = default_service_seconds
+        self.heartbeat_timeout = heartbeat_timeout
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS handoffs (
+                handoff_id TEXT PRIMARY KEY,
+                passenger_id TEXT NOT NULL,
+                flight_id TEXT,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                transcript TEXT,
+                packet TEXT,
+                error TEXT,
+                agent_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                lease_expires_at REAL,
+                ready_at REAL,
+                assigned_at REAL,
+                completed_at REAL,
+                last_seen_at REAL
+            )
+        """)
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(handoffs)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE handoffs ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS handoffs_by_status ON handoffs (status, priority, created_at)")
+        self._conn.commit()
+
+    def enqueue(self, passenger_id, priority=None, transcript=None, flight_id=None):
+        """
+        Request a handoff for a passenger
+
+        Args:
+            passenger_id: The passenger asking for an agent
+            priority: Optional queue priority (lower is served first); defaults to last
+            transcript: Optional list of chat messages ({"role", "content"}) to pass on
+            flight_id: Optional flight the passenger is on, so the packet's reads take one round trip
+
+        Returns:
+            Handoff ID; an open handoff for the same passenger is reused and touched
+        """
+        if priority is None:
+            priority = len(LOYALTY_TIER_ORDER)
+        transcript = json.dumps((transcript or [])[-TRANSCRIPT_MESSAGES:], default=_json_default)
+
+        with self._work_available:
+            now = time.time()
+            self._expire_stale(now)
+            row = self._conn.execute(
+                f"SELECT handoff_id FROM handoffs WHERE passenger_id = ? "
+                f"AND status IN ({', '.join('?' * len(OPEN_STATUSES))}) ORDER BY created_at LIMIT 1",
+                (passenger_id, *OPEN_STATUSES)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE handoffs SET last_seen_at = ? WHERE handoff_id = ?", (now, row['handoff_id']))
+                self._conn.commit()
+                return row['handoff_id']
+
+            handoff_id = str(uuid.uuid4())
+            self._conn.execute(
+                "INSERT INTO handoffs (handoff_id, passenger_id, flight_id, priority, status, transcript, created_at, "
+                "last_seen_at) VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)",
+                (handoff_id, passenger_id, flight_id, priority, transcript, now, now)
+            )
+            self._conn.commit()
+            self._work_available.notify()
+        return handoff_id
+
+    def claim_pending(self, timeout=None):
+        """
+        Take the next handoff whose packet has to be built
+
+        Handoffs whose worker lease ran out (e.g. after a crash) are taken
+        again. Blocks up to timeout seconds for work to arrive.
+
+        Returns:
+            Dict with handoff_id, passenger_id, flight_id, transcript and attempts, or None
+        """
+        deadline = time.monotonic() + (timeout or 0)
+        with self._work_available:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT handoff_id, passenger_id, flight_id, transcript, attempts FROM handoffs "
+                    "WHERE status = 'pending' OR (status = 'preparing' AND lease_expires_at <= ?) "
+                    "ORDER BY priority, created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE handoffs SET status = 'preparing', lease_expires_at = ?, attempts = attempts + 1 "
+                        "WHERE handoff_id = ?",
+                        (now + PREPARE_LEASE, row['handoff_id'])
+                    )
+                    self._conn.commit()
+                    return {
+                        "handoff_id": row['handoff_id'],
+                        "passenger_id": row['passenger_id'],
+                        "flight_id": row['flight_id'],
+                        "transcript": json.loads(row['transcript'] or "[]"),
+                        "attempts": row['attempts'] + 1
+                    }
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._work_available.wait(remaining)
+
+    def mark_ready(self, handoff_id, packet):
+        """Store a built packet and put the handoff in line for an agent"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE handoffs SET status = 'ready', packet = ?, ready_at = ?, lease_expires_at = NULL "
+                "WHERE handoff_id = ? AND status = 'preparing'",
+                (json.dumps(packet, default=_json_default), time.time(), handoff_id)
+            )
+            self._conn.commit()
+
+    def retry(self, handoff_id, delay):
+        """Let another worker build a packet again after delay seconds"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE handoffs SET lease_expires_at = ? WHERE handoff_id = ? AND status = 'preparing'",
+                (time.time() + delay, handoff_id)
+            )
+            self._conn.commit()
+
+    def mark_failed(self, handoff_id, error):
+        """Record that a packet could not be built"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE handoffs SET status = 'failed', error = ?, lease_expires_at = NULL "
+                "WHERE handoff_id = ? AND status = 'preparing'",
+                (str(error), handoff_id)
+            )
+            self._conn.commit()
+
+    def cancel(self, handoff_id):
+        """Withdraw a handoff the passenger no longer needs; returns False once an agent has it"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE handoffs SET status = 'cancelled' WHERE handoff_id = ? "
+                f"AND status IN ({', '.join('?' * len(OPEN_STATUSES))})",
+                (handoff_id, *OPEN_STATUSES)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def touch(self, handoff_id):
+        """Record that the passenger is still watching an open handoff"""
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE handoffs SET last_seen_at = ? WHERE handoff_id = ? "
+                f"AND status IN ({', '.join('?' * len(OPEN_STATUSES))})",
+                (time.time(), handoff_id, *OPEN_STATUSES)
+            )
+            self._conn.commit()
+
+    def _expire_stale(self, now):
+        """Expire open handoffs whose passenger stopped checking on them (caller holds the lock)"""
+        # Handoffs queued before last_seen_at existed count from their request
+        cursor = self._conn.execute(
+            f"UPDATE handoffs SET status = 'expired', lease_expires_at = NULL "
+            f"WHERE status IN ({', '.join('?' * len(OPEN_STATUSES))}) AND COALESCE(last_seen_at, created_at) < ?",
+            (*OPEN_STATUSES, now - self.heartbeat_timeout)
+        )
+        if cursor.rowcount:
+            logger.info(f"Expired {cursor.rowcount} handoffs whose passengers left")
+        self._conn.commit()
+
+    def next_for_agent(self, agent_id):
+        """
+        Give a call-center agent the next ready handoff
+
+        The agent's previous handoff, if still open, is completed first,
+        which is what the call-length estimate is measured on.
+
+        Returns:
+            Handoff dict including the packet, or None if nobody is waiting
+        """
+        with self._lock:
+            now = time.time()
+            self._expire_stale(now)
+            self._conn.execute(
+                "UPDATE handoffs SET status = 'completed', completed_at = ? WHERE agent_id = ? AND status = 'assigned'",
+                (now, agent_id)
+            )
+            row = self._conn.execute(
+                "SELECT handoff_id FROM handoffs WHERE status = 'ready' ORDER BY priority, created_at LIMIT 1"
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "UPDATE handoffs SET status = 'assigned', agent_id = ?, assigned_at = ? WHERE handoff_id = ?",
+                    (agent_id, now, row['handoff_id'])
+                )
+            self._conn.commit()
+
+        return self.get(row['handoff_id']) if row else None
+
+    def complete(self, handoff_id):
+        """Mark an assigned handoff as finished"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE handoffs SET status = 'completed', completed_at = ? WHERE handoff_id = ? AND status = 'assigned'",
+                (time.time(), handoff_id)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def _service_rate(self, now):
+        """Get (average call seconds, active agents) from recent completed calls (caller holds the lock)"""
+        durations = [
+            row[0] for row in self._conn.execute(
+                "SELECT completed_at - assigned_at FROM handoffs WHERE status = 'completed' "
+                "AND assigned_at IS NOT NULL ORDER BY completed_at DESC LIMIT ?",
+                (SERVICE_SAMPLE_SIZE,)
+            )
+        ]
+        service_seconds = sum(durations) / len(durations) if durations else self.default_service_seconds
+        agents = self._conn.execute(
+            "SELECT COUNT(DISTINCT agent_id) FROM handoffs WHERE assigned_at >= ?",
+            (now - AGENT_ACTIVITY_WINDOW,)
+        ).fetchone()[0]
+        return service_seconds, max(1, agents)
+
+    def get(self, handoff_id):
+        """
+        Get the status of a handoff
+
+        Returns:
+            Dict with status, packet (once ready), queue position and the
+            estimated seconds until an agent picks it up, or None
+        """
+        with self._lock:
+            # Passengers who left are not counted as ahead in line
+            self._expire_stale(time.time())
+            row = self._conn.execute("SELECT * FROM handoffs WHERE handoff_id = ?", (handoff_id,)).fetchone()
+            if row is None:
+                return None
+
+            handoff = {
+                "handoff_id": row['handoff_id'],
+                "passenger_id": row['passenger_id'],
+                "status": row['status'],
+                "priority": row['priority'],
+                "packet": json.loads(row['packet']) if row['packet'] else None,
+                "transcript": json.loads(row['transcript'] or "[]"),
+                "error": row['error'],
+                "agent_id": row['agent_id'],
+                "created_at": row['created_at'],
+                "position": None,
+                "estimated_wait_seconds": None
+            }
+            if row['status'] in OPEN_STATUSES:
+                # Everyone served before this passenger, whether or not their packet is built yet
+                ahead = self._conn.execute(
+                    f"SELECT COUNT(*) FROM handoffs WHERE status IN ({', '.join('?' * len(OPEN_STATUSES))}) "
+                    f"AND (priority < ? OR (priority = ? AND created_at < ?))",
+                    (*OPEN_STATUSES, row['priority'], row['priority'], row['created_at'])
+                ).fetchone()[0]
+                service_seconds, agents = self._service_rate(time.time())
+                in_call = self._conn.execute("SELECT COUNT(*) FROM handoffs WHERE status = 'assigned'").fetchone()[0]
+                # Free agents take the first passengers at once; the rest wait for calls to end
+                queued_behind_calls = ahead - max(0, agents - in_call)
+                handoff["position"] = ahead + 1
+                handoff["estimated_wait_seconds"] = (
+                    max(0, queued_behind_calls + 1) * service_seconds / agents
+                )
+            return handoff
+
+    def stats(self):
+        """Get queue depth by status and the measured service rate"""
+        with self._lock:
+            self._expire_stale(time.time())
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM handoffs GROUP BY status").fetchall())
+            service_seconds, agents = self._service_rate(time.time())
+        return {
+            "by_status": counts,
+            "waiting": sum(counts.get(status, 0) for status in OPEN_STATUSES),
+            "average_call_seconds": service_seconds,
+            "active_agents": agents
+        }
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class HandoffWorkerPool:
+    """Background threads that build handoff packets off the request path
+
+    Each worker claims a pending handoff, reads the passenger's handoff
+    context from DynamoDB and stores the finished packet, so the passenger
+    only waits for a queue insert. A packet that fails to build is retried
+    up to max_attempts times before the handoff is marked failed.
+
+    One more thread looks for newly delayed flights every materialize_interval
+    seconds and precomputes the handoff contexts of their manifests, so most
+    packets are built without reading DynamoDB.
+    """
+
+    def __init__(self, handoff_queue=None, db_service=None, workers=4, max_attempts=3, retry_delay=2.0,
+                 materialize_interval=60.0):
+        """
+        Initialize the worker pool
+
+        Args:
+            handoff_queue: Optional HandoffQueue; defaults to the on-disk queue
+            db_service: Optional DynamoDBService used to build the packets
+            workers: Number of worker threads
+            max_attempts: Attempts per packet before giving up
+            retry_delay: Seconds before a failed packet is built again
+            materialize_interval: Seconds between checks for newly delayed flights, or None to disable
+        """
+        self.queue = handoff_queue or HandoffQueue()
+        self.db_service = db_service or DynamoDBService()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.materialize_interval = materialize_interval
+        self._threads = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.retried = 0
+        self.failed = 0
+        self.materialized = 0
+
+    def start(self):
+        """Start the worker threads (a no-op if they are already running)"""
+        if self._threads:
+            return self
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"handoff-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.materialize_interval:
+            thread = threading.Thread(target=self._materialize, name="handoff-materializer", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=5):
+        """Stop the workers after their current packet"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def build_packet(self, passenger_id, transcript, flight_id=None):
+        """Build the packet shown to the call-center agent"""
+        context = self.db_service.generate_handoff_context(passenger_id, flight_id=flight_id)
+        if not context:
+            raise LookupError(f"No passenger or flight found for {passenger_id}")
+        context['transcript'] = transcript
+        return context
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.queue.claim_pending(timeout=1.0)
+            if job is None:
+                continue
+            try:
+                packet = self.build_packet(job['passenger_id'], job['transcript'], job['flight_id'])
+            except Exception as e:
+                logger.warning(f"Failed to build handoff packet for {job['passenger_id']}: {str(e)}")
+                if job['attempts'] < self.max_attempts:
+                    self.queue.retry(job['handoff_id'], self.retry_delay)
+                    self._count("retried")
+                else:
+                    self.queue.mark_failed(job['handoff_id'], e)
+                    self._count("failed")
+                continue
+            self.queue.mark_ready(job['handoff_id'], packet)
+            self._count("built")
+
+    def _materialize(self):
+        while not self._stopping.is_set():
+            try:
+                materialized = self.db_service.materialize_delayed_flights()
+                for flight_id, count in materialized.items():
+                    logger.info(f"Materialized {count} handoff contexts for delayed flight {flight_id}")
+                    with self._lock:
+                        self.materialized += count
+            except Exception as e:
+                logger.warning(f"Failed to materialize handoff contexts: {str(e)}")
+            self._stopping.wait(self.materialize_interval)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        """Get worker counters together with the queue statistics"""
+        stats = self.queue.stats()
+        with self._lock:
+            stats.update({"workers": len(self._threads), "built": self.built, "retried": self.retried,
+                          "failed": self.failed, "materialized": self.materialized})
+        return stats
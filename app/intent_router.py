@@ -0,0 +1,240 @@
+import re
+import threading
+import time
+
+from app.messages import format_delay_duration, get_delay_emoji
+
+# Phrases that settle an intent on their own
+STRONG_PATTERNS = {
+    "gate": [
+        r"\bwhich gate\b", r"\bwhat gate\b", r"\bwhat(?:'s| is) (?:my|the) gate\b",
+        r"\bwhere do i board\b", r"\bwhich terminal\b", r"\bwhat terminal\b"
+    ],
+    "delay": [
+        r"\bhow long\b.*\bdelay", r"\bhow (?:late|long)\b", r"\bwhy\b.*\bdelayed\b",
+        r"\bwhen (?:will|does|do) (?:my|the|we|it)\b.*\b(?:leave|depart|take off|board)",
+        r"\bnew departure\b", r"\bdelay (?:reason|time|status)\b", r"\bflight status\b",
+        r"\bis my flight (?:delayed|on time|late)\b"
+    ],
+    "rebooking_options": [
+        r"\brebooking options\b", r"\b(?:show|list|what are)\b.*\boptions\b",
+        r"\bother flights\b", r"\balternative flights?\b", r"\bearlier flights?\b",
+        r"\bavailable flights\b"
+    ],
+    "seat": [
+        r"\bwhat(?:'s| is) my seat\b", r"\bwhich seat\b", r"\bmy seat number\b", r"\bwhere am i sitting\b"
+    ]
+}
+
+# Single keywords that only suggest an intent
+WEAK_PATTERNS = {
+    "gate": [r"\bgate\b", r"\bterminal\b"],
+    "delay": [r"\bdelay(?:ed)?\b", r"\blate\b", r"\bstatus\b", r"\bdepart(?:ure|s)?\b"],
+    "rebooking_options": [r"\boptions?\b", r"\balternatives?\b"],
+    "seat": [r"\bseat\b"]
+}
+
+# Requests that change a booking or need a person always go to the agent
+FALLTHROUGH_PATTERNS = [
+    r"\brebook (?:me|my)\b", r"\bbook\b", r"\bchange\b", r"\bswitch\b", r"\bcancel",
+    r"\bmove me\b", r"\bupgrade\b", r"\bemail\b", r"\bsend\b", r"\bagent\b", r"\bhuman\b",
+    r"\bcall\b", r"\brefund", r"\bcompensat", r"\bvoucher", r"\bhotel\b", r"\bmeal\b",
+    r"\bbaggage\b", r"\bluggage\b", r"\bcomplain", r"\bconnect", r"\bwindow\b", r"\baisle\b",
+    r"\bif\b", r"\bshould i\b", r"\bcan you\b"
+]
+
+# Flights that will not leave as scheduled; gate and departure answers do not apply
+DISRUPTED_STATUSES = ('Cancelled', 'Diverted')
+
+STRONG_CONFIDENCE = 0.95
+# A lone keyword clears the default threshold of 0.8 only in a short message
+# that mentions no other topic
+WEAK_CONFIDENCE = 0.85
+# Longer messages usually carry more than one question
+MAX_WORDS = 14
+
+
+def _compile(patterns):
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+_STRONG = {intent: _compile(patterns) for intent, patterns in STRONG_PATTERNS.items()}
+_WEAK = {intent: _compile(patterns) for intent, patterns in WEAK_PATTERNS.items()}
+_FALLTHROUGH = _compile(FALLTHROUGH_PATTERNS)
+
+
+def _text_message(text):
+    """Wrap text in the message shape returned by a Strands agent turn"""
+    return {"role": "assistant", "content": [{"text": text}]}
+
+
+class IntentRouter:
+    """Deterministic fast path for simple questions about the passenger's own flight
+
+    Gate, delay, seat and rebooking-option questions are answered straight
+    from the passenger context that the agent already loads, without a
+    Bedrock call; rebooking options also get their live seat counts.
+    Anything the classifier is not confident about returns None so the
+    caller falls through to the full agent.
+    """
+
+    def __init__(self, min_confidence=0.8, seat_availability=None):
+        """
+        Initialize the router
+
+        Args:
+            min_confidence: Minimum classifier confidence for answering on the fast path
+            seat_availability: Optional callable taking flight IDs and returning a dict of
+                flight ID to open seats; without it rebooking options fall through to the agent
+        """
+        self.min_confidence = min_confidence
+        self.seat_availability = seat_availability
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.hits = 0
+        self.by_intent = {intent: 0 for intent in STRONG_PATTERNS}
+        self.fast_path_seconds = 0.0
+        self.agent_turns = 0
+        self.agent_seconds = 0.0
+
+    def classify(self, query):
+        """
+        Classify a passenger message
+
+        Returns:
+            Tuple of (intent or None, confidence between 0 and 1)
+        """
+        text = query.lower().strip()
+        if not text or _FALLTHROUGH.search(text):
+            return None, 0.0
+
+        strong = [intent for intent, pattern in _STRONG.items() if pattern.search(text)]
+        weak = [intent for intent, pattern in _WEAK.items() if pattern.search(text)]
+
+        if len(strong) == 1:
+            intent, confidence = strong[0], STRONG_CONFIDENCE
+        elif not strong and len(weak) == 1:
+            intent, confidence = weak[0], WEAK_CONFIDENCE
+        else:
+            # Nothing matched or the message mixes several topics
+            return None, 0.0
+
+        # Other topics mentioned alongside the main one lower the confidence
+        if any(other != intent for other in weak):
+            confidence -= 0.2
+        words = len(text.split())
+        if words > MAX_WORDS:
+            confidence -= 0.05 * (words - MAX_WORDS)
+        return intent, max(0.0, confidence)
+
+    def answer(self, intent, passenger, flight):
+        """Build the answer for an intent from the passenger and flight items"""
+        flight_number = flight.get('flight_number')
+        status = flight.get('status')
+
+        if intent == "gate":
+            if status in DISRUPTED_STATUSES:
+                return None
+            return (f"🛫 Your flight {flight_number} departs from gate {flight.get('gate')} "
+                    f"in terminal {flight.get('terminal')}.")
+
+        if intent == "seat":
+            seat = passenger.get('seat')
+            if not seat:
+                return None
+            return f"💺 Your seat on flight {flight_number} is {seat}."
+
+        if intent == "delay":
+            if status == 'Cancelled':
+                return (f"❌ Your flight {flight_number} from {flight.get('origin')} to "
+                        f"{flight.get('destination')} has been cancelled. Ask me for your rebooking "
+                        f"options, or I can connect you with an agent.")
+            if status in DISRUPTED_STATUSES:
+                return None
+            delay_minutes = int(flight.get('delay_minutes') or 0)
+            if delay_minutes <= 0:
+                return (f"✅ Your flight {flight_number} from {flight.get('origin')} to "
+                        f"{flight.get('destination')} is on time, departing at "
+                        f"{flight.get('scheduled_departure')}.")
+            reason = flight.get('delay_reason')
+            return (f"⏰ Your flight {flight_number} from {flight.get('origin')} to "
+                    f"{flight.get('destination')} is delayed by {format_delay_duration(delay_minutes)}.\n\n"
+                    f"• Reason: {get_delay_emoji(reason)} {reason}\n"
+                    f"• Original departure: {flight.get('scheduled_departure')}\n"
+                    f"• New departure: {flight.get('actual_departure')}\n"
+                    f"• Gate: {flight.get('gate')}, Terminal: {flight.get('terminal')}")
+
+        if intent == "rebooking_options":
+            options = flight.get('rebooking_options') or []
+            if options:
+                if self.seat_availability is None:
+                    return None
+                # Like the web app's panel, leave out sold-out flights and show the seats left
+                availability = self.seat_availability([option.get('flight_id') for option in options])
+                options = [option for option in options if availability.get(option.get('flight_id'), 1) > 0]
+            if not options:
+                return (f"There are currently no rebooking options with open seats for flight "
+                        f"{flight_number}. I can connect you with an agent if you need more help.")
+            lines = [f"✈️ Rebooking options for flight {flight_number}:"]
+            for i, option in enumerate(options, 1):
+                seats_left = availability.get(option.get('flight_id'))
+                seats = f" - {seats_left} seats left" if seats_left is not None else ""
+                lines.append(f"{i}. Flight {option['flight_number']} - Departs: {option['departure']} "
+                             f"- Arrives: {option['arrival']}{seats}")
+            lines.append("\nLet me know which flight you would like and I can rebook you.")
+            return "\n".join(lines)
+
+        return None
+
+    def route(self, query, context, started=None):
+        """
+        Answer a message on the fast path if possible
+
+        Args:
+            query: The passenger's message without the context prefix
+            context: Dict with the "passenger" and "flight" items, possibly empty
+            started: Optional perf_counter() value when the turn began, for latency stats
+
+        Returns:
+            Assistant message dict, or None to fall through to the agent
+        """
+        started = started or time.perf_counter()
+        passenger = context.get('passenger')
+        flight = context.get('flight')
+
+        text = None
+        intent, confidence = self.classify(query)
+        if intent and confidence >= self.min_confidence and passenger and flight:
+            text = self.answer(intent, passenger, flight)
+
+        with self._lock:
+            self.queries += 1
+            if text is None:
+                return None
+            self.hits += 1
+            self.by_intent[intent] += 1
+            self.fast_path_seconds += time.perf_counter() - started
+        return _text_message(text)
+
+    def record_agent_turn(self, seconds):
+        """Record the latency of a turn that fell through to the agent"""
+        with self._lock:
+            self.agent_turns += 1
+            self.agent_seconds += seconds
+
+    def stats(self):
+        """Get hit rate and latency saved by the fast path"""
+        with self._lock:
+            fast_avg = self.fast_path_seconds / self.hits if self.hits else 0.0
+            agent_avg = self.agent_seconds / self.agent_turns if self.agent_turns else 0.0
+            return {
+                "queries": self.queries,
+                "hits": self.hits,
+                "fallthroughs": self.queries - self.hits,
+                "hit_ratio": self.hits / self.queries if self.queries else 0.0,
+                "by_intent": dict(self.by_intent),
+                "fast_path_ms_avg": fast_avg * 1000,
+                "agent_ms_avg": agent_avg * 1000,
+                # Estimated from the average latency of turns that did reach the agent
+                "latency_saved_s": max(0.0, agent_avg - fast_avg) * self.hits
+            }
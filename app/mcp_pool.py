@@ -0,0 +1,435 @@
+import asyncio
+import atexit
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+
+from mcp import stdio_client, StdioServerParameters
+from strands.tools.mcp import MCPClient
+
+from app.tool_catalog import ToolCatalog, fingerprint
+from models.storage import get_storage_backend
+
+logger = logging.getLogger("delaycompanion.mcp_pool")
+
+# Pinned server versions; override through the environment to upgrade
+DYNAMODB_MCP_VERSION = os.environ.get("DELAYCOMPANION_DYNAMODB_MCP_VERSION", "2.1.8")
+GMAIL_MCP_VERSION = os.environ.get("DELAYCOMPANION_GMAIL_MCP_VERSION", "1.1.11")
+
+# Seconds before a server that failed to start is launched again, doubling per failure
+RESTART_BACKOFF = 5.0
+MAX_RESTART_BACKOFF = 300.0
+
+
+class MCPServerSpec:
+    """Pinned launch configuration for one stdio MCP server"""
+
+    def __init__(self, name, launcher, package, version, binary=None, env=None):
+        """
+        Initialize the server spec
+
+        Args:
+            name: Server name used as the pool key
+            launcher: Package runner, either "uvx" or "npx"
+            package: Package name of the server
+            version: Pinned package version
+            binary: Optional executable installed by prefetch(), used instead of the launcher
+            env: Optional environment variables for the server process
+        """
+        self.name = name
+        self.launcher = launcher
+        self.package = package
+        self.version = version
+        self.binary = binary
+        self.env = env
+
+    def parameters(self):
+        """Get the stdio parameters, preferring an already installed binary"""
+        binary_path = shutil.which(self.binary) if self.binary else None
+        if binary_path:
+            return StdioServerParameters(command=binary_path, args=[], env=self.env)
+        if self.launcher == "uvx":
+            return StdioServerParameters(
+                command="uvx",
+                args=[f"{self.package}@{self.version}"],
+                env=self.env
+            )
+        return StdioServerParameters(
+            command="npx",
+            args=["--yes", "--prefer-offline", f"{self.package}@{self.version}"],
+            env=self.env
+        )
+
+    def prefetch_command(self):
+        """Get the command that resolves and installs the pinned package ahead of time"""
+        if self.launcher == "uvx":
+            return ["uv", "tool", "install", f"{self.package}=={self.version}"]
+        return ["npm", "cache", "add", f"{self.package}@{self.version}"]
+
+    def fingerprint(self):
+        """Get the version fingerprint used to validate cached tool schemas"""
+        return fingerprint({
+            "launcher": self.launcher,
+            "package": self.package,
+            "version": self.version,
+            "env": self.env or {}
+        })
+
+
+def default_server_specs(storage=None):
+    """
+    Get the MCP servers used by DelayCompanion
+
+    Args:
+        storage: Name of the storage backend; defaults to the configured one.
+            The DynamoDB server reads Amazon DynamoDB, so it is only used
+            when the tables live there.
+    """
+    specs = {
+        "dynamodb": MCPServerSpec(
+            "dynamodb",
+            launcher="uvx",
+            package="awslabs.dynamodb-mcp-server",
+            version=DYNAMODB_MCP_VERSION,
+            binary="awslabs.dynamodb-mcp-server",
+            env={
+                "DDB-MCP-READONLY": "true",
+                "AWS_PROFILE": "default",
+                "AWS_REGION": "us-west-2",
+                "FASTMCP_LOG_LEVEL": "DEBUG"
+            }
+        ),
+        "gmail": MCPServerSpec(
+            "gmail",
+            launcher="npx",
+            package="@gongrzhe/server-gmail-autoauth-mcp",
+            version=GMAIL_MCP_VERSION
+        )
+    }
+    storage = storage or get_storage_backend().name
+    if storage != "dynamodb":
+        logger.warning(
+            f"DynamoDB MCP server disabled: it reads Amazon DynamoDB, not the {storage} storage in use. "
+            f"The agent answers from its built-in flight and passenger tools instead."
+        )
+        del specs["dynamodb"]
+    return specs
+
+
+class MCPServerPool:
+    """Long-lived pool of MCP client sessions shared across agent turns
+
+    Each MCP server is launched once and kept running. A background monitor
+    pings every server periodically and restarts the ones that have crashed.
+    The client objects are reused across restarts, so tools handed to agents
+    stay valid; the generation counter only changes when a tool catalog does.
+
+    Launches and pings run outside the pool lock, so a slow or dead server
+    never holds up agents asking for the warm tools. A server that failed
+    to start is left to the monitor, which retries it with exponential
+    backoff instead of on every get_tools call.
+    """
+
+    def __init__(self, server_specs=None, health_check_interval=30.0, catalog=None):
+        """
+        Initialize the pool (servers are started lazily or via start())
+
+        Args:
+            server_specs: Mapping of server name to MCPServerSpec
+            health_check_interval: Seconds between background health checks
+            catalog: Optional ToolCatalog used to cache tool schemas on disk
+        """
+        self.server_specs = server_specs or default_server_specs()
+        self.health_check_interval = health_check_interval
+        self.catalog = catalog or ToolCatalog()
+        self.generation = 0
+
+        self._clients = {}
+        self._warm = set()
+        self._tools = {}
+        self._restarts = {name: 0 for name in self.server_specs}
+        self._failures = {name: 0 for name in self.server_specs}
+        self._retry_at = {name: 0.0 for name in self.server_specs}
+        # Held while a server is launched, so only one thread launches it
+        self._starting = {name: threading.Lock() for name in self.server_specs}
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._monitor = None
+
+    def _get_client(self, name):
+        """Get the persistent client for a server, creating it on first use (caller holds the lock)"""
+        client = self._clients.get(name)
+        if client is None:
+            params = self.server_specs[name].parameters()
+            client = MCPClient(lambda: stdio_client(params))
+            self._clients[name] = client
+        return client
+
+    def _set_tools(self, name, tools):
+        """Replace a server's tools, bumping the generation if the catalog changed (caller holds the lock)"""
+        previous = self._tools.get(name)
+        self._tools[name] = tools
+        if previous is None or ToolCatalog.tool_names(previous) != ToolCatalog.tool_names(tools):
+            self.generation += 1
+
+    def _start_server(self, name):
+        """
+        Launch a single MCP server, loading its tools from the catalog when possible
+
+        The launch runs without the pool lock; the server and its tools are
+        published under the lock once it is up.
+        """
+        spec = self.server_specs[name]
+        with self._lock:
+            client = self._get_client(name)
+            tools = self._tools.get(name)
+        client.start()
+
+        if tools is None:
+            server_fingerprint = spec.fingerprint()
+            schemas = self.catalog.load(name, server_fingerprint)
+            if schemas is not None:
+                tools = ToolCatalog.build_tools(schemas, client)
+                logger.info(f"MCP server '{name}' started with {len(schemas)} cached tools")
+            else:
+                try:
+                    tools = client.list_tools_sync()
+                except Exception:
+                    self._stop_server(name)
+                    raise
+                self.catalog.save(name, server_fingerprint, tools)
+                logger.info(f"MCP server '{name}' started with {len(tools)} tools")
+
+        with self._lock:
+            self._set_tools(name, tools)
+            self._warm.add(name)
+            self._failures[name] = 0
+            self._retry_at[name] = 0.0
+
+    def _try_start(self, name):
+        """
+        Start a server unless it is warm, backing off or being started by another thread
+
+        Returns:
+            True if the server is warm afterwards
+        """
+        starting = self._starting[name]
+        if not starting.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if name in self._warm:
+                    return True
+                if time.monotonic() < self._retry_at[name]:
+                    return False
+            try:
+                self._start_server(name)
+                return True
+            except Exception as e:
+                with self._lock:
+                    self._failures[name] += 1
+                    backoff = min(RESTART_BACKOFF * 2 ** (self._failures[name] - 1), MAX_RESTART_BACKOFF)
+                    self._retry_at[name] = time.monotonic() + backoff
+                logger.error(f"Failed to start MCP server '{name}', next attempt in {backoff:.0f}s: {str(e)}")
+                return False
+        finally:
+            starting.release()
+
+    def _stop_server(self, name):
+        """Shut down a single MCP server, ignoring errors from dead processes"""
+        with self._lock:
+            self._warm.discard(name)
+            client = self._clients.get(name)
+        if client is None:
+            return
+
+        try:
+            client.stop(None, None, None)
+        except Exception as e:
+            logger.debug(f"Error stopping MCP server '{name}': {str(e)}")
+
+    def prefetch(self):
+        """Resolve and install the pinned server packages so launches skip resolution"""
+        for name, spec in self.server_specs.items():
+            if spec.binary and shutil.which(spec.binary):
+                continue
+            command = spec.prefetch_command()
+            if not shutil.which(command[0]):
+                logger.debug(f"Skipping prefetch of '{name}': {command[0]} not found")
+                continue
+            try:
+                subprocess.run(command, check=True, capture_output=True, timeout=600)
+                logger.info(f"Prefetched MCP server '{name}' ({spec.package} {spec.version})")
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning(f"Failed to prefetch MCP server '{name}': {str(e)}")
+
+            # The launch command changes once the binary is installed
+            with self._lock:
+                if name not in self._warm:
+                    self._clients.pop(name, None)
+                    self._tools.pop(name, None)
+
+    def warm_up(self):
+        """Prefetch the server packages and start every server"""
+        self.prefetch()
+        status = self.start()
+        logger.info(f"MCP server pool warm: {status['warm']}/{status['total']} sessions")
+        return status
+
+    def warm_up_async(self):
+        """Run warm_up() on a background thread and return the thread"""
+        thread = threading.Thread(target=self.warm_up, name="mcp-pool-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def start(self):
+        """Start every server that is not already running or backing off, and the health monitor"""
+        for name in self.server_specs:
+            self._try_start(name)
+        self._start_monitor()
+        return self.status()
+
+    def _start_monitor(self):
+        """Start the health monitor thread if it is enabled and not running"""
+        with self._lock:
+            if self._monitor is None and self.health_check_interval:
+                self._stop_event.clear()
+                self._monitor = threading.Thread(
+                    target=self._monitor_loop,
+                    name="mcp-pool-monitor",
+                    daemon=True
+                )
+                self._monitor.start()
+
+    def stop(self):
+        """Stop the health monitor and shut down all servers"""
+        self._stop_event.set()
+        with self._lock:
+            warm = list(self._warm)
+            self._monitor = None
+        for name in warm:
+            self._stop_server(name)
+
+    def _start_first_time(self, names):
+        """Start servers that have not failed yet; failed ones are retried by the monitor"""
+        with self._lock:
+            # Without a monitor, callers retry failed servers once their backoff ran out
+            due = [
+                name for name in names
+                if name not in self._warm and (not self._failures[name] or not self.health_check_interval)
+            ]
+        for name in due:
+            self._try_start(name)
+        self._start_monitor()
+
+    def get_tools(self):
+        """Get the tools of all warm servers, starting servers on first use"""
+        self._start_first_time(self.server_specs)
+        with self._lock:
+            return [
+                tool
+                for name in self.server_specs if name in self._warm
+                for tool in self._tools.get(name, [])
+            ]
+
+    def get_client(self, name):
+        """Get the warm MCPClient for a server, starting it on first use"""
+        self._start_first_time([name])
+        with self._lock:
+            return self._clients.get(name) if name in self._warm else None
+
+    async def call_tool_async(self, name, tool_name, arguments=None, timeout=30.0):
+        """
+        Call a tool on a warm server without blocking the event loop
+
+        Args:
+            name: Server name
+            tool_name: Name of the MCP tool
+            arguments: Optional tool arguments
+            timeout: Timeout in seconds for the call
+        """
+        client = await asyncio.to_thread(self.get_client, name)
+        if client is None:
+            raise RuntimeError(f"MCP server '{name}' is not available")
+        return await asyncio.wait_for(
+            client.call_tool_async(str(uuid.uuid4()), tool_name, arguments),
+            timeout
+        )
+
+    def health_check(self):
+        """Ping every server and restart the ones that are not responding"""
+        with self._lock:
+            warm = {name: self._clients[name] for name in self.server_specs if name in self._warm}
+
+        # Servers are pinged without the lock, so a slow one does not hold up get_tools
+        for name in self.server_specs:
+            client = warm.get(name)
+            if client is not None:
+                try:
+                    tools = client.list_tools_sync()
+                except Exception as e:
+                    logger.warning(f"MCP server '{name}' failed health check: {str(e)}")
+                    self._stop_server(name)
+                    with self._lock:
+                        self._restarts[name] += 1
+                else:
+                    with self._lock:
+                        changed = ToolCatalog.tool_names(tools) != ToolCatalog.tool_names(self._tools.get(name, []))
+                        if changed:
+                            self._set_tools(name, tools)
+                    if changed:
+                        self.catalog.save(name, self.server_specs[name].fingerprint(), tools)
+                    continue
+
+            self._try_start(name)
+
+        return self.status()
+
+    def _monitor_loop(self):
+        """Run health checks until the pool is stopped"""
+        while not self._stop_event.wait(self.health_check_interval):
+            try:
+                self.health_check()
+            except Exception as e:
+                logger.error(f"MCP health check failed: {str(e)}")
+
+    def warm_count(self):
+        """Get the number of MCP sessions that are currently warm"""
+        with self._lock:
+            return len(self._warm)
+
+    def status(self):
+        """Get a summary of warm sessions, tool counts and restarts"""
+        with self._lock:
+            return {
+                "warm": len(self._warm),
+                "total": len(self.server_specs),
+                "generation": self.generation,
+                "servers": {
+                    name: {
+                        "warm": name in self._warm,
+                        "tools": len(self._tools.get(name, [])),
+                        "restarts": self._restarts[name],
+                        "failures": self._failures[name]
+                    }
+                    for name in self.server_specs
+                }
+            }
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool():
+    """Get the process-wide MCP server pool shared by all agents"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = MCPServerPool()
+            atexit.register(_shared_pool.stop)
+        return _shared_pool
@@ -0,0 +1,313 @@
+from html import escape
+from string import Formatter
+
+# Emoji shown next to each delay reason
+REASON_EMOJIS = {
+    "Weather": "🌧️",
+    "Mechanical": "🔧",
+    "Crew": "👨‍✈️",
+    "Air Traffic Control": "🗼",
+    "Aircraft Late Arrival": "⏱️",
+    "Security": "🔒",
+    "Other": "ℹ️"
+}
+DEFAULT_REASON_EMOJI = "ℹ️"
+
+MESSAGE_FORMATS = ("text", "markdown", "html")
+
+# Each format is split around the passenger name so the flight-specific part of
+# a message is rendered once and reused for every passenger on the flight.
+_TEMPLATES = {
+    "markdown": {
+        "greeting": "\nHello ",
+        "body": """,
+
+❗ **FLIGHT DELAY ALERT** ❗
+
+Your flight {flight_number} from {origin} to {destination} has been delayed by {delay_text}.
+
+📋 **DELAY DETAILS**
+• Reason: {reason_emoji} {delay_reason}
+• Original departure: {scheduled_departure}
+• New departure: {new_departure}
+• Gate: {gate}
+• Terminal: {terminal}
+
+✈️ **REBOOKING OPTIONS**
+{options}
+📱 **NEED HELP?**
+• Select a rebooking option
+• Request a call with an agent
+• Update your preferences
+
+We apologize for the inconvenience and are working to get you to your destination as soon as possible.
+""",
+        "option": "{index}. Flight {flight_number} - Departs: {departure} - Arrives: {arrival}\n",
+        "no_options": "No rebooking options are currently available.\n"
+    },
+    "text": {
+        "greeting": "Hello ",
+        "body": """,
+
+FLIGHT DELAY ALERT
+
+Your flight {flight_number} from {origin} to {destination} has been delayed by {delay_text}.
+
+DELAY DETAILS
+- Reason: {delay_reason}
+- Original departure: {scheduled_departure}
+- New departure: {new_departure}
+- Gate: {gate}
+- Terminal: {terminal}
+
+REBOOKING OPTIONS
+{options}
+NEED HELP?
+- Select a rebooking option
+- Request a call with an agent
+- Update your preferences
+
+We apologize for the inconvenience and are working to get you to your destination as soon as possible.
+""",
+        "option": "{index}. Flight {flight_number} - Departs: {departure} - Arrives: {arrival}\n",
+        "no_options": "No rebooking options are currently available.\n"
+    },
+    "html": {
+        "greeting": "<p>Hello ",
+        "body": """,</p>
+<h2>❗ FLIGHT DELAY ALERT ❗</h2>
+<p>Your flight {flight_number} from {origin} to {destination} has been delayed by {delay_text}.</p>
+<h3>📋 DELAY DETAILS</h3>
+<ul>
+<li>Reason: {reason_emoji} {delay_reason}</li>
+<li>Original departure: {scheduled_departure}</li>
+<li>New departure: {new_departure}</li>
+<li>Gate: {gate}</li>
+<li>Terminal: {terminal}</li>
+</ul>
+<h3>✈️ REBOOKING OPTIONS</h3>
+{options}<h3>📱 NEED HELP?</h3>
+<ul>
+<li>Select a rebooking option</li>
+<li>Request a call with an agent</li>
+<li>Update your preferences</li>
+</ul>
+<p>We apologize for the inconvenience and are working to get you to your destination as soon as possible.</p>
+""",
+        "option": "<li>Flight {flight_number} - Departs: {departure} - Arrives: {arrival}</li>\n",
+        "no_options": "<p>No rebooking options are currently available.</p>\n",
+        "options_open": "<ol>\n",
+        "options_close": "</ol>\n"
+    }
+}
+
+
+class CompiledTemplate:
+    """A template split once into literal text and field names
+
+    Rendering joins the pieces directly, which avoids re-parsing the template
+    on every str.format() call.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, template):
+        self.parts = tuple(
+            (literal, field) for literal, field, _, _ in Formatter().parse(template)
+        )
+
+    def render(self, values):
+        """Render the template from a dict of already formatted strings"""
+        out = []
+        append = out.append
+        for literal, field in self.parts:
+            append(literal)
+            if field is not None:
+                append(values[field])
+        return "".join(out)
+
+
+def _compile(templates):
+    """Compile the {field} templates of one format, keeping plain strings as they are"""
+    return {
+        key: CompiledTemplate(value) if "{" in value else value
+        for key, value in templates.items()
+    }
+
+
+_COMPILED = {fmt: _compile(templates) for fmt, templates in _TEMPLATES.items()}
+
+
+def format_delay_duration(delay_minutes):
+    """Format delay duration in a readable format"""
+    delay_minutes = int(delay_minutes)
+    hours = delay_minutes // 60
+    mins = delay_minutes % 60
+    return f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
+
+
+def get_delay_emoji(delay_reason):
+    """Get appropriate emoji for delay reason"""
+    return REASON_EMOJIS.get(delay_reason, DEFAULT_REASON_EMOJI)
+
+
+class PreparedMessage:
+    """A delay message rendered for one flight, waiting for a passenger name"""
+
+    __slots__ = ("greeting", "body", "html")
+
+    def __init__(self, greeting, body, html=False):
+        self.greeting = greeting
+        self.body = body
+        self.html = html
+
+    def for_passenger(self, passenger_name):
+        """Get the full message for a passenger"""
+        name = escape(str(passenger_name)) if self.html else str(passenger_name)
+        return self.greeting + name + self.body
+
+
+class DelayMessageRenderer:
+    """Renders delay notifications in text, markdown or HTML
+
+    The templates are compiled once at import time. Everything that depends only on
+    the flight is rendered once by prepare(), so rendering a whole manifest
+    costs one string concatenation per passenger.
+    """
+
+    def prepare(self, flight_number, origin, destination, delay_minutes, delay_reason,
+                scheduled_departure, new_departure, gate, terminal, rebooking_options, fmt="markdown"):
+        """
+        Render the flight-specific part of a delay message
+
+        Args:
+            flight_number: Flight number
+            origin: Origin airport code
+            destination: Destination airport code
+            delay_minutes: Delay duration in minutes
+            delay_reason: Reason for the delay
+            scheduled_departure: Original scheduled departure time
+            new_departure: New expected departure time
+            gate: Gate information
+            terminal: Terminal information
+            rebooking_options: List of available rebooking options
+            fmt: One of "text", "markdown" or "html"
+
+        Returns:
+            PreparedMessage to call for_passenger() on
+        """
+        templates = _COMPILED[fmt]
+        html = fmt == "html"
+        clean = escape if html else str
+
+        if rebooking_options:
+            render_option = templates["option"].render
+            options = "".join([
+                render_option({
+                    'index': str(i),
+                    'flight_number': clean(str(option['flight_number'])),
+                    'departure': clean(str(option['departure'])),
+                    'arrival': clean(str(option['arrival']))
+                })
+                for i, option in enumerate(rebooking_options, 1)
+            ])
+            if html:
+                options = templates["options_open"] + options + templates["options_close"]
+        else:
+            options = templates["no_options"]
+
+        body = templates["body"].render({
+            'flight_number': clean(str(flight_number)),
+            'origin': clean(str(origin)),
+            'destination': clean(str(destination)),
+            'delay_text': format_delay_duration(delay_minutes),
+            'reason_emoji': REASON_EMOJIS.get(delay_reason, DEFAULT_REASON_EMOJI),
+            'delay_reason': clean(str(delay_reason)),
+            'scheduled_departure': clean(str(scheduled_departure)),
+            'new_departure': clean(str(new_departure)),
+            'gate': clean(str(gate)),
+            'terminal': clean(str(terminal)),
+            'options': options
+        })
+        return PreparedMessage(templates["greeting"], body, html)
+
+    def prepare_flight(self, flight, fmt="markdown"):
+        """Render the flight-specific part of a delay message from a flight item"""
+        return self.prepare(
+            flight.get('flight_number'),
+            flight.get('origin'),
+            flight.get('destination'),
+            flight.get('delay_minutes') or 0,
+            flight.get('delay_reason'),
+            flight.get('scheduled_departure'),
+            flight.get('actual_departure'),
+            flight.get('gate'),
+            flight.get('terminal'),
+            flight.get('rebooking_options', []),
+            fmt=fmt
+        )
+
+    def render(self, passenger_name, flight_number, origin, destination, delay_minutes, delay_reason,
+               scheduled_departure, new_departure, gate, terminal, rebooking_options, fmt="markdown"):
+        """Render a single delay message"""
+        return self.prepare(
+            flight_number, origin, destination, delay_minutes, delay_reason,
+            scheduled_departure, new_departure, gate, terminal, rebooking_options, fmt=fmt
+        ).for_passenger(passenger_name)
+
+    def render_manifest(self, passengers, flight, fmt="markdown"):
+        """
+        Render the delay message for every passenger of a flight
+
+        Args:
+            passengers: Iterable of passenger items (only 'name' is used)
+            flight: Flight item
+            fmt: One of "text", "markdown" or "html"
+
+        Returns:
+            List of messages in passenger order
+        """
+        prepared = self.prepare_flight(flight, fmt=fmt)
+        greeting = prepared.greeting
+        body = prepared.body
+        if prepared.html:
+            return [greeting + escape(str(p.get('name'))) + body for p in passengers]
+        return [greeting + str(p.get('name')) + body for p in passengers]
+
+
+renderer = DelayMessageRenderer()
+
+
+def format_delay_message(passenger_name,
+                         flight_number,
+                         origin,
+                         destination,
+                         delay_minutes,
+                         delay_reason,
+                         scheduled_departure,
+                         new_departure,
+                         gate,
+                         terminal,
+                         rebooking_options):
+    """
+    Format a delay notification message with emojis and clear sections
+
+    Shared by the agent's format_delay_message tool and the notification pipeline.
+
+    Args:
+        passenger_name: Name of the passenger
+        flight_number: Flight number
+        origin: Origin airport code
+        destination: Destination airport code
+        delay_minutes: Delay duration in minutes
+        delay_reason: Reason for the delay
+        scheduled_departure: Original scheduled departure time
+        new_departure: New expected departure time
+        gate: Gate information
+        terminal: Terminal information
+        rebooking_options: List of available rebooking options
+    """
+    return renderer.render(
+        passenger_name, flight_number, origin, destination, delay_minutes, delay_reason,
+        scheduled_departure, new_departure, gate, terminal, rebooking_options
+    )
@@ -0,0 +1,293 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from models.dynamodb import DynamoDBService
+from app.messages import renderer
+
+logger = logging.getLogger("delaycompanion.notifications")
+
+DEFAULT_DEDUPE_PATH = Path(
+    os.environ.get("DELAYCOMPANION_CACHE_DIR", Path.home() / ".cache" / "delaycompanion")
+) / "notifications.db"
+
+# Passenger attributes needed to address and render a notification
+PASSENGER_PROJECTION = ['passenger_id', 'name', 'email', 'phone', 'flight_id']
+
+
+def delay_version(flight):
+    """Get a short hash identifying the current delay state of a flight"""
+    state = "|".join(str(flight.get(key, '')) for key in (
+        'status', 'delay_minutes', 'delay_reason', 'actual_departure', 'gate', 'terminal'
+    ))
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()[:12]
+
+
+def percentile(values, fraction):
+    """Get a nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting sends per second on one channel"""
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize the limiter
+
+        Args:
+            rate: Sustained tokens per second
+            burst: Maximum tokens available at once; defaults to the rate
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class NotificationLog:
+    """Durable SQLite record of sent notifications used to avoid duplicates
+
+    A notification is keyed by passenger, flight, delay version and channel,
+    so a passenger is notified again only when the delay itself changes.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the log
+
+        Args:
+            path: Optional SQLite database path, or ":memory:"
+        """
+        self.path = str(path or DEFAULT_DEDUPE_PATH)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS notifications (
+                passenger_id TEXT NOT NULL,
+                flight_id TEXT NOT NULL,
+                delay_version TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                claimed_at REAL NOT NULL,
+                PRIMARY KEY (passenger_id, flight_id, delay_version, channel)
+            )
+        """)
+        self._conn.commit()
+
+    def claim(self, passenger_id, flight_id, version, channel):
+        """Reserve a notification; returns False if it was already sent or claimed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO notifications VALUES (?, ?, ?, ?, ?)",
+                (passenger_id, flight_id, version, channel, time.time())
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def release(self, passenger_id, flight_id, version, channel):
+        """Forget a claim after a failed send so a later run retries it"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM notifications WHERE passenger_id = ? AND flight_id = ? "
+                "AND delay_version = ? AND channel = ?",
+                (passenger_id, flight_id, version, channel)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class LogSender:
+    """Dry-run sender that only logs the notification"""
+
+    def send(self, passenger, subject, body):
+        logger.debug(f"[dry run] {subject} -> {passenger.get('passenger_id')}")
+
+
+class GmailSender:
+    """Sends notifications through the Gmail MCP server in the shared pool"""
+
+    def __init__(self, mcp_pool=None):
+        from app.mcp_pool import get_shared_pool
+        self.mcp_pool = mcp_pool or get_shared_pool()
+
+    def send(self, passenger, subject, body):
+        client = self.mcp_pool.get_client("gmail")
+        if client is None:
+            raise RuntimeError("Gmail MCP server is not available")
+        result = client.call_tool_sync(
+            str(uuid.uuid4()),
+            "send_email",
+            {"to": [passenger['email']], "subject": subject, "body": body}
+        )
+        if result.get("status") == "error":
+            raise RuntimeError(f"Gmail send failed for {passenger.get('passenger_id')}")
+
+
+class NotificationPipeline:
+    """Batch fan-out of delay notifications to every affected passenger
+
+    Delayed flights are read from the StatusIndex, each manifest is streamed
+    page by page, and every notification is rendered and sent on a bounded
+    worker pool. Each channel has its own rate limit and the notification log
+    keeps a passenger from being notified twice for the same delay.
+    """
+
+    def __init__(self, db_service=None, senders=None, rate_limits=None, concurrency=32,
+                 notification_log=None, page_size=500, message_format="text"):
+        """
+        Initialize the pipeline
+
+        Args:
+            db_service: Optional DynamoDBService
+            senders: Mapping of channel name to sender; defaults to Gmail for "email"
+            rate_limits: Mapping of channel name to maximum sends per second
+            concurrency: Maximum number of notifications being sent at once
+            notification_log: Optional NotificationLog used for deduplication
+            page_size: Manifest page size requested from DynamoDB
+            message_format: Message format passed to the renderer ("text", "markdown" or "html")
+        """
+        self.db_service = db_service or DynamoDBService()
+        self.senders = senders or {"email": GmailSender()}
+        self.limiters = {
+            channel: TokenBucket(rate)
+            for channel, rate in (rate_limits or {}).items() if channel in self.senders
+        }
+        self.concurrency = concurrency
+        self.notification_log = notification_log or NotificationLog()
+        self.page_size = page_size
+        self.message_format = message_format
+
+    @staticmethod
+    def _address(passenger, channel):
+        """Check whether a passenger can be reached on a channel"""
+        if channel == "email":
+            return bool(passenger.get('email'))
+        if channel == "sms":
+            return bool(passenger.get('phone'))
+        return True
+
+    @staticmethod
+    def _subject(flight):
+        """Get the subject line of a delay notification"""
+        return f"Flight {flight.get('flight_number')} delayed"
+
+    def run(self, departure_date=None, flight_ids=None):
+        """
+        Notify every passenger on the delayed flights
+
+        Args:
+            departure_date: Optional YYYY-MM-DD date limiting the flights
+            flight_ids: Optional list of flight IDs to restrict the run to
+
+        Returns:
+            Report dict with counts, throughput and send lag percentiles
+        """
+        started = time.monotonic()
+        report = {
+            "flights": 0,
+            "passengers": 0,
+            "sent": 0,
+            "duplicates": 0,
+            "unreachable": 0,
+            "failed": 0,
+            "by_channel": {channel: 0 for channel in self.senders}
+        }
+        lags = []
+        lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.concurrency * 2)
+
+        def count(key, channel=None):
+            with lock:
+                report[key] += 1
+                if channel:
+                    report["by_channel"][channel] += 1
+
+        def notify(passenger, flight, prepared, version, detected_at):
+            try:
+                for channel, sender in self.senders.items():
+                    if not self._address(passenger, channel):
+                        count("unreachable")
+                        continue
+                    if not self.notification_log.claim(passenger['passenger_id'], flight['flight_id'],
+                                                       version, channel):
+                        count("duplicates")
+                        continue
+                    try:
+                        subject = self._subject(flight)
+                        body = prepared.for_passenger(passenger.get('name'))
+                        if channel in self.limiters:
+                            self.limiters[channel].acquire()
+                        sender.send(passenger, subject, body)
+                    except Exception as e:
+                        self.notification_log.release(passenger['passenger_id'], flight['flight_id'],
+                                                      version, channel)
+                        logger.warning(f"Failed to notify {passenger['passenger_id']} via {channel}: {str(e)}")
+                        count("failed")
+                        continue
+                    with lock:
+                        lags.append(time.monotonic() - detected_at)
+                    count("sent", channel)
+            finally:
+                in_flight.release()
+
+        flights = self.db_service.get_delayed_flights(departure_date=departure_date)
+        if flight_ids:
+            flight_ids = set(flight_ids)
+            flights = [flight for flight in flights if flight['flight_id'] in flight_ids]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for flight in flights:
+                report["flights"] += 1
+                version = delay_version(flight)
+                # The flight part of the message is rendered once per manifest
+                prepared = renderer.prepare_flight(flight, fmt=self.message_format)
+                detected_at = time.monotonic()
+                passengers = self.db_service.iter_passengers_for_flight(
+                    flight['flight_id'],
+                    projection=PASSENGER_PROJECTION,
+                    page_size=self.page_size
+                )
+                for passenger in passengers:
+                    report["passengers"] += 1
+                    # Bound the queue so huge manifests are not buffered in memory
+                    in_flight.acquire()
+                    executor.submit(notify, passenger, flight, prepared, version, detected_at)
+
+        elapsed = time.monotonic() - started
+        report["seconds"] = elapsed
+        report["messages_per_sec"] = report["sent"] / elapsed if elapsed else 0.0
+        report["lag_p50"] = percentile(lags, 0.50)
+        report["lag_p95"] = percentile(lags, 0.95)
+        report["lag_max"] = max(lags) if lags else 0.0
+        return report
@@ -0,0 +1,258 @@
+import time
+from datetime import datetime
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+# How much one minute of a passenger's arrival delay counts, by loyalty tier
+TIER_WEIGHTS = {
+    "Platinum": 4.0,
+    "Gold": 3.0,
+    "Silver": 2.0,
+    "Bronze": 1.5
+}
+DEFAULT_TIER_WEIGHT = 1.0
+
+# A passenger left without a seat is costed as arriving a day late
+UNASSIGNED_DELAY_MINUTES = 24 * 60
+
+
+def group_key(passenger):
+    """
+    Get the key of the travel party a passenger belongs to
+
+    Passengers sharing a booking_ref (the booking reference column of the
+    passengers data) or a group_id travel together; anyone without one is
+    a party of one.
+    """
+    return passenger.get('booking_ref') or passenger.get('group_id') or passenger['passenger_id']
+
+
+def arrival_delay_minutes(option, scheduled_arrival, default=UNASSIGNED_DELAY_MINUTES):
+    """Get how many minutes after the original scheduled arrival an option arrives"""
+    try:
+        arrival = datetime.fromisoformat(str(option['arrival']))
+        scheduled = datetime.fromisoformat(str(scheduled_arrival))
+    except (KeyError, TypeError, ValueError):
+        return float(default)
+    return max(0.0, (arrival - scheduled).total_seconds() / 60)
+
+
+class RebookingSolver:
+    """Min-cost assignment of displaced passengers to rebooking flights
+
+    Passengers travelling on the same booking form one indivisible party.
+    Assigning a party to an option costs its summed tier weight times the
+    option's arrival delay, and any party can be left unassigned at a fixed
+    penalty. Parties with the same size and weight are interchangeable, so
+    the program is solved over those classes rather than over individual
+    passengers, which keeps it to a few thousand variables even for
+    thousands of passengers across dozens of options.
+
+    By default the linear relaxation is solved and the few parties left
+    fractional are placed greedily, which is near-optimal and takes
+    milliseconds; the plan reports the relaxation's lower bound next to
+    its own cost. With exact=True the integer program is solved instead.
+    """
+
+    def __init__(self, tier_weights=None, unassigned_delay=UNASSIGNED_DELAY_MINUTES, exact=False, time_limit=5.0):
+        """
+        Initialize the solver
+
+        Args:
+            tier_weights: Optional mapping of loyalty tier to delay weight
+            unassigned_delay: Delay in minutes charged for a passenger left without a seat
+            exact: Solve the integer program instead of rounding the linear relaxation
+            time_limit: Maximum seconds spent in the solver
+        """
+        self.tier_weights = tier_weights or TIER_WEIGHTS
+        self.unassigned_delay = unassigned_delay
+        self.exact = exact
+        self.time_limit = time_limit
+
+    def solve(self, passengers, options, capacities, scheduled_arrival=None, flight_id=None):
+        """
+        Build a rebooking plan
+
+        Args:
+            passengers: Passenger items to move
+            options: Rebooking option dicts with 'flight_id' and 'arrival'
+            capacities: Dict of option flight ID to open seats; options without an entry are skipped
+            scheduled_arrival: Original scheduled arrival the delays are measured against
+            flight_id: Optional ID of the displaced flight, copied into the plan
+
+        Returns:
+            Plan dict with one assignment per passenger and summary figures
+        """
+        started = time.perf_counter()
+        options = [option for option in options if option.get('flight_id') in capacities]
+        option_ids = [option['flight_id'] for option in options]
+        option_count = len(options)
+
+        plan = {
+            "flight_id": flight_id,
+            "status": "optimal",
+            "passengers": len(passengers),
+            "groups": 0,
+            "assignments": [],
+            "by_flight": {option_id: 0 for option_id in option_ids},
+            "unassigned": [],
+            "weighted_delay": 0.0,
+            "lower_bound": 0.0,
+            "average_delay_minutes": 0.0
+        }
+        if not passengers:
+            plan["seconds"] = time.perf_counter() - started
+            return plan
+
+        # The last column stands for "no seat"
+        delays = np.array(
+            [arrival_delay_minutes(option, scheduled_arrival, self.unassigned_delay) for option in options]
+            + [self.unassigned_delay],
+            dtype=float
+        )
+        seats = np.array([max(0, int(capacities[option_id])) for option_id in option_ids], dtype=float)
+
+        # Collapse passengers into parties, then parties into (size, weight) classes
+        keys = [group_key(p) for p in passengers]
+        passenger_weights = np.fromiter(
+            (self.tier_weights.get(p.get('loyalty_tier'), DEFAULT_TIER_WEIGHT) for p in passengers),
+            dtype=float,
+            count=len(passengers)
+        )
+        group_keys, group_of_passenger = np.unique(np.array([str(key) for key in keys]), return_inverse=True)
+        group_sizes = np.bincount(group_of_passenger)
+        group_weights = np.bincount(group_of_passenger, weights=passenger_weights)
+        plan["groups"] = len(group_keys)
+
+        classes, class_of_group, class_counts = np.unique(
+            np.column_stack([group_sizes, group_weights]), axis=0, return_inverse=True, return_counts=True
+        )
+        class_of_group = class_of_group.ravel()
+        class_sizes = classes[:, 0]
+        class_weights = classes[:, 1]
+        class_count = len(classes)
+        columns = option_count + 1
+
+        # x[c, j] = number of parties of class c put on option j
+        cost = np.outer(class_weights, delays)
+        every_party_placed = LinearConstraint(
+            np.kron(np.eye(class_count), np.ones(columns)), class_counts, class_counts
+        )
+        constraints = [every_party_placed]
+        if option_count:
+            seat_limits = LinearConstraint(
+                np.kron(class_sizes[np.newaxis, :], np.eye(columns))[:option_count], 0, seats
+            )
+            constraints.append(seat_limits)
+
+        result = milp(
+            c=cost.ravel(),
+            constraints=constraints,
+            integrality=np.ones(class_count * columns) if self.exact else None,
+            bounds=Bounds(0, np.inf),
+            options={"time_limit": self.time_limit}
+        )
+        if result.x is None:
+            raise RuntimeError(f"Rebooking solver failed: {result.message}")
+        if result.status != 0:
+            plan["status"] = "time_limit"
+        plan["lower_bound"] = float(result.fun)
+
+        if self.exact:
+            counts = np.rint(result.x).astype(int).reshape(class_count, columns)
+        else:
+            counts = self._round(result.x.reshape(class_count, columns), class_counts, class_sizes, class_weights,
+                                 delays, seats)
+
+        # Hand out each class's per-option counts to its parties, in a stable order
+        group_option = np.full(len(group_keys), option_count)
+        for class_index in range(class_count):
+            groups = np.flatnonzero(class_of_group == class_index)
+            group_option[groups] = np.repeat(np.arange(columns), counts[class_index])[:len(groups)]
+
+        passenger_option = group_option[group_of_passenger]
+        order = np.lexsort((np.array([p['passenger_id'] for p in passengers]), group_of_passenger))
+        assigned_delays = []
+        for index in order:
+            passenger = passengers[index]
+            column = passenger_option[index]
+            if column == option_count:
+                new_flight_id = None
+                delay = None
+                plan["unassigned"].append(passenger['passenger_id'])
+            else:
+                new_flight_id = option_ids[column]
+                delay = float(delays[column])
+                plan["by_flight"][new_flight_id] += 1
+                assigned_delays.append(delay)
+            plan["assignments"].append({
+                "passenger_id": passenger['passenger_id'],
+                "group": keys[index],
+                "loyalty_tier": passenger.get('loyalty_tier'),
+                "new_flight_id": new_flight_id,
+                "delay_minutes": delay
+            })
+
+        plan["weighted_delay"] = float(np.sum(counts * cost))
+        if plan["status"] == "optimal" and plan["weighted_delay"] > plan["lower_bound"] + 1e-6:
+            plan["status"] = "near_optimal"
+        plan["average_delay_minutes"] = float(np.mean(assigned_delays)) if assigned_delays else 0.0
+        plan["seconds"] = time.perf_counter() - started
+        return plan
+
+    @staticmethod
+    def _round(relaxed, class_counts, class_sizes, class_weights, delays, seats):
+        """
+        Turn a fractional class-to-option solution into whole parties
+
+        The integral part of every entry is kept. The parties that are left
+        over, and then the parties the relaxation left without a seat, are
+        placed one by one, heaviest per seat first, on the lowest-delay
+        option that still has room for the whole party and arrives sooner
+        than the no-seat penalty.
+        """
+        counts = np.floor(relaxed + 1e-9).astype(int)
+        option_count = len(seats)
+        free = seats - (counts[:, :option_count] * class_sizes[:, np.newaxis]).sum(axis=0)
+        leftover = class_counts - counts.sum(axis=1)
+        by_delay = np.argsort(delays[:option_count], kind="stable")
+        by_delay = by_delay[delays[by_delay] < delays[option_count]]
+        by_priority = np.argsort(-class_weights / class_sizes, kind="stable")
+
+        for class_index in by_priority:
+            counts[class_index, option_count] += leftover[class_index]
+
+        # Seats freed by rounding down go to whoever is still unplaced
+        for class_index in by_priority:
+            size = class_sizes[class_index]
+            while counts[class_index, option_count] > 0:
+                fitting = by_delay[free[by_delay] >= size]
+                if not len(fitting):
+                    break
+                free[fitting[0]] -= size
+                counts[class_index, fitting[0]] += 1
+                counts[class_index, option_count] -= 1
+        return counts
+
+    def plan_for_flight(self, db_service, flight_id):
+        """
+        Build a rebooking plan for every passenger on a flight
+
+        Args:
+            db_service: DynamoDBService used to read the flight, manifest and seat inventory
+            flight_id: The displaced flight
+
+        Returns:
+            Plan dict, or None if the flight does not exist
+        """
+        flight = db_service.get_flight(flight_id)
+        if not flight:
+            return None
+
+        options = flight.get('rebooking_options', [])
+        passengers = db_service.get_passengers_for_flight(
+            flight_id, projection=['passenger_id', 'name', 'loyalty_tier', 'booking_ref', 'flight_id']
+        )
+        capacities = db_service.get_seat_availability([option.get('flight_id') for option in options])
+        return self.solve(passengers, options, capacities, flight.get('scheduled_arrival'), flight_id=flight_id)
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Flight attributes an answer can depend on; any change invalidates cached answers
+FLIGHT_STATE_FIELDS = (
+    'status', 'delay_minutes', 'delay_reason', 'actual_departure', 'gate', 'terminal', 'rebooking_options'
+)
+
+# Passenger attributes swapped for placeholders so one answer serves the whole flight;
+# first_name and last_name are derived from name
+PERSONAL_FIELDS = ('name', 'seat', 'passenger_id', 'booking_ref', 'email')
+
+# Passenger attributes that are never templated; an answer containing one is not shared
+PRIVATE_FIELDS = ('phone',)
+
+# Turns that changed something or sent something are never reused
+MUTATING_TOOL_PATTERN = re.compile(r"send|rebook|update|put|delete|create|write|modify|draft|label|transact")
+
+# Openings of replies that only make sense after an earlier turn
+FOLLOW_UP_WORDS = {
+    "yes", "no", "ok", "okay", "sure", "thanks", "thank", "that", "this", "those",
+    "first", "second", "third", "option", "the", "and", "but", "also", "what about", "how about"
+}
+
+# Words anywhere in a question that point back at the conversation or at the
+# passenger's own booking history, so the answer cannot be shared
+CONTEXT_WORDS = {
+    "it", "its", "that", "this", "those", "these", "them", "they", "one", "ones", "option",
+    "above", "previous", "previously", "earlier", "again", "instead", "else", "same",
+    "mentioned", "said", "rebooked", "history", "original"
+}
+
+MIN_QUERY_WORDS = 3
+
+
+def normalize_query(query):
+    """Lowercase a query and strip punctuation and extra whitespace"""
+    words = re.sub(r"[^\w\s']", " ", query.lower()).split()
+    return " ".join(word.strip("'") for word in words if word.strip("'"))
+
+
+def flight_state_version(flight):
+    """Get a short hash of the flight attributes that cached answers depend on"""
+    state = {key: flight.get(key) for key in FLIGHT_STATE_FIELDS}
+    encoded = json.dumps(state, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """LRU cache of agent answers shared by all passengers on a flight
+
+    Answers are keyed by the normalized question and the flight ID, and
+    stored together with the flight state version they were produced
+    against. An entry is only reused while that version still matches the
+    current flight item; the passenger's name (also first name and surname
+    alone), seat, ID, booking reference and email are stored as whole-token
+    placeholders, matched in any case, and filled back in for whoever asks
+    next. An answer still containing a personal value afterwards is not
+    stored. Answers are shared per loyalty tier and never for passengers
+    with a rebooking history.
+    """
+
+    def __init__(self, max_size=5000, ttl=900.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of answers kept in memory
+            ttl: Seconds an answer may be reused even if the flight does not change
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.stores = 0
+
+    @staticmethod
+    def cacheable(query):
+        """Check whether a question stands on its own and can be shared"""
+        normalized = normalize_query(query)
+        words = normalized.split()
+        if len(words) < MIN_QUERY_WORDS:
+            return False
+        if any(normalized == phrase or normalized.startswith(phrase + " ") for phrase in FOLLOW_UP_WORDS):
+            return False
+        return not CONTEXT_WORDS.intersection(words)
+
+    @staticmethod
+    def shareable(passenger):
+        """Check whether answers for a passenger can be shared with others on the flight
+
+        Passengers who were rebooked get answers about their own history.
+        """
+        return bool(passenger) and not passenger.get('rebooking_history')
+
+    @staticmethod
+    def _details(passenger):
+        """Get a passenger's personal values by placeholder name, including first_name and last_name"""
+        details = {field: str(passenger.get(field) or "") for field in PERSONAL_FIELDS}
+        names = details['name'].split()
+        # Initials are too short to tell apart from other text
+        details['first_name'] = names[0] if len(names) > 1 and len(names[0]) > 1 else ""
+        details['last_name'] = names[-1] if len(names) > 1 and len(names[-1]) > 1 else ""
+        return details
+
+    @staticmethod
+    def _token_pattern(values):
+        """Match any of the values as whole tokens in any case, so "Al" leaves "Alaska" alone"""
+        alternatives = "|".join(re.escape(value) for value in sorted(values, key=len, reverse=True))
+        # Placeholders already in the text are not tokens
+        return re.compile(rf"(?<![\w{{])(?:{alternatives})(?![\w}}])", re.IGNORECASE)
+
+    def _template(self, answer, passenger):
+        """
+        Replace a passenger's personal values in an answer with placeholders
+
+        Returns:
+            Template text, or None if a personal value would be left in it
+        """
+        template = answer
+        details = self._details(passenger)
+        # Longest first, so the full name is replaced before its parts
+        for field, value in sorted(details.items(), key=lambda item: len(item[1]), reverse=True):
+            if value:
+                template = self._token_pattern([value]).sub(f"{{{{{field}}}}}", template)
+
+        leftovers = [str(passenger[field]) for field in PRIVATE_FIELDS if passenger.get(field)]
+        # Middle names and other parts of the name
+        leftovers += [part for part in details['name'].split() if len(part) > 1]
+        if leftovers and self._token_pattern(leftovers).search(template):
+            return None
+        return template
+
+    def _fill(self, template, passenger):
+        """Replace the placeholders of a template with a passenger's details"""
+        details = self._details(passenger)
+        return re.sub(
+            r"\{\{(\w+)\}\}", lambda match: details.get(match.group(1), match.group()), template
+        )
+
+    def _key(self, query, passenger, flight):
+        # Tier changes the offers and wording of an answer, so it is part of the key
+        return (normalize_query(query), flight.get('flight_id'), passenger.get('loyalty_tier'))
+
+    def get(self, query, passenger, flight):
+        """
+        Get a cached answer personalized for a passenger
+
+        Args:
+            query: The passenger's message without the context prefix
+            passenger: Passenger item
+            flight: Current flight item
+
+        Returns:
+            Answer text, or None on a miss
+        """
+        if not self.shareable(passenger) or not flight or not self.cacheable(query):
+            return None
+
+        key = self._key(query, passenger, flight)
+        version = flight_state_version(flight)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_version, template, expires_at = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                # The flight changed since this answer was produced
+                del self._items[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+
+        return self._fill(template, passenger)
+
+    def put(self, query, passenger, flight, answer, tools_used=()):
+        """
+        Store an agent answer for the other passengers on the flight
+
+        Args:
+            query: The passenger's message without the context prefix
+            passenger: Passenger item the answer was produced for
+            flight: Flight item the answer was produced against
+            answer: Answer text
+            tools_used: Names of the tools the agent called during the turn
+
+        Returns:
+            True if the answer was stored
+        """
+        if not self.shareable(passenger) or not flight or not answer or not self.cacheable(query):
+            return False
+        if any(MUTATING_TOOL_PATTERN.search(name.lower()) for name in tools_used if name):
+            return False
+
+        template = self._template(answer, passenger)
+        if template is None:
+            return False
+
+        key = self._key(query, passenger, flight)
+        with self._lock:
+            self._items[key] = (flight_state_version(flight), template, time.monotonic() + self.ttl)
+            self._items.move_to_end(key)
+            self.stores += 1
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def invalidate_flight(self, flight_id):
+        """Drop every cached answer for a flight"""
+        with self._lock:
+            for key in [key for key in self._items if key[1] == flight_id]:
+                del self._items[key]
+                self.stale += 1
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        """Get the size, hit ratio and eviction counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "stores": self.stores
+            }
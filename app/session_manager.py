@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+logger = logging.getLogger("delaycompanion.sessions")
+
+
+class AgentSession:
+    """A Strands Agent and its bookkeeping for one passenger conversation"""
+
+    def __init__(self, session_id, agent, generation):
+        self.session_id = session_id
+        self.agent = agent
+        self.generation = generation
+        self.lock = threading.Lock()
+        # One asyncio.Lock per event loop, since an asyncio lock only works on the loop that first used it
+        self.async_locks = weakref.WeakKeyDictionary()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.turns = 0
+        # The passenger's flight as of the last turn, so the next context read is one round trip
+        self.flight_id = None
+
+
+class AgentSessionManager:
+    """Keeps one long-lived agent per passenger/session ID
+
+    Sessions are evicted least-recently-used once max_sessions is reached and
+    after idle_ttl seconds without a turn. The per-session message history is
+    bounded by the conversation manager supplied by the agent factory, so the
+    total memory held is capped at roughly max_sessions windows.
+    """
+
+    def __init__(self, agent_factory, generation_source=None, max_sessions=1000, idle_ttl=1800):
+        """
+        Initialize the session manager
+
+        Args:
+            agent_factory: Callable taking an optional message list and returning a new Agent
+            generation_source: Optional callable returning the current tool generation;
+                sessions built against an older generation are rebuilt with their history
+            max_sessions: Maximum number of sessions kept in memory
+            idle_ttl: Seconds of inactivity after which a session is dropped
+        """
+        self.agent_factory = agent_factory
+        self.generation_source = generation_source or (lambda: 0)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._rebuilt = 0
+        self._evicted_lru = 0
+        self._evicted_idle = 0
+
+    def get_session(self, session_id):
+        """Get the session for an ID, building its agent on first use"""
+        now = time.monotonic()
+        generation = self.generation_source()
+
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = now
+
+        if session is None:
+            # Building the agent may start the MCP servers, so other sessions are not held up meanwhile
+            agent = self.agent_factory(None)
+            generation = self.generation_source()
+            with self._lock:
+                # Another thread may have built the same session first; its agent wins
+                session = self._sessions.get(session_id)
+                if session is None:
+                    session = AgentSession(session_id, agent, generation)
+                    self._sessions[session_id] = session
+                    self._created += 1
+                    while len(self._sessions) > self.max_sessions:
+                        evicted_id, _ = self._sessions.popitem(last=False)
+                        self._evicted_lru += 1
+                        logger.debug(f"Evicted least recently used session {evicted_id}")
+                else:
+                    self._sessions.move_to_end(session_id)
+                session.last_used = now
+
+        if session.generation != generation:
+            # MCP servers were restarted, so the cached tool objects are stale
+            with session.lock:
+                if session.generation != generation:
+                    session.agent = self.agent_factory(session.agent.messages)
+                    session.generation = generation
+                    self._rebuilt += 1
+
+        return session
+
+    def find_session(self, session_id):
+        """Get an existing live session without creating one, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or time.monotonic() - session.last_used >= self.idle_ttl:
+                return None
+            return session
+
+    def end_session(self, session_id):
+        """Drop a session and its conversation history"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict_idle(self, now):
+        """Remove sessions idle for longer than the TTL (caller holds the lock)"""
+        # Sessions are ordered by last use, so the oldest ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self._evicted_idle += 1
+
+    def stats(self):
+        """Get session counts and eviction counters"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self._created,
+                "rebuilt": self._rebuilt,
+                "evicted_lru": self._evicted_lru,
+                "evicted_idle": self._evicted_idle,
+                "cached_messages": sum(len(s.agent.messages) for s in self._sessions.values())
+            }
@@ -3,20 +3,105 @@ import sys
 import os
 from pathlib import Path
 import json
+import time
 import pandas as pd
 from datetime import datetime
-import re
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from app.agent import DelayCompanionAgent
-from models.dynamodb import DynamoDBService
+from app.formatting import format_agent_response
+from app.handoff_queue import OPEN_STATUSES, HandoffWorkerPool, handoff_priority
+from app.messages import format_delay_duration, get_delay_emoji
+from models.dynamodb import DynamoDBService, SeatUnavailableError
+from models.passenger_lookup import PassengerLookup
+
+@st.cache_resource
+def get_agent():
+    """Get the agent shared by all browser sessions so conversations survive reruns"""
+    agent = DelayCompanionAgent()
+    # Start the MCP servers before the first passenger query arrives
+    agent.mcp_pool.warm_up_async()
+    return agent
+
+@st.cache_resource
+def get_db_service():
+    """Get the DynamoDB service shared by all browser sessions and reruns"""
+    return DynamoDBService()
+
+@st.cache_resource
+def get_handoff_workers():
+    """Get the call-center handoff queue and its packet workers, started once per server"""
+    return HandoffWorkerPool(db_service=get_db_service()).start()
+
+# Seconds between handoff status checks while the passenger waits
+HANDOFF_POLL_SECONDS = 2
+
+@st.cache_resource
+def get_passenger_lookup():
+    """Get the passenger login lookup shared by all browser sessions"""
+    return PassengerLookup(get_db_service())
+
+# Passengers suggested before anything is typed; the rest of the table is never read
+PASSENGER_DIRECTORY_SIZE = 10
+DIRECTORY_PROJECTION = ['passenger_id', 'name', 'flight_id', 'loyalty_tier']
+
+# Seconds cached reads are reused across reruns; seat counts change the fastest
+DIRECTORY_TTL = 300
+RECORD_TTL = 30
+SEATS_TTL = 5
+
+@st.cache_data(ttl=DIRECTORY_TTL, show_spinner=False)
+def load_passenger_directory(limit=PASSENGER_DIRECTORY_SIZE):
+    """Get the passengers listed in the login dropdown"""
+    return get_db_service().list_passengers(limit, projection=DIRECTORY_PROJECTION)
+
+@st.cache_data(ttl=DIRECTORY_TTL, show_spinner=False)
+def search_passengers(query, cursor=None):
+    """Get one page of passengers matching a name prefix, email, booking reference or ID"""
+    return get_passenger_lookup().search(query, cursor=cursor)
+
+def find_login_matches(query):
+    """Get the pages of search results loaded so far and whether more are available"""
+    if st.session_state.get("login_query") != query:
+        st.session_state.login_query = query
+        st.session_state.login_pages = 1
+    
+    matches = []
+    cursor = None
+    for _ in range(st.session_state.login_pages):
+        page = search_passengers(query, cursor)
+        matches.extend(page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return matches, cursor is not None
+
+@st.cache_data(ttl=RECORD_TTL, show_spinner=False)
+def load_passenger_record(passenger_id, flight_id=None):
+    """Get a passenger and their flight"""
+    return get_db_service().get_passenger_with_flight(passenger_id, flight_id=flight_id)
+
+@st.cache_data(ttl=RECORD_TTL, show_spinner=False)
+def load_flights(flight_ids):
+    """Get several flights in batched reads, keyed by flight ID"""
+    return get_db_service().batch_get_flights(list(flight_ids))
+
+@st.cache_data(ttl=SEATS_TTL, show_spinner=False)
+def load_seat_availability(flight_ids):
+    """Get the seats left on each rebooking option"""
+    return get_db_service().get_seat_availability(list(flight_ids))
+
+def invalidate_booking_data():
+    """Drop cached reads that a hold or rebooking has made stale"""
+    load_passenger_record.clear()
+    load_seat_availability.clear()
 
 # Initialize the agent and DB service
-agent = DelayCompanionAgent()
-db_service = DynamoDBService()
+agent = get_agent()
+db_service = get_db_service()
 
 # Set page configuration
 st.set_page_config(
@@ -111,70 +196,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def format_agent_response(response):
-    """
-    Format the agent response for better display in Streamlit
-    """
-    # If response is a dict with role/content structure, extract the content
-    if isinstance(response, dict):
-        if 'content' in response:
-            if isinstance(response['content'], list):
-                # Extract text from content list
-                content_text = ""
-                for item in response['content']:
-                    if isinstance(item, dict) and 'text' in item:
-                        content_text += item['text']
-                response = content_text
-            else:
-                response = response['content']
-    
-    # If response is still a string representation of a dict, try to parse it
-    if isinstance(response, str) and "'role':" in response:
-        # This handles the raw format you showed
-        try:
-            # Extract the text content from the string representation
-            text_match = re.search(r"'text': \"(.*?)\"", response, re.DOTALL)
-            if text_match:
-                response = text_match.group(1)
-                # Clean up escaped characters
-                response = response.replace('\\n', '\n').replace('\\"', '"')
-        except:
-            pass
-    
-    # Apply additional formatting for better display
-    response = apply_delaycompanion_formatting(response)
-    
-    return response
-
-def apply_delaycompanion_formatting(text):
-    """
-    Apply DelayCompanion-specific formatting to the response text
-    """
-    # Add status indicators with colored text
-    text = text.replace("Delayed", "🔴 **Delayed**")
-    text = text.replace("On Time", "🟢 **On Time**")
-    
-    # Format flight numbers
-    text = re.sub(r'\b([A-Z]{2}\d{3,4})\b', r'**\1**', text)
-    
-    # Add section dividers
-    if "Would you like me to:" in text:
-        text = text.replace("Would you like me to:", "\n---\n### 🤝 How Can I Help You Next?\n\nWould you like me to:")
-    
-    # Format bullet points with emojis
-    text = text.replace("- Help you explore", "- ✈️ Help you explore")
-    text = text.replace("- Connect you with", "- 📞 Connect you with")
-    text = text.replace("- Provide general", "- 📋 Provide general")
-    
-    # Add emojis to common phrases
-    text = text.replace("Flight Delay Information", "✈️ Flight Delay Information")
-    text = text.replace("Available Options", "🔄 Available Options")
-    text = text.replace("Rebooking Options", "✈️ Rebooking Options")
-    text = text.replace("Delay Compensation", "💰 Delay Compensation")
-    text = text.replace("Connect with an Agent", "📞 Connect with an Agent")
-    
-    return text
-
 def display_flight_card(flight, passenger=None):
     """Display a formatted flight information card"""
     status_class = "status-delayed" if flight['status'] == "Delayed" else "status-ontime"
@@ -195,28 +216,8 @@ def display_flight_card(flight, passenger=None):
     </div>
     """, unsafe_allow_html=True)
 
-def format_delay_duration(delay_minutes):
-    """Format delay duration in a readable format"""
-    delay_minutes = int(delay_minutes)
-    hours = delay_minutes // 60
-    mins = delay_minutes % 60
-    return f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
-
-def get_delay_emoji(delay_reason):
-    """Get appropriate emoji for delay reason"""
-    reason_emojis = {
-        "Weather": "🌧️",
-        "Mechanical": "🔧",
-        "Crew": "👨‍✈️",
-        "Air Traffic Control": "🗼",
-        "Aircraft Late Arrival": "⏱️",
-        "Security": "🔒",
-        "Other": "ℹ️"
-    }
-    return reason_emojis.get(delay_reason, "ℹ️")
-
-def display_rebooking_options(rebooking_options, flight_id):
-    """Display rebooking options with enhanced formatting"""
+def display_rebooking_options(rebooking_options, flight_id, availability=None):
+    """Display rebooking options with enhanced formatting and live seat counts"""
     if not rebooking_options:
         st.warning("❌ No rebooking options are currently available.")
         return None
@@ -225,8 +226,10 @@ def display_rebooking_options(rebooking_options, flight_id):
     st.markdown("Select an alternative flight below:")
     
     selected_option = None
+    availability = availability or {}
     
     for i, option in enumerate(rebooking_options):
+        seats_left = availability.get(option.get('flight_id'))
         with st.container():
             st.markdown(f"""
             <div class='option-box' id='option_{i}'>
@@ -241,6 +244,8 @@ def display_rebooking_options(rebooking_options, flight_id):
                 st.markdown(f"**Flight {option['flight_number']}**")
                 st.markdown(f"🛫 Departs: **{option['departure']}**")
                 st.markdown(f"🛬 Arrives: **{option['arrival']}**")
+                if seats_left is not None:
+                    st.markdown(f"💺 **{seats_left} seats left**" if seats_left > 0 else "🚫 **Sold out**")
                 
                 # Calculate time difference if available
                 try:
@@ -257,7 +262,8 @@ def display_rebooking_options(rebooking_options, flight_id):
                     pass
             
             with cols[2]:
-                if st.button(f"✅ Select Flight", key=f"select_{i}", help=f"Select flight {option['flight_number']}"):
+                if st.button(f"✅ Select Flight", key=f"select_{i}", help=f"Select flight {option['flight_number']}",
+                             disabled=seats_left == 0):
                     selected_option = option
             
             st.markdown("</div>", unsafe_allow_html=True)
@@ -265,6 +271,61 @@ def display_rebooking_options(rebooking_options, flight_id):
     
     return selected_option
 
+def format_wait(seconds):
+    """Format an estimated wait in whole minutes"""
+    minutes = round(seconds / 60)
+    if minutes < 1:
+        return "less than a minute"
+    return f"about {minutes} minute{'s' if minutes != 1 else ''}"
+
+@st.fragment(run_every=HANDOFF_POLL_SECONDS)
+def poll_handoff_status(handoff_id, passenger, flight):
+    """Refresh an open handoff's status without rerunning the page, keeping the handoff alive"""
+    handoffs = get_handoff_workers().queue
+    handoffs.touch(handoff_id)
+    handoff = handoffs.get(handoff_id)
+    if handoff is None or handoff['status'] not in OPEN_STATUSES:
+        # Nothing changes from here on; rerun the page to show the final status without polling
+        st.rerun()
+    show_handoff_status(handoff, passenger, flight)
+
+def show_handoff_status(handoff, passenger, flight):
+    """Show the status of a call-center handoff"""
+    if handoff is None or handoff['status'] in ('cancelled', 'expired'):
+        return
+    
+    status = handoff['status']
+    if status in ('pending', 'preparing'):
+        st.info("🔍 Gathering your flight information...")
+    elif status == 'ready':
+        packet = handoff['packet']
+        st.markdown("### 📋 Information Shared with Agent")
+        st.markdown("The following details will be provided to help expedite your call:")
+        st.markdown(f"""
+        **👤 Passenger:** {packet['passenger']['name']} ({packet['passenger']['loyalty_tier']} Member)
+        
+        **✈️ Flight:** {packet['flight']['number']} from {packet['flight']['origin']} to {packet['flight']['destination']}
+        
+        **⏰ Delay:** {packet['flight']['delay_minutes']} minutes due to {packet['flight']['delay_reason']}
+        """)
+        
+        # Display rebooking history if any
+        if packet.get('rebooking_history'):
+            st.markdown("**🔄 Recent Activity:**")
+            for rebooking in packet['rebooking_history']:
+                st.markdown(f"- Attempted rebooking from {rebooking['old_flight_id']} to {rebooking['new_flight_id']} at {rebooking['timestamp']}")
+    elif status == 'failed':
+        st.markdown("**📋 Basic Information Available:**")
+        st.markdown(f"- Passenger: {passenger['name']}")
+        st.markdown(f"- Flight: {flight['flight_number']}")
+        st.markdown(f"- Status: Delayed")
+    
+    if status in ('assigned', 'completed'):
+        st.success("📞 **Call Connected!** A customer service representative will be with you shortly.")
+    elif handoff['position']:
+        st.markdown(f"**📞 Position in queue:** {handoff['position']} · "
+                    f"**Estimated wait time:** {format_wait(handoff['estimated_wait_seconds'])}")
+
 # App header
 st.markdown("<h1 class='main-header'>✈️ DelayCompanion</h1>", unsafe_allow_html=True)
 st.markdown("<p style='font-size: 1.2rem; color: #666;'>Your AI-powered assistant for flight delays and rebooking</p>", unsafe_allow_html=True)
@@ -275,17 +336,34 @@ st.sidebar.markdown("## 👤 Passenger Login")
 # Get all passengers for the dropdown
 try:
     # In a real app, we would authenticate users
-    # For this demo, we'll just list all passengers
-    all_passengers = []
-    response = db_service.passengers_table.scan()
-    all_passengers = response.get('Items', [])
+    # For this demo, passengers are found through the lookup indexes
+    all_passengers = load_passenger_directory()
+    search_query = st.sidebar.text_input(
+        "🔍 Find your booking:", placeholder="Name, email, booking reference or passenger ID",
+        help="Names match from the first name on, e.g. \"Ann Sm\" for Ann Smith"
+    ).strip()
     
-    passenger_options = ["Select a passenger..."] + [f"{p['name']} ({p['passenger_id']})" for p in all_passengers]
-    selected_passenger = st.sidebar.selectbox("🔍 Select your name:", passenger_options)
+    if search_query:
+        listed_passengers, more_matches = find_login_matches(search_query)
+        if not listed_passengers:
+            st.sidebar.info("No passengers match your search.")
+    else:
+        listed_passengers, more_matches = all_passengers, False
+    
+    passenger_options = ["Select a passenger..."] + [f"{p['name']} ({p['passenger_id']})" for p in listed_passengers]
+    selected_passenger = st.sidebar.selectbox("👤 Select your name:", passenger_options)
+    if more_matches and st.sidebar.button("More results"):
+        st.session_state.login_pages += 1
+        st.rerun()
     
     if selected_passenger != "Select a passenger...":
         passenger_id = selected_passenger.split("(")[1].split(")")[0]
-        passenger = db_service.get_passenger(passenger_id)
+        # The listed flight ID lets the passenger and flight be read in one batch
+        listed_flight_id = next(
+            (p.get('flight_id') for p in listed_passengers if p['passenger_id'] == passenger_id), None
+        )
+        record = load_passenger_record(passenger_id, listed_flight_id)
+        passenger = record['passenger'] if record else None
         
         if passenger:
             st.sidebar.success(f"✅ Logged in as **{passenger['name']}**")
@@ -293,7 +371,7 @@ try:
             
             # Get flight information
             flight_id = passenger['flight_id']
-            flight = db_service.get_flight(flight_id)
+            flight = record['flight']
             
             if flight:
                 # Display flight information in sidebar
@@ -318,12 +396,27 @@ try:
                     st.markdown("<h2 class='sub-header'>✈️ Rebooking Options</h2>", unsafe_allow_html=True)
                     
                     rebooking_options = flight.get('rebooking_options', [])
-                    selected_option = display_rebooking_options(rebooking_options, flight_id)
+                    availability = load_seat_availability(
+                        tuple(option.get('flight_id') for option in rebooking_options)
+                    )
+                    selected_option = display_rebooking_options(rebooking_options, flight_id, availability)
                     
-                    # Handle rebooking selection
+                    # Handle rebooking selection by holding a seat while the passenger confirms
                     if selected_option:
-                        st.session_state.rebooking = True
-                        st.session_state.selected_option = selected_option
+                        previous_hold = st.session_state.get("seat_hold")
+                        if previous_hold and previous_hold['flight_id'] != selected_option['flight_id']:
+                            db_service.release_hold(previous_hold['flight_id'], passenger_id)
+                        try:
+                            st.session_state.seat_hold = db_service.hold_seat(
+                                selected_option['flight_id'], passenger_id
+                            )
+                            st.session_state.rebooking = True
+                            st.session_state.selected_option = selected_option
+                        except SeatUnavailableError:
+                            st.session_state.seat_hold = None
+                            st.error(f"🚫 Flight {selected_option['flight_number']} just sold out. Please choose another option.")
+                        # The hold changed the seat counts shown above
+                        load_seat_availability.clear()
                     
                     # Call center option
                     st.markdown("---")
@@ -363,31 +456,53 @@ try:
                         
                         # Get response from agent
                         with st.chat_message("assistant"):
-                            with st.spinner("🤔 Thinking..."):
-                                try:
-                                    response, context = agent.process_query(prompt, passenger_id)
-                                    formatted_response = format_agent_response(response)
-                                    st.markdown(formatted_response)
-                                except Exception as e:
-                                    error_message = f"""
-                                    🚨 **System Notice**
-                                    
-                                    I'm experiencing some technical difficulties accessing the flight database at the moment. 
-                                    However, I can still assist you with general information about your flight **{flight['flight_number']}**.
-                                    
-                                    ### 🔄 What I can help with:
-                                    - ✈️ Explore rebooking options from the list above
-                                    - 💰 Information about delay compensation policies
-                                    - 📞 Connect you with a customer service representative
-                                    - 📋 General travel assistance and policies
-                                    
-                                    ---
-                                    ### 🤝 How would you like to proceed?
-                                    Please let me know how I can best assist you during this delay.
-                                    """
-                                    st.markdown(error_message)
-                                    formatted_response = error_message
-                        
+                            response_placeholder = st.empty()
+                            tool_status = st.empty()
+                            tools_used = []
+                            result = {}
+                            
+                            def stream_text():
+                                """Yield text deltas, showing tool calls while they run, and keep the final message"""
+                                for event in agent.stream_query(prompt, passenger_id, flight_id=flight_id):
+                                    if event["type"] == "text":
+                                        tool_status.empty()
+                                        yield event["data"]
+                                    elif event["type"] == "tool":
+                                        tools_used.append(event['name'])
+                                        tool_status.caption(f"🔧 Using {event['name']}...")
+                                    elif event["type"] == "result":
+                                        result['message'] = event["message"]
+                            
+                            try:
+                                with response_placeholder.container():
+                                    streamed_text = st.write_stream(stream_text())
+                                tool_status.empty()
+                                if tools_used:
+                                    # The agent may have changed the booking through its tools
+                                    invalidate_booking_data()
+                                # Re-render the finished answer from the agent's message with DelayCompanion formatting
+                                formatted_response = format_agent_response(result.get('message') or streamed_text)
+                                response_placeholder.markdown(formatted_response)
+                            except Exception as e:
+                                error_message = f"""
+                                🚨 **System Notice**
+                                
+                                I'm experiencing some technical difficulties accessing the flight database at the moment. 
+                                However, I can still assist you with general information about your flight **{flight['flight_number']}**.
+                                
+                                ### 🔄 What I can help with:
+                                - ✈️ Explore rebooking options from the list above
+                                - 💰 Information about delay compensation policies
+                                - 📞 Connect you with a customer service representative
+                                - 📋 General travel assistance and policies
+                                
+                                ---
+                                ### 🤝 How would you like to proceed?
+                                Please let me know how I can best assist you during this delay.
+                                """
+                                st.markdown(error_message)
+                                formatted_response = error_message
+                    
                         # Add assistant response to chat history
                         st.session_state.messages.append({"role": "assistant", "content": formatted_response})
                     
@@ -407,6 +522,11 @@ try:
                         </div>
                         """, unsafe_allow_html=True)
                         
+                        seat_hold = st.session_state.get("seat_hold")
+                        if seat_hold:
+                            held_until = datetime.fromtimestamp(int(seat_hold['expires_at'])).strftime('%H:%M')
+                            st.info(f"💺 A seat is held for you until {held_until}.")
+                        
                         # Get seat preference
                         col1, col2 = st.columns(2)
                         
@@ -434,7 +554,8 @@ try:
                                         result = agent.rebook_passenger(
                                             passenger_id=passenger_id,
                                             new_flight_id=option['flight_id'],
-                                            seat_preference=seat_preference
+                                            seat_preference=seat_preference,
+                                            current_flight_id=flight['flight_id']
                                         )
                                         
                                         if result['success']:
@@ -448,12 +569,16 @@ try:
                                             # Clear rebooking state
                                             st.session_state.rebooking = False
                                             st.session_state.selected_option = None
+                                            st.session_state.seat_hold = None
+                                            invalidate_booking_data()
                                             
                                             # Auto-refresh after 3 seconds
                                             st.balloons()
                                             time.sleep(2)
-                                            st.experimental_rerun()
+                                            st.rerun()
                                         else:
+                                            # The booking or seat counts changed underneath us
+                                            invalidate_booking_data()
                                             st.error("❌ **Rebooking Failed**")
                                             st.markdown(result['message'])
                                     except Exception as e:
@@ -462,15 +587,21 @@ try:
                         
                         with col2:
                             if st.button("🔙 Go Back"):
+                                db_service.release_hold(option['flight_id'], passenger_id)
+                                load_seat_availability.clear()
+                                st.session_state.seat_hold = None
                                 st.session_state.rebooking = False
                                 st.session_state.selected_option = None
-                                st.experimental_rerun()
+                                st.rerun()
                         
                         with col3:
                             if st.button("📞 Call Instead"):
+                                db_service.release_hold(option['flight_id'], passenger_id)
+                                load_seat_availability.clear()
+                                st.session_state.seat_hold = None
                                 st.session_state.call_center = True
                                 st.session_state.rebooking = False
-                                st.experimental_rerun()
+                                st.rerun()
                     
                     # Handle call center handoff
                     if "call_center" in st.session_state and st.session_state.call_center:
@@ -484,58 +615,28 @@ try:
                         </div>
                         """, unsafe_allow_html=True)
                         
-                        # Generate handoff context
-                        try:
-                            handoff_context = agent.generate_handoff_context(passenger_id)
-                            
-                            st.markdown("### 📋 Information Shared with Agent")
-                            st.markdown("The following details will be provided to help expedite your call:")
-                            
-                            # Display handoff context in a formatted way
-                            st.markdown(f"""
-                            **👤 Passenger:** {handoff_context['passenger']['name']} ({handoff_context['passenger']['loyalty_tier']} Member)
-                            
-                            **✈️ Flight:** {handoff_context['flight']['number']} from {handoff_context['flight']['origin']} to {handoff_context['flight']['destination']}
-                            
-                            **⏰ Delay:** {handoff_context['flight']['delay_minutes']} minutes due to {handoff_context['flight']['delay_reason']}
-                            
-                            **📞 Estimated wait time:** 3-5 minutes
-                            """)
-                            
-                            # Display rebooking history if any
-                            if handoff_context.get('rebooking_history'):
-                                st.markdown("**🔄 Recent Activity:**")
-                                for rebooking in handoff_context['rebooking_history']:
-                                    st.markdown(f"- Attempted rebooking from {rebooking['old_flight_id']} to {rebooking['new_flight_id']} at {rebooking['timestamp']}")
-                        
-                        except Exception as e:
-                            st.markdown("**📋 Basic Information Available:**")
-                            st.markdown(f"- Passenger: {passenger['name']}")
-                            st.markdown(f"- Flight: {flight['flight_number']}")
-                            st.markdown(f"- Status: Delayed")
-                        
-                        # Simulated call progress
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        import time
-                        for i in range(100):
-                            progress_bar.progress(i + 1)
-                            if i < 30:
-                                status_text.text("🔍 Gathering your flight information...")
-                            elif i < 60:
-                                status_text.text("📞 Connecting to next available agent...")
-                            elif i < 90:
-                                status_text.text("🎧 Agent found! Preparing connection...")
-                            else:
-                                status_text.text("✅ Connected! Please check your phone.")
-                            time.sleep(0.05)
-                        
-                        st.success("📞 **Call Connected!** A customer service representative will be with you shortly.")
+                        # The packet is built by the handoff workers; this run only queues the request
+                        handoffs = get_handoff_workers().queue
+                        current_handoff = handoffs.get(st.session_state.get("handoff_id") or "")
+                        if (not current_handoff or current_handoff['passenger_id'] != passenger_id
+                                or current_handoff['status'] == 'expired'):
+                            st.session_state.handoff_id = handoffs.enqueue(
+                                passenger_id,
+                                priority=handoff_priority(passenger),
+                                transcript=st.session_state.get("messages"),
+                                flight_id=flight_id
+                            )
+                            current_handoff = handoffs.get(st.session_state.handoff_id)
+                        if current_handoff['status'] in OPEN_STATUSES:
+                            poll_handoff_status(st.session_state.handoff_id, passenger, flight)
+                        else:
+                            show_handoff_status(current_handoff, passenger, flight)
                         
                         if st.button("🔙 Return to Main Screen"):
+                            handoffs.cancel(st.session_state.handoff_id)
+                            st.session_state.handoff_id = None
                             st.session_state.call_center = False
-                            st.experimental_rerun()
+                            st.rerun()
                 
                 else:
                     # Flight is on time
@@ -616,8 +717,10 @@ try:
         
         # Show available demo passengers
         if all_passengers:
-            for passenger in all_passengers[:3]:  # Show first 3 passengers
-                flight = db_service.get_flight(passenger['flight_id'])
+            demo_passengers = all_passengers[:3]  # Show first 3 passengers
+            demo_flights = load_flights(tuple(p['flight_id'] for p in demo_passengers))
+            for passenger in demo_passengers:
+                flight = demo_flights[passenger['flight_id']]
                 status_emoji = "🔴" if flight['status'] == "Delayed" else "🟢"
                 
                 st.markdown(f"""
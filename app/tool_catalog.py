@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from mcp.types import Tool as MCPTool
+from strands.tools.mcp import MCPAgentTool
+
+logger = logging.getLogger("delaycompanion.tool_catalog")
+
+DEFAULT_CATALOG_PATH = Path(
+    os.environ.get("DELAYCOMPANION_CACHE_DIR", Path.home() / ".cache" / "delaycompanion")
+) / "tool_catalog.json"
+
+
+def fingerprint(config):
+    """Get a stable version fingerprint for a JSON-serializable server configuration"""
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolCatalog:
+    """Disk-backed cache of MCP tool names and schemas
+
+    Entries are keyed by server name and stored with the fingerprint of the
+    pinned server configuration that produced them. An entry whose fingerprint
+    no longer matches is ignored, so upgrading a server refreshes its tools.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the catalog
+
+        Args:
+            path: Optional path of the JSON catalog file
+        """
+        self.path = Path(path) if path else DEFAULT_CATALOG_PATH
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _read(self):
+        """Load the catalog file once (caller holds the lock)"""
+        if self._entries is None:
+            try:
+                with open(self.path, mode='r', encoding='utf-8') as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def load(self, name, server_fingerprint):
+        """Get the cached tool schemas for a server, or None if missing or stale"""
+        with self._lock:
+            entry = self._read().get(name)
+        if not entry or entry.get("fingerprint") != server_fingerprint:
+            return None
+        return entry.get("tools", [])
+
+    def save(self, name, server_fingerprint, tools):
+        """
+        Store the tool schemas for a server
+
+        Args:
+            name: Server name
+            server_fingerprint: Fingerprint of the server configuration
+            tools: List of MCPAgentTool objects returned by the server
+        """
+        schemas = [
+            tool.mcp_tool.model_dump(mode="json", by_alias=True, exclude_none=True)
+            for tool in tools
+        ]
+        with self._lock:
+            entries = self._read()
+            entries[name] = {"fingerprint": server_fingerprint, "tools": schemas}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, mode='w', encoding='utf-8') as file:
+                    json.dump(entries, file, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write tool catalog {self.path}: {str(e)}")
+        return schemas
+
+    @staticmethod
+    def build_tools(schemas, mcp_client):
+        """Rebuild agent tools bound to a client from cached schemas"""
+        return [MCPAgentTool(MCPTool.model_validate(schema), mcp_client) for schema in schemas]
+
+    @staticmethod
+    def tool_names(tools):
+        """Get the names of a list of agent tools"""
+        return sorted(tool.tool_name for tool in tools)
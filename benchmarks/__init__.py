@@ -0,0 +1 @@
+# DelayCompanion benchmarks package
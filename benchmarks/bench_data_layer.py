@@ -0,0 +1,384 @@
+"""
+Benchmark suite for the data layer, the CSV loaders and delay message rendering
+
+Each scale loads synthetic flights and passengers shaped like the sample
+data into the in-process LocalDynamoDB stand-in through the loaders of
+utils/setup_dynamodb.py, then times the DynamoDBService operations the
+app relies on. Every case reports throughput and p50/p95/p99 latency, and
+the run is saved as JSON so results can be compared across commits.
+
+Rows are passenger rows; each flight carries PASSENGERS_PER_FLIGHT of them.
+The stand-in holds about 2 KB per row, so 10^7 rows needs around 20 GB of memory.
+
+Usage:
+    python -m benchmarks.bench_data_layer [--rows 1000 100000] [--operations 2000]
+        [--storage memory|local] [--output FILE] [--baseline FILE]
+    python main.py --bench --bench-rows 1000 100000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.messages import format_delay_message
+from benchmarks.harness import (
+    compare_results, default_output_path, environment, load_results, measure,
+    print_comparison, print_results, summarize, write_results
+)
+from models.dynamodb import DynamoDBService
+from models.flight_cache import FlightCache
+from models.handoff_contexts import HandoffContextStore
+from models.local_dynamodb import LocalDynamoDB
+from utils.setup_dynamodb import (
+    create_flights_table, create_passengers_table, create_seat_inventory_table,
+    load_flights_data, load_passengers_data
+)
+
+SUITE = "data_layer"
+
+PASSENGERS_PER_FLIGHT = 100
+# Share of flights that are Delayed (the rest are mostly On Time, a few Cancelled)
+DELAYED_SHARE = 0.2
+CANCELLED_SHARE = 0.03
+FIRST_DEPARTURE = datetime(2025, 6, 17)
+SCHEDULE_DAYS = 7
+
+# Same columns as data/flightdelays.csv and data/passengers.csv
+FLIGHT_COLUMNS = [
+    'flight_id', 'flight_number', 'airline', 'origin', 'destination', 'scheduled_departure',
+    'scheduled_arrival', 'actual_departure', 'actual_arrival', 'delay_minutes', 'delay_reason',
+    'gate', 'terminal', 'status', 'rebooking_options'
+]
+PASSENGER_COLUMNS = [
+    'passenger_id', 'name', 'email', 'phone', 'flight_id', 'seat', 'status', 'loyalty_tier', 'booking_ref'
+]
+
+AIRLINES = [
+    ('AA', 'American Airlines'), ('DL', 'Delta Airlines'), ('UA', 'United Airlines'),
+    ('WN', 'Southwest Airlines'), ('B6', 'JetBlue Airways'), ('AS', 'Alaska Airlines')
+]
+AIRPORTS = ['SFO', 'JFK', 'LAX', 'ATL', 'ORD', 'DFW', 'SEA', 'BOS', 'DEN', 'MIA', 'LAS', 'PHX']
+DELAY_REASONS = ['Weather', 'Mechanical', 'Crew Availability', 'Air Traffic Control', 'Late Aircraft']
+FIRST_NAMES = ['John', 'Jane', 'Maria', 'Wei', 'Aisha', 'Carlos', 'Priya', 'Liam', 'Yuki', 'Omar', 'Emma', 'Noah']
+LAST_NAMES = ['Smith', 'Doe', 'Garcia', 'Chen', 'Khan', 'Silva', 'Patel', 'Murphy', 'Tanaka', 'Haddad']
+LOYALTY_TIERS = [('Platinum', 5), ('Gold', 15), ('Silver', 30), ('Standard', 50)]
+# Passengers sharing a booking reference, drawn per booking
+PARTY_SIZES = [1, 1, 1, 2, 2, 3, 4]
+BOOKING_REF_CHARACTERS = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+
+def flight_id_of(index):
+    return f"F{index:07d}"
+
+
+def passenger_id_of(index):
+    return f"P{index:08d}"
+
+
+def write_synthetic_data(directory, rows, seed=7):
+    """
+    Write flights and passengers CSV files shaped like the sample data
+
+    The same rows and seed always produce the same files.
+
+    Args:
+        directory: Directory the files are written to
+        rows: Number of passenger rows
+        seed: Random seed
+
+    Returns:
+        Tuple of (flights CSV path, passengers CSV path, number of flights)
+    """
+    rng = random.Random(seed)
+    flight_count = max(1, -(-rows // PASSENGERS_PER_FLIGHT))
+    flights_csv = os.path.join(directory, "flights.csv")
+    passengers_csv = os.path.join(directory, "passengers.csv")
+
+    with open(flights_csv, "w", encoding="utf-8", newline="") as file:
+        # The loaders read rebooking_options with backslash-escaped quotes
+        writer = csv.writer(file, escapechar='\\', doublequote=False)
+        writer.writerow(FLIGHT_COLUMNS)
+        for index in range(flight_count):
+            code, airline = rng.choice(AIRLINES)
+            origin, destination = rng.sample(AIRPORTS, 2)
+            departure = FIRST_DEPARTURE + timedelta(minutes=5 * rng.randrange(SCHEDULE_DAYS * 24 * 12))
+            arrival = departure + timedelta(minutes=rng.randrange(60, 660, 5))
+
+            roll = rng.random()
+            delay_minutes = rng.randrange(15, 300, 5) if roll < DELAYED_SHARE else 0
+            if roll < DELAYED_SHARE:
+                status = 'Delayed'
+            elif roll < DELAYED_SHARE + CANCELLED_SHARE:
+                status = 'Cancelled'
+            else:
+                status = 'On Time'
+
+            options = []
+            for _ in range(2 if flight_count > 1 else 0):
+                option = rng.randrange(flight_count)
+                option_departure = departure + timedelta(minutes=rng.randrange(60, 600, 5))
+                options.append({
+                    'flight_id': flight_id_of(option),
+                    'flight_number': f"{code}{rng.randrange(100, 10000)}",
+                    'departure': option_departure.isoformat(),
+                    'arrival': (option_departure + (arrival - departure)).isoformat()
+                })
+
+            writer.writerow([
+                flight_id_of(index), f"{code}{rng.randrange(100, 10000)}", airline, origin, destination,
+                departure.isoformat(), arrival.isoformat(),
+                (departure + timedelta(minutes=delay_minutes)).isoformat(),
+                (arrival + timedelta(minutes=delay_minutes)).isoformat(),
+                delay_minutes, rng.choice(DELAY_REASONS) if delay_minutes else '',
+                f"{rng.choice('ABCDE')}{rng.randrange(1, 40)}", str(rng.randrange(1, 6)), status,
+                json.dumps(options, separators=(',', ':'))
+            ])
+
+    tiers = [tier for tier, _ in LOYALTY_TIERS]
+    weights = [weight for _, weight in LOYALTY_TIERS]
+    with open(passengers_csv, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(PASSENGER_COLUMNS)
+        party_left = 0
+        for index in range(rows):
+            # Bookings never span two flights
+            if not party_left or index % PASSENGERS_PER_FLIGHT == 0:
+                booking_ref = "".join(rng.choices(BOOKING_REF_CHARACTERS, k=6))
+                party_left = rng.choice(PARTY_SIZES)
+            party_left -= 1
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            writer.writerow([
+                passenger_id_of(index), f"{first} {last}", f"{first}.{last}{index}@example.com".lower(),
+                f"555-{rng.randrange(100, 1000)}-{rng.randrange(10000):04d}",
+                flight_id_of(index // PASSENGERS_PER_FLIGHT),
+                f"{rng.randrange(1, 40)}{rng.choice('ABCDEF')}",
+                rng.choice(['Checked In', 'Booked']), rng.choices(tiers, weights)[0], booking_ref
+            ])
+
+    return flights_csv, passengers_csv, flight_count
+
+
+class _TimedClient:
+    """Client proxy recording how long every BatchWriteItem call of a load takes"""
+
+    def __init__(self, client):
+        self.client = client
+        self.samples = []
+
+    def batch_write_item(self, **kwargs):
+        started = time.perf_counter_ns()
+        response = self.client.batch_write_item(**kwargs)
+        self.samples.append(time.perf_counter_ns() - started)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def bench_loader(case, load, table, csv_file, workers):
+    """
+    Time a CSV loader
+
+    Throughput counts the rows written; latency is that of each 25-item
+    BatchWriteItem call, including the wait for the stand-in's lock.
+    """
+    client = _TimedClient(table.meta.client)
+    timed_table = SimpleNamespace(name=table.name, meta=SimpleNamespace(client=client))
+    # The loader reports its own progress, which would interleave with the results
+    with redirect_stdout(io.StringIO()):
+        stats = load(timed_table, csv_file, workers=workers)
+    return summarize(case, client.samples, stats['seconds'], stats['written'], "rows")
+
+
+def run_scale(rows, operations=2000, queries=100, workers=8, seed=7, storage="memory"):
+    """
+    Load one scale of synthetic data and time every case
+
+    Args:
+        rows: Number of passenger rows
+        operations: Timed calls per point read, write and render case
+        queries: Timed calls per manifest and delayed-flight query case
+        workers: Writer threads of the loaders
+        seed: Random seed of the data and of the keys each case uses
+        storage: "memory", or "local" for the SQLite-backed stand-in in a temporary file
+
+    Returns:
+        Dict with rows, flights and the list of case results
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="delaycompanion-bench-") as directory:
+        flights_csv, passengers_csv, flight_count = write_synthetic_data(directory, rows, seed)
+        dynamodb = LocalDynamoDB(os.path.join(directory, "tables.db") if storage == "local" else None)
+        try:
+            with redirect_stdout(io.StringIO()):
+                flights_table = create_flights_table(dynamodb)
+                passengers_table = create_passengers_table(dynamodb)
+                create_seat_inventory_table(dynamodb)
+
+            results = [
+                bench_loader("load_flights", load_flights_data, flights_table, flights_csv, workers),
+                bench_loader("load_passengers", load_passengers_data, passengers_table, passengers_csv, workers)
+            ]
+
+            # Separate caches, so reads that should reach the tables never hit a warm entry
+            service = DynamoDBService(FlightCache(max_size=flight_count + 1), HandoffContextStore(), dynamodb)
+            uncached = DynamoDBService(FlightCache(ttl=0), HandoffContextStore(), dynamodb)
+
+            flight_keys = [(flight_id_of(rng.randrange(flight_count)),) for _ in range(operations)]
+            passenger_keys = [(passenger_id_of(rng.randrange(rows)),) for _ in range(operations)]
+            manifest_keys = [(flight_id_of(rng.randrange(flight_count)),) for _ in range(queries)]
+
+            results.append(measure("get_flight", uncached.get_flight, flight_keys, warmup=min(100, operations)))
+            # Warming up with every key leaves the timed reads all served by the cache
+            results.append(measure("get_flight_cached", service.get_flight, flight_keys, warmup=operations))
+            results.append(measure("get_passenger", service.get_passenger, passenger_keys,
+                                   warmup=min(100, operations)))
+            results.append(measure(
+                "flight_manifest", lambda flight_id: len(service.get_passengers_for_flight(flight_id)),
+                manifest_keys, warmup=min(10, queries), unit="passengers"
+            ))
+            results.append(measure(
+                "delayed_flights", lambda: len(uncached.get_delayed_flights()),
+                [()] * queries, warmup=min(3, queries), unit="flights"
+            ))
+
+            # Every write moves a different passenger off the flight it is known to be on
+            rebookings = [
+                (passenger_id_of(index), flight_id_of((index // PASSENGERS_PER_FLIGHT + 1) % flight_count),
+                 flight_id_of(index // PASSENGERS_PER_FLIGHT))
+                for index in rng.sample(range(rows), min(operations, rows))
+            ]
+            results.append(measure(
+                "rebook_passenger",
+                lambda passenger_id, new_flight_id, expected_flight_id: service.update_passenger_rebooking(
+                    passenger_id, new_flight_id, expected_flight_id=expected_flight_id
+                ),
+                rebookings
+            ))
+
+            delayed = uncached.get_delayed_flights() or [service.get_flight(flight_id_of(0))]
+            messages = []
+            for index in range(operations):
+                flight = delayed[index % len(delayed)]
+                messages.append((
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", flight['flight_number'],
+                    flight['origin'], flight['destination'], flight.get('delay_minutes', 0),
+                    flight.get('delay_reason', ''), flight['scheduled_departure'], flight['actual_departure'],
+                    flight['gate'], flight['terminal'], flight['rebooking_options']
+                ))
+            results.append(measure("format_delay_message", format_delay_message, messages,
+                                   warmup=min(100, operations)))
+        finally:
+            dynamodb.close()
+
+    return {'rows': rows, 'flights': flight_count, 'results': results}
+
+
+def run_suite(scales, operations=2000, queries=100, workers=8, seed=7, storage="memory", out=sys.stdout):
+    """
+    Run every scale and collect the report
+
+    Args:
+        scales: Passenger row counts to run, e.g. [1000, 100000]
+        operations, queries, workers, seed, storage: See run_scale
+        out: Stream the per-scale tables are printed to, or None
+
+    Returns:
+        Report dict with the suite, environment, configuration and runs
+    """
+    report = {
+        'suite': SUITE,
+        'environment': environment(),
+        'config': {
+            'operations': operations,
+            'queries': queries,
+            'workers': workers,
+            'seed': seed,
+            'storage': storage,
+            'passengers_per_flight': PASSENGERS_PER_FLIGHT
+        },
+        'runs': []
+    }
+    for rows in scales:
+        run = run_scale(rows, operations, queries, workers, seed, storage)
+        report['runs'].append(run)
+        if out:
+            print_results(rows, run['results'], out=out)
+    return report
+
+
+def save_and_compare(report, output=None, baseline=None, threshold=0.10, out=sys.stdout):
+    """
+    Write a report as JSON and compare it with a baseline report
+
+    Args:
+        report: Report from run_suite
+        output: Result file; defaults to benchmarks/results/data_layer-<commit>.json
+        baseline: Optional result file of an earlier run to compare with
+        threshold: Relative change in throughput or p95 latency counted as a regression
+        out: Stream the summary is printed to
+
+    Returns:
+        Number of regressed cases
+    """
+    path = write_results(output or default_output_path(SUITE, report['environment']['commit']), report)
+    print(f"\nResults written to {path}", file=out)
+    if not baseline:
+        return 0
+
+    reference = load_results(baseline)
+    if reference.get('config') != report['config']:
+        print("Note: the baseline was run with different options, so differences may not be regressions",
+              file=out)
+    comparisons = compare_results(reference, report, threshold)
+    print_comparison(comparisons, reference, out=out)
+    return sum(comparison['regressed'] for comparison in comparisons)
+
+
+def parse_rows(value):
+    """Parse a row count, accepting scientific notation such as 1e6"""
+    rows = int(float(value))
+    if rows < 1:
+        raise argparse.ArgumentTypeError(f"row count must be positive: {value}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data layer, CSV loaders and delay messages")
+    parser.add_argument("--rows", type=parse_rows, nargs="+", default=[1000, 10000],
+                        help="Passenger row counts to run, 1e3 to 1e7 (default: 1000 10000)")
+    parser.add_argument("--operations", type=int, default=2000,
+                        help="Timed calls per point read, write and render case")
+    parser.add_argument("--queries", type=int, default=100,
+                        help="Timed calls per manifest and delayed-flight query case")
+    parser.add_argument("--workers", type=int, default=8, help="Writer threads of the CSV loaders")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed of the synthetic data")
+    parser.add_argument("--storage", choices=["memory", "local"], default="memory",
+                        help="In-memory stand-in, or the SQLite-backed one in a temporary file")
+    parser.add_argument("--output", type=str,
+                        help="JSON result file (default: benchmarks/results/data_layer-<commit>.json)")
+    parser.add_argument("--baseline", type=str, help="Result file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative throughput or p95 change reported as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+    
+    report = run_suite(args.rows, args.operations, args.queries, args.workers, args.seed, args.storage)
+    regressions = save_and_compare(report, args.output, args.baseline, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark for the agent response formatter
+
+Usage:
+    python -m benchmarks.bench_formatting [--responses 2000] [--paragraphs 40]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.formatting import markdown_formatter, text_formatter
+
+SAMPLE_PARAGRAPH = (
+    "## Flight Delay Information\n"
+    "Your flight AA1234 from SFO to JFK is Delayed by 2h 30m due to weather. "
+    "The connecting flight UA5678 is still On Time.\n\n"
+    "### Rebooking Options\n"
+    "1. Flight AA1456 - Departs: 2025-06-17T12:00:00 - Arrives: 2025-06-17T20:30:00\n"
+    "2. Flight AA1789 - Departs: 2025-06-17T15:45:00 - Arrives: 2025-06-18T00:15:00\n\n"
+    "Would you like me to:\n"
+    "- Help you explore Available Options\n"
+    "- Connect you with an Agent\n"
+    "- Provide general Delay Compensation details\n\n"
+)
+
+def legacy_format(text):
+    """The chained replace/regex formatter the web app used before"""
+    text = text.replace("Delayed", "🔴 **Delayed**")
+    text = text.replace("On Time", "🟢 **On Time**")
+    text = re.sub(r'\b([A-Z]{2}\d{3,4})\b', r'**\1**', text)
+    if "Would you like me to:" in text:
+        text = text.replace("Would you like me to:", "\n---\n### 🤝 How Can I Help You Next?\n\nWould you like me to:")
+    text = text.replace("- Help you explore", "- ✈️ Help you explore")
+    text = text.replace("- Connect you with", "- 📞 Connect you with")
+    text = text.replace("- Provide general", "- 📋 Provide general")
+    text = text.replace("Flight Delay Information", "✈️ Flight Delay Information")
+    text = text.replace("Available Options", "🔄 Available Options")
+    text = text.replace("Rebooking Options", "✈️ Rebooking Options")
+    text = text.replace("Delay Compensation", "💰 Delay Compensation")
+    text = text.replace("Connect with an Agent", "📞 Connect with an Agent")
+    return text
+
+def bench(format_text, responses):
+    started = time.perf_counter()
+    for response in responses:
+        format_text(response)
+    return time.perf_counter() - started
+
+def bench_stream(responses, chunk_size=8):
+    """Format token-sized deltas as the CLI does while a turn streams"""
+    started = time.perf_counter()
+    for response in responses:
+        stream = text_formatter.stream()
+        for start in range(0, len(response), chunk_size):
+            stream.feed(response[start:start + chunk_size])
+        stream.flush()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent response formatting")
+    parser.add_argument("--responses", type=int, default=2000, help="Number of responses to format")
+    parser.add_argument("--paragraphs", type=int, default=40, help="Sample paragraphs per response")
+    args = parser.parse_args()
+    
+    response = SAMPLE_PARAGRAPH * args.paragraphs
+    responses = [response] * args.responses
+    if legacy_format(response) != markdown_formatter.format(response):
+        sys.exit("Single-pass output differs from the legacy formatter")
+    
+    results = [
+        ("legacy chained", bench(legacy_format, responses)),
+        ("single pass (markdown)", bench(markdown_formatter.format, responses)),
+        ("single pass (text)", bench(text_formatter.format, responses)),
+        ("streamed (text)", bench_stream(responses))
+    ]
+    
+    megabytes = len(response.encode("utf-8")) * args.responses / 1e6
+    print(f"Formatting {args.responses:,} responses of {len(response):,} characters")
+    for name, seconds in results:
+        print(f"  {name:<24} {seconds:8.3f}s  {megabytes / seconds:8.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
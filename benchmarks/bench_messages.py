@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for the delay message renderer
+
+Usage:
+    python -m benchmarks.bench_messages [--passengers 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.messages import MESSAGE_FORMATS, format_delay_message, renderer
+
+SAMPLE_FLIGHT = {
+    'flight_id': 'FL001',
+    'flight_number': 'AA1234',
+    'origin': 'SFO',
+    'destination': 'JFK',
+    'scheduled_departure': '2025-06-17T08:00:00',
+    'actual_departure': '2025-06-17T10:30:00',
+    'delay_minutes': 150,
+    'delay_reason': 'Weather',
+    'gate': 'A12',
+    'terminal': '1',
+    'rebooking_options': [
+        {'flight_id': 'FL101', 'flight_number': 'AA1456',
+         'departure': '2025-06-17T12:00:00', 'arrival': '2025-06-17T20:30:00'},
+        {'flight_id': 'FL102', 'flight_number': 'AA1789',
+         'departure': '2025-06-17T15:45:00', 'arrival': '2025-06-18T00:15:00'}
+    ]
+}
+
+def bench_single(passengers):
+    """Render one message per call, as the agent tool does"""
+    flight = SAMPLE_FLIGHT
+    started = time.perf_counter()
+    for passenger in passengers:
+        format_delay_message(
+            passenger['name'], flight['flight_number'], flight['origin'], flight['destination'],
+            flight['delay_minutes'], flight['delay_reason'], flight['scheduled_departure'],
+            flight['actual_departure'], flight['gate'], flight['terminal'], flight['rebooking_options']
+        )
+    return time.perf_counter() - started
+
+def bench_manifest(passengers, fmt):
+    """Render a whole manifest in one call"""
+    started = time.perf_counter()
+    renderer.render_manifest(passengers, SAMPLE_FLIGHT, fmt=fmt)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark delay message rendering")
+    parser.add_argument("--passengers", type=int, default=100000, help="Number of passengers to render")
+    args = parser.parse_args()
+    
+    passengers = [{'passenger_id': f'P{i:07d}', 'name': f'Passenger {i}'} for i in range(args.passengers)]
+    
+    results = [("single (markdown)", bench_single(passengers))]
+    for fmt in MESSAGE_FORMATS:
+        results.append((f"manifest ({fmt})", bench_manifest(passengers, fmt)))
+    
+    print(f"Rendering {args.passengers:,} delay messages")
+    for name, seconds in results:
+        print(f"  {name:<20} {seconds:8.3f}s  {args.passengers / seconds:14,.0f} messages/sec")
+
+if __name__ == "__main__":
+    main()
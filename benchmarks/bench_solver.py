@@ -0,0 +1,67 @@
+"""
+Micro-benchmark for the rebooking solver
+
+Usage:
+    python -m benchmarks.bench_solver [--passengers 5000] [--options 40]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from app.rebooking_solver import RebookingSolver, TIER_WEIGHTS
+
+SCHEDULED_ARRIVAL = datetime(2025, 6, 17, 16, 0)
+
+def make_flight(passengers, options, seed):
+    """Build a displaced manifest with families and options with scarce seats"""
+    rng = random.Random(seed)
+    tiers = list(TIER_WEIGHTS) + [None]
+    manifest = []
+    while len(manifest) < passengers:
+        booking_ref = f"B{len(manifest):07d}"
+        tier = rng.choice(tiers)
+        for _ in range(min(rng.choice([1, 1, 1, 2, 2, 3, 4]), passengers - len(manifest))):
+            manifest.append({'passenger_id': f'P{len(manifest):07d}', 'loyalty_tier': tier,
+                             'booking_ref': booking_ref})
+    
+    rebooking_options = []
+    capacities = {}
+    for i in range(options):
+        arrival = SCHEDULED_ARRIVAL + timedelta(minutes=rng.randint(60, 36 * 60))
+        flight_id = f"FL{i:04d}"
+        rebooking_options.append({'flight_id': flight_id, 'arrival': arrival.isoformat()})
+        # Roughly 80% of the displaced passengers fit in total
+        capacities[flight_id] = rng.randint(0, int(1.6 * passengers / max(1, options)))
+    return manifest, rebooking_options, capacities
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rebooking solver")
+    parser.add_argument("--passengers", type=int, default=5000, help="Number of displaced passengers")
+    parser.add_argument("--options", type=int, default=40, help="Number of rebooking options")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per solver mode")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated flight")
+    args = parser.parse_args()
+    
+    passengers, options, capacities = make_flight(args.passengers, args.options, args.seed)
+    print(f"Planning {args.passengers:,} passengers across {args.options} options")
+    for name, solver in (("relaxed", RebookingSolver()), ("exact", RebookingSolver(exact=True))):
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            plan = solver.solve(passengers, options, capacities, SCHEDULED_ARRIVAL.isoformat())
+            timings.append(time.perf_counter() - started)
+        gap = plan['weighted_delay'] / plan['lower_bound'] - 1 if plan['lower_bound'] else 0.0
+        print(f"  {name:<8} best {min(timings) * 1000:8.1f}ms  {plan['status']:<12} "
+              f"gap {gap:7.3%}  {len(plan['unassigned']):,} without a seat  "
+              f"average delay {plan['average_delay_minutes']:.0f} min")
+
+if __name__ == "__main__":
+    main()
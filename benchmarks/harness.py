@@ -0,0 +1,200 @@
+"""
+Timing, reporting and comparison helpers shared by the benchmark suites
+
+Every case is summarized as throughput plus p50/p95/p99 latency, and a run
+is saved as JSON together with the commit it measured, so results of two
+commits can be compared with compare_results.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Where results are written when no output file is given (ignored by git)
+RESULTS_DIR = project_root / "benchmarks" / "results"
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_samples)) - 1, 0)
+    return sorted_samples[rank]
+
+
+def summarize(case, samples_ns, seconds, units=None, unit="ops"):
+    """
+    Build the result record of a case
+
+    Args:
+        case: Case name, stable across commits so runs can be compared
+        samples_ns: Latency of every timed operation in nanoseconds
+        seconds: Wall-clock time of the whole case
+        units: Work done, in unit; defaults to the number of operations
+        unit: What the throughput counts, e.g. "ops" or "rows"
+
+    Returns:
+        Dict with operation count, throughput and latency percentiles in microseconds
+    """
+    samples = sorted(samples_ns)
+    units = len(samples) if units is None else units
+    return {
+        'case': case,
+        'operations': len(samples),
+        'seconds': round(seconds, 6),
+        'throughput': round(units / seconds, 1) if seconds else 0.0,
+        'unit': f"{unit}/s",
+        'mean_us': round(sum(samples) / len(samples) / 1000, 2) if samples else 0.0,
+        'p50_us': round(percentile(samples, 0.50) / 1000, 2),
+        'p95_us': round(percentile(samples, 0.95) / 1000, 2),
+        'p99_us': round(percentile(samples, 0.99) / 1000, 2),
+        'max_us': round(samples[-1] / 1000, 2) if samples else 0.0
+    }
+
+
+def measure(case, operation, arguments, warmup=0, unit="ops"):
+    """
+    Time an operation once per argument tuple
+
+    Args:
+        case: Case name
+        operation: Callable to time; its return value is ignored unless it is a
+            number, which is then counted as the units of work it did
+        arguments: List of argument tuples, one per timed call
+        warmup: Number of untimed calls made first with the leading arguments
+        unit: What the throughput counts
+
+    Returns:
+        Result record (see summarize)
+    """
+    for args in arguments[:warmup]:
+        operation(*args)
+
+    clock = time.perf_counter_ns
+    samples = []
+    units = 0
+    started = clock()
+    for args in arguments:
+        call_started = clock()
+        done = operation(*args)
+        samples.append(clock() - call_started)
+        units += done if isinstance(done, int) and not isinstance(done, bool) else 1
+    return summarize(case, samples, (clock() - started) / 1e9, units, unit)
+
+
+def git_commit():
+    """Get the commit being measured and whether the working tree has changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, dirty
+
+
+def environment():
+    """Describe the commit and machine a run was measured on"""
+    commit, dirty = git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def default_output_path(suite, commit):
+    """Get the result file of a suite for a commit, e.g. benchmarks/results/data_layer-1a2b3c4d5e6f.json"""
+    return RESULTS_DIR / f"{suite}-{(commit or 'unknown')[:12]}.json"
+
+
+def write_results(path, report):
+    """Write a report as JSON, creating the directory if needed"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
+    return path
+
+
+def load_results(path):
+    """Read a report written by write_results"""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _results_by_case(report):
+    return {
+        (run['rows'], result['case']): result
+        for run in report.get('runs', [])
+        for result in run['results']
+    }
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Compare the cases two reports have in common
+
+    A case regressed when its throughput dropped, or its p95 latency rose,
+    by more than threshold.
+
+    Args:
+        baseline: Report of the reference commit
+        current: Report of the commit under test
+        threshold: Allowed relative change, e.g. 0.10 for 10%
+
+    Returns:
+        List of dicts with rows, case, throughput and p95 ratios and a regressed flag
+    """
+    before = _results_by_case(baseline)
+    comparisons = []
+    for key, result in _results_by_case(current).items():
+        reference = before.get(key)
+        if reference is None:
+            continue
+        throughput_ratio = result['throughput'] / reference['throughput'] if reference['throughput'] else 0.0
+        p95_ratio = result['p95_us'] / reference['p95_us'] if reference['p95_us'] else 0.0
+        comparisons.append({
+            'rows': key[0],
+            'case': key[1],
+            'throughput_ratio': round(throughput_ratio, 3),
+            'p95_ratio': round(p95_ratio, 3),
+            'regressed': throughput_ratio < 1 - threshold or p95_ratio > 1 + threshold
+        })
+    return comparisons
+
+
+def print_results(rows, results, out=sys.stdout):
+    """Print the results of one scale as a table"""
+    print(f"\n{rows:,} rows", file=out)
+    print(f"  {'case':<24} {'ops':>8} {'throughput':>25} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}",
+          file=out)
+    for result in results:
+        print(f"  {result['case']:<24} {result['operations']:>8,} "
+              f"{result['throughput']:>12,.0f} {result['unit']:<12} "
+              f"{result['p50_us']:>10,.1f} {result['p95_us']:>10,.1f} {result['p99_us']:>10,.1f}", file=out)
+
+
+def print_comparison(comparisons, baseline, out=sys.stdout):
+    """Print a comparison made by compare_results"""
+    reference = (baseline.get('environment', {}).get('commit') or 'baseline')[:12]
+    print(f"\nCompared with {reference}", file=out)
+    for comparison in comparisons:
+        flag = "REGRESSED" if comparison['regressed'] else ""
+        print(f"  {comparison['rows']:>10,} {comparison['case']:<24} "
+              f"throughput x{comparison['throughput_ratio']:<6.2f} p95 x{comparison['p95_ratio']:<6.2f} {flag}",
+              file=out)
@@ -8,6 +8,7 @@ import os
 import sys
 import argparse
 import logging
+from datetime import datetime
 from pathlib import Path
 
 # Configure logging
@@ -17,6 +18,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("delaycompanion")
 
+def configure_storage(name, path=None):
+    """Select the storage backend for this process and the processes it starts"""
+    from models.storage import create_storage_backend, set_storage_backend
+    
+    # Exported so the Streamlit process started by --web uses the same tables
+    os.environ["DELAYCOMPANION_STORAGE"] = name
+    if path:
+        os.environ["DELAYCOMPANION_STORAGE_PATH"] = path
+    backend = create_storage_backend(name, path)
+    set_storage_backend(backend)
+    logger.info(f"Using {backend.name} storage" + (f" at {backend.path}" if getattr(backend, 'path', None) else ""))
+    return backend
+
 def setup_database():
     """Set up the DynamoDB tables and load sample data"""
     from utils.setup_dynamodb import main as setup_db
@@ -24,16 +38,28 @@ def setup_database():
     setup_db()
     logger.info("Database setup complete!")
 
+def prefetch_mcp_servers():
+    """Resolve the pinned MCP server packages in the background while Streamlit boots"""
+    import threading
+    from app.mcp_pool import get_shared_pool
+    
+    threading.Thread(target=get_shared_pool().prefetch, name="mcp-prefetch", daemon=True).start()
+
 def run_streamlit():
     """Run the Streamlit web interface"""
     import subprocess
+    prefetch_mcp_servers()
     logger.info("Starting Streamlit web interface...")
     subprocess.run(["streamlit", "run", "app/streamlit_app.py"])
 
 def run_cli(passenger_id=None):
     """Run the CLI interface for testing the agent"""
     from app.agent import DelayCompanionAgent
+    from app.formatting import text_formatter
+    from app.mcp_pool import get_shared_pool
     
+    # Resolve and start the MCP servers while the rest of the CLI boots
+    get_shared_pool().warm_up_async()
     agent = DelayCompanionAgent()
     logger.info("DelayCompanion CLI started. Type 'exit' to quit.")
     
@@ -46,22 +72,166 @@ def run_cli(passenger_id=None):
             if query.lower() in ["exit", "quit", "q"]:
                 break
             
-            response, _ = agent.process_query(query, passenger_id)
-            print(f"\nDelayCompanion: {response}")
+            # Print each line as soon as it is generated instead of waiting for the whole turn
+            print("\nDelayCompanion: ", end="", flush=True)
+            stream = text_formatter.stream()
+            for event in agent.stream_query(query, passenger_id):
+                if event["type"] == "text":
+                    print(stream.feed(event["data"]), end="", flush=True)
+                elif event["type"] == "tool":
+                    print(stream.flush(), end="")
+                    print(f"\n[🔧 Using {event['name']}]\n", end="", flush=True)
+            print(stream.flush())
         except KeyboardInterrupt:
             break
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
     
+    router_stats = agent.get_router_stats()
+    if router_stats and router_stats["queries"]:
+        logger.info(
+            f"Fast path answered {router_stats['hits']}/{router_stats['queries']} queries "
+            f"({router_stats['hit_ratio']:.0%}, avg {router_stats['fast_path_ms_avg']:.1f} ms), "
+            f"saving ~{router_stats['latency_saved_s']:.1f}s of agent time"
+        )
+    cache_stats = agent.get_response_cache_stats()
+    if cache_stats and (cache_stats["hits"] or cache_stats["misses"]):
+        logger.info(
+            f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_ratio']:.0%}), {cache_stats['stale']} stale, "
+            f"{cache_stats['evictions']} evicted, {cache_stats['size']} cached"
+        )
+    agent.mcp_pool.stop()
     logger.info("DelayCompanion CLI exited.")
 
+def run_notifications(departure_date=None, concurrency=32, rate_limits=None, dry_run=False):
+    """Send delay notifications to every passenger on a delayed flight"""
+    from app.notifications import LogSender, NotificationLog, NotificationPipeline
+    
+    if dry_run:
+        # Dry runs use a throwaway dedupe log so real sends are not suppressed later
+        pipeline = NotificationPipeline(
+            senders={"email": LogSender()},
+            rate_limits=rate_limits,
+            concurrency=concurrency,
+            notification_log=NotificationLog(":memory:")
+        )
+    else:
+        pipeline = NotificationPipeline(rate_limits=rate_limits, concurrency=concurrency)
+    
+    logger.info("Sending delay notifications...")
+    report = pipeline.run(departure_date=departure_date)
+    logger.info(
+        f"Notified {report['sent']} of {report['passengers']} passengers on {report['flights']} flights "
+        f"in {report['seconds']:.2f}s ({report['messages_per_sec']:,.1f} msg/s); "
+        f"{report['duplicates']} duplicates skipped, {report['unreachable']} unreachable, "
+        f"{report['failed']} failed; lag p50 {report['lag_p50']:.2f}s, p95 {report['lag_p95']:.2f}s"
+    )
+    return report
+
+def run_reaccommodation(flight_id, optimize=False):
+    """Rebook every passenger on a cancelled flight onto its rebooking options"""
+    from models.dynamodb import DynamoDBService
+    
+    db_service = DynamoDBService()
+    logger.info(f"Re-accommodating passengers on {flight_id}...")
+    if optimize:
+        from app.rebooking_solver import RebookingSolver
+        
+        plan = RebookingSolver().plan_for_flight(db_service, flight_id)
+        if plan is None:
+            logger.error(f"Flight {flight_id} not found")
+            return None
+        logger.info(
+            f"Planned {plan['passengers']} passengers in {plan['groups']} parties in {plan['seconds'] * 1000:.1f}ms "
+            f"({plan['status']}); average delay {plan['average_delay_minutes']:.0f} min, "
+            f"{len(plan['unassigned'])} without a seat"
+        )
+        report = db_service.apply_rebooking_plan(flight_id, plan['assignments'])
+    else:
+        report = db_service.reaccommodate_flight(flight_id)
+    logger.info(
+        f"Rebooked {report['rebooked']} of {report['passengers']} passengers in {report['seconds']:.2f}s "
+        f"({report['transactions']} transactions, {report['retries']} retries); "
+        f"{len(report['unaccommodated'])} without a seat, {len(report['conflicts'])} changed meanwhile"
+    )
+    for new_flight_id, count in report['by_flight'].items():
+        logger.info(f"  {new_flight_id}: {count} passengers")
+    for tier, counts in report.get('by_tier', {}).items():
+        logger.info(f"  {tier}: {counts['rebooked']} rebooked, {counts['unaccommodated']} unaccommodated")
+    return report
+
+def run_next_handoff(agent_id):
+    """Give a call-center agent the next passenger waiting in the handoff queue"""
+    import json
+    from app.handoff_queue import HandoffQueue
+    
+    handoffs = HandoffQueue()
+    handoff = handoffs.next_for_agent(agent_id)
+    stats = handoffs.stats()
+    if handoff is None:
+        logger.info(f"No passengers waiting ({stats['waiting']} handoffs still being prepared)")
+        return None
+    
+    waited = datetime.now().timestamp() - handoff['created_at']
+    logger.info(
+        f"Assigned handoff {handoff['handoff_id']} for {handoff['passenger_id']} to {agent_id} "
+        f"after {waited:.0f}s in queue; {stats['waiting']} still waiting, "
+        f"average call {stats['average_call_seconds']:.0f}s across {stats['active_agents']} agents"
+    )
+    print(json.dumps(handoff['packet'], indent=2))
+    return handoff
+
+def run_benchmarks(scales, storage="memory", output=None, baseline=None):
+    """
+    Run the data layer benchmark suite on synthetic data and save the results as JSON
+    
+    Returns:
+        Number of cases that regressed against the baseline
+    """
+    from benchmarks.bench_data_layer import run_suite, save_and_compare
+    
+    logger.info(f"Benchmarking {storage} storage at {', '.join(f'{rows:,}' for rows in scales)} rows...")
+    report = run_suite(scales, storage=storage)
+    return save_and_compare(report, output, baseline)
+
+def parse_rate_limits(values):
+    """Parse channel=rate arguments into a dict of sends per second"""
+    rate_limits = {}
+    for value in values or []:
+        channel, _, rate = value.partition("=")
+        rate_limits[channel] = float(rate)
+    return rate_limits
+
 def main():
     """Main entry point for the application"""
     parser = argparse.ArgumentParser(description="DelayCompanion - Airline Assistant for Flight Delays")
     parser.add_argument("--setup", action="store_true", help="Set up DynamoDB tables and load sample data")
     parser.add_argument("--web", action="store_true", help="Run the Streamlit web interface")
     parser.add_argument("--cli", action="store_true", help="Run the CLI interface")
+    parser.add_argument("--notify", action="store_true", help="Send delay notifications to all affected passengers")
+    parser.add_argument("--reaccommodate", type=str, metavar="FLIGHT_ID",
+                        help="Rebook every passenger on a cancelled flight by loyalty tier")
+    parser.add_argument("--optimize", action="store_true",
+                        help="With --reaccommodate, minimize tier-weighted arrival delay instead of filling in order")
+    parser.add_argument("--next-handoff", type=str, metavar="AGENT_ID",
+                        help="Take the next passenger waiting for a call-center agent")
     parser.add_argument("--passenger", type=str, help="Passenger ID for CLI testing")
+    parser.add_argument("--date", type=str, help="Departure date (YYYY-MM-DD) to limit --notify to")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent sends for --notify")
+    parser.add_argument("--rate", action="append", metavar="CHANNEL=PER_SEC",
+                        help="Per-channel send rate limit for --notify, e.g. email=20")
+    parser.add_argument("--dry-run", action="store_true", help="Render notifications without sending them")
+    parser.add_argument("--storage", choices=["dynamodb", "local", "memory"],
+                        help="Where the tables live: DynamoDB (default), a local SQLite file, or memory only")
+    parser.add_argument("--storage-path", type=str, help="SQLite file for --storage local")
+    parser.add_argument("--bench", action="store_true",
+                        help="Benchmark the data layer, CSV loaders and delay messages on synthetic data")
+    parser.add_argument("--bench-rows", type=lambda value: int(float(value)), nargs="+", default=[1000, 10000],
+                        metavar="ROWS", help="Passenger row counts for --bench, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--bench-output", type=str,
+                        help="JSON result file for --bench (default: benchmarks/results/data_layer-<commit>.json)")
+    parser.add_argument("--bench-baseline", type=str, help="Earlier --bench result file to compare with")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     
     args = parser.parse_args()
@@ -71,6 +241,24 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
         logging.getLogger("strands").setLevel(logging.DEBUG)
     
+    if args.bench:
+        # The suite loads its own tables into a fresh stand-in, so no configured tables are touched
+        if args.storage == "dynamodb":
+            parser.error("--bench runs against the local stand-in; use --storage memory or --storage local")
+        regressions = run_benchmarks(args.bench_rows, args.storage or "memory", args.bench_output,
+                                     args.bench_baseline)
+        sys.exit(1 if regressions else 0)
+    
+    if args.storage:
+        # Without an action the web interface runs, in a separate process
+        if args.storage == "memory" and not (args.setup or args.cli or args.notify or args.reaccommodate
+                                             or args.next_handoff):
+            parser.error("--storage memory only lives in this process; use --storage local for the web interface")
+        configure_storage(args.storage, args.storage_path)
+        if args.storage == "memory" and not args.setup:
+            # Nothing persists, so the sample data is loaded into this process first
+            setup_database()
+    
     # Run the requested action
     if args.setup:
         setup_database()
@@ -78,6 +266,12 @@ def main():
         run_streamlit()
     elif args.cli:
         run_cli(args.passenger)
+    elif args.notify:
+        run_notifications(args.date, args.concurrency, parse_rate_limits(args.rate), args.dry_run)
+    elif args.reaccommodate:
+        run_reaccommodation(args.reaccommodate, args.optimize)
+    elif args.next_handoff:
+        run_next_handoff(args.next_handoff)
     else:
         # Default to web interface
         run_streamlit()
@@ -1,2 +1,10 @@
 # DelayCompanion models package
-from .dynamodb import DynamoDBService
+from .dynamodb import DynamoDBService, RebookingConflictError, SeatUnavailableError
+from .flight_cache import FlightCache, get_shared_flight_cache
+from .handoff_contexts import HandoffContextStore, get_shared_handoff_contexts
+from .async_dynamodb import AsyncDynamoDBService
+from .passenger_lookup import PassengerLookup
+from .local_dynamodb import LocalDynamoDB
+from .storage import (
+    DynamoDBBackend, LocalBackend, StorageBackend, create_storage_backend, get_storage_backend, set_storage_backend
+)
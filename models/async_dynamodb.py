@@ -0,0 +1,141 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .dynamodb import DynamoDBService
+
+
+class AsyncDynamoDBService:
+    """Asyncio interface to DynamoDBService
+
+    boto3 is blocking, so each call runs on a bounded worker pool while the
+    event loop keeps serving other passengers. Every worker thread gets its
+    own DynamoDBService because boto3 resources are not thread-safe. Calls
+    are bounded by a timeout and can be cancelled like any other awaitable.
+
+    A timeout or cancellation only stops the wait: the worker thread still
+    finishes the call, so its writes are made and are not undone. Bulk
+    writes (reaccommodate_flight, apply_rebooking_plan) commit many chunks,
+    so they wait without a timeout unless the caller passes one.
+    """
+
+    def __init__(self, service_factory=DynamoDBService, max_workers=32, timeout=10.0):
+        """
+        Initialize the async DynamoDB service
+
+        Args:
+            service_factory: Callable returning a DynamoDBService for a worker thread
+            max_workers: Maximum number of DynamoDB calls in flight
+            timeout: Default per-call timeout in seconds
+        """
+        self.service_factory = service_factory
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dynamodb")
+        self._local = threading.local()
+
+    def _service(self):
+        """Get the DynamoDBService owned by the current worker thread"""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self.service_factory()
+        return service
+
+    def _invoke(self, method_name, args, kwargs):
+        """Run a DynamoDBService method on the current worker thread"""
+        return getattr(self._service(), method_name)(*args, **kwargs)
+
+    async def _call(self, method_name, *args, timeout=None, bulk=False, **kwargs):
+        """
+        Run a DynamoDBService method on the worker pool with a timeout
+
+        Args:
+            method_name: DynamoDBService method to run
+            timeout: Optional timeout in seconds; defaults to the service timeout,
+                or to none for bulk calls
+            bulk: Whether the call is a multi-chunk write that must not be cut short by the default timeout
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor,
+            functools.partial(self._invoke, method_name, args, kwargs)
+        )
+        if bulk and timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout or self.timeout)
+
+    async def get_flight(self, flight_id, timeout=None):
+        """Get flight details by flight ID"""
+        return await self._call("get_flight", flight_id, timeout=timeout)
+
+    async def get_delayed_flights(self, departure_date=None, parallel_scan_segments=None, timeout=None):
+        """Get all delayed flights"""
+        return await self._call(
+            "get_delayed_flights", departure_date, parallel_scan_segments, timeout=timeout
+        )
+
+    async def get_passengers_for_flight(self, flight_id, projection=None, timeout=None):
+        """Get all passengers for a specific flight"""
+        return await self._call("get_passengers_for_flight", flight_id, projection, timeout=timeout)
+
+    async def get_passenger(self, passenger_id, timeout=None):
+        """Get passenger details by passenger ID"""
+        return await self._call("get_passenger", passenger_id, timeout=timeout)
+
+    async def get_passenger_with_flight(self, passenger_id, flight_id=None,
+                                        include_rebooking_flights=False, timeout=None):
+        """Get a passenger together with their flight"""
+        return await self._call(
+            "get_passenger_with_flight", passenger_id, flight_id, include_rebooking_flights,
+            timeout=timeout
+        )
+
+    async def update_passenger_rebooking(self, passenger_id, new_flight_id, new_seat=None,
+                                         expected_flight_id=None, timeout=None):
+        """Move a passenger to a new flight in a single conditional write"""
+        return await self._call(
+            "update_passenger_rebooking", passenger_id, new_flight_id, new_seat, expected_flight_id,
+            timeout=timeout
+        )
+
+    async def get_rebooking_options(self, flight_id, timeout=None):
+        """Get rebooking options for a delayed flight"""
+        return await self._call("get_rebooking_options", flight_id, timeout=timeout)
+
+    async def get_seat_availability(self, flight_ids, timeout=None):
+        """Get the live number of open seats on rebooking flights"""
+        return await self._call("get_seat_availability", flight_ids, timeout=timeout)
+
+    async def hold_seat(self, flight_id, passenger_id, timeout=None):
+        """Reserve one seat on a rebooking flight for a passenger"""
+        return await self._call("hold_seat", flight_id, passenger_id, timeout=timeout)
+
+    async def confirm_hold(self, flight_id, passenger_id, timeout=None):
+        """Turn a passenger's hold into a sold seat"""
+        return await self._call("confirm_hold", flight_id, passenger_id, timeout=timeout)
+
+    async def release_hold(self, flight_id, passenger_id, timeout=None):
+        """Give a held seat back to the inventory"""
+        return await self._call("release_hold", flight_id, passenger_id, timeout=timeout)
+
+    async def reaccommodate_flight(self, flight_id, chunk_size=50, timeout=None):
+        """Move every passenger on a cancelled flight to its rebooking options (no default timeout)"""
+        return await self._call("reaccommodate_flight", flight_id, chunk_size, timeout=timeout, bulk=True)
+
+    async def apply_rebooking_plan(self, flight_id, assignments, chunk_size=50, timeout=None):
+        """Commit a rebooking plan built by the rebooking solver (no default timeout)"""
+        return await self._call(
+            "apply_rebooking_plan", flight_id, assignments, chunk_size, timeout=timeout, bulk=True
+        )
+
+    async def materialize_handoff_contexts(self, flight_id, timeout=None):
+        """Precompute the handoff context of every passenger on a flight"""
+        return await self._call("materialize_handoff_contexts", flight_id, timeout=timeout)
+
+    async def generate_handoff_context(self, passenger_id, flight_id=None, timeout=None):
+        """Generate handoff context for call center agents"""
+        return await self._call("generate_handoff_context", passenger_id, flight_id, timeout=timeout)
+
+    def close(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
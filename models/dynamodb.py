@@ -1,38 +1,287 @@
-import boto3
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 import json
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import groupby
+
+from .flight_cache import get_shared_flight_cache
+from .handoff_contexts import HANDOFF_PASSENGER_PROJECTION, get_shared_handoff_contexts
+from .storage import get_storage_backend
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+# Seconds a seat on a rebooking flight is held while the passenger confirms
+SEAT_HOLD_TTL = 600
+
+# A rebooking only applies while the passenger is still on the flight the caller saw,
+# and never onto the flight they are already booked on
+REBOOKING_CONDITION = "attribute_exists(passenger_id) AND flight_id = :expected_flight_id " \
+                      "AND flight_id <> :new_flight_id"
+
+# TransactWriteItems accepts at most 100 actions
+TRANSACT_WRITE_LIMIT = 100
+
+# Re-accommodation order; tiers not listed go last
+LOYALTY_TIER_ORDER = ('Platinum', 'Gold', 'Silver', 'Bronze')
+
+# Errors after which a whole transaction can simply be retried
+RETRYABLE_TRANSACTION_CODES = {
+    'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded',
+    'RequestLimitExceeded', 'TransactionInProgressException', 'InternalServerError'
+}
+
+_deserializer = TypeDeserializer()
+
+
+def _deserialize_item(item):
+    """Convert a low-level DynamoDB item into plain Python values"""
+    return {key: _deserializer.deserialize(value) for key, value in (item or {}).items()}
+
+
+class RebookingConflictError(Exception):
+    """Raised when a passenger's booking changed between being read and being rebooked"""
+    
+    def __init__(self, passenger_id, expected_flight_id, current_flight_id):
+        self.passenger_id = passenger_id
+        self.expected_flight_id = expected_flight_id
+        self.current_flight_id = current_flight_id
+        super().__init__(
+            f"Passenger {passenger_id} is booked on {current_flight_id}, not {expected_flight_id}"
+        )
+
+
+class SeatUnavailableError(Exception):
+    """Raised when a rebooking flight has no seats left to hold"""
+    
+    def __init__(self, flight_id):
+        self.flight_id = flight_id
+        super().__init__(f"No seats left on flight {flight_id}")
+
 
 class DynamoDBService:
-    """Service class for interacting with DynamoDB tables"""
+    """Service class for interacting with DynamoDB tables
     
-    def __init__(self):
-        """Initialize the DynamoDB service"""
-        self.dynamodb = boto3.resource('dynamodb')
+    The tables come from the configured storage backend (see models.storage):
+    Amazon DynamoDB by default, or the local in-process stand-in.
+    """
+    
+    def __init__(self, flight_cache=None, handoff_contexts=None, dynamodb=None):
+        """
+        Initialize the DynamoDB service
+        
+        Args:
+            flight_cache: Optional FlightCache; defaults to the process-wide shared cache
+            handoff_contexts: Optional HandoffContextStore; defaults to the process-wide shared store
+            dynamodb: Optional DynamoDB resource; defaults to the storage backend's
+        """
+        self.dynamodb = dynamodb or get_storage_backend().resource()
         self.flights_table = self.dynamodb.Table('DelayCompanion_Flights')
         self.passengers_table = self.dynamodb.Table('DelayCompanion_Passengers')
+        self.seat_inventory_table = self.dynamodb.Table('DelayCompanion_SeatInventory')
+        self.flight_cache = flight_cache or get_shared_flight_cache()
+        self.handoff_contexts = handoff_contexts or get_shared_handoff_contexts()
     
     def get_flight(self, flight_id):
         """Get flight details by flight ID"""
+        flight = self.flight_cache.get(flight_id)
+        if flight is not None:
+            return flight
+        
         response = self.flights_table.get_item(
             Key={'flight_id': flight_id}
         )
-        return response.get('Item')
+        flight = response.get('Item')
+        self.flight_cache.put(flight_id, flight)
+        return flight
+    
+    def _paginate(self, operation, **kwargs):
+        """Yield every item of a query or scan, following LastEvaluatedKey across pages"""
+        while True:
+            response = operation(**kwargs)
+            yield from response.get('Items', [])
+            
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_key
+    
+    def _parallel_scan(self, table_name, total_segments, **kwargs):
+        """
+        Scan a table with several segments in parallel
+        
+        Uses the resource's client, which unlike the resource itself is thread-safe
+        and still converts items to and from native Python types.
+        
+        Args:
+            table_name: Name of the table to scan
+            total_segments: Number of segments scanned concurrently
+            kwargs: Extra Scan parameters (FilterExpression, ...)
+        """
+        client = self.dynamodb.meta.client
+        
+        def scan_segment(segment):
+            return list(self._paginate(client.scan, TableName=table_name, Segment=segment,
+                                       TotalSegments=total_segments, **kwargs))
+        
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            return [item for items in executor.map(scan_segment, range(total_segments)) for item in items]
+    
+    def get_delayed_flights(self, departure_date=None, parallel_scan_segments=None):
+        """
+        Get all delayed flights
+        
+        Queries every page of the StatusIndex GSI. For ad-hoc sweeps over tables
+        without the index, a parallel-segment scan can be requested instead.
+        
+        Args:
+            departure_date: Optional YYYY-MM-DD date limiting the scheduled departure
+            parallel_scan_segments: Optional number of segments for a parallel scan
+        """
+        if parallel_scan_segments:
+            filter_expression = "#status = :status"
+            expression_values = {':status': 'Delayed'}
+            if departure_date:
+                filter_expression += " AND begins_with(scheduled_departure, :date)"
+                expression_values[':date'] = departure_date
+            
+            flights = self._parallel_scan(
+                self.flights_table.name,
+                parallel_scan_segments,
+                FilterExpression=filter_expression,
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues=expression_values
+            )
+        else:
+            key_condition = Key('status').eq('Delayed')
+            if departure_date:
+                key_condition = key_condition & Key('scheduled_departure').begins_with(departure_date)
+            
+            flights = list(self._paginate(
+                self.flights_table.query,
+                IndexName='StatusIndex',
+                KeyConditionExpression=key_condition
+            ))
+        
+        for flight in flights:
+            self.flight_cache.put(flight['flight_id'], flight)
+        return flights
     
-    def get_delayed_flights(self):
-        """Get all delayed flights"""
-        response = self.flights_table.scan(
-            FilterExpression=Key('status').eq('Delayed')
+    def update_flight_status(self, flight_id, status, delay_minutes=None, delay_reason=None,
+                             actual_departure=None, actual_arrival=None):
+        """
+        Update a flight's status and delay details
+        
+        The cached copy of the flight is invalidated before the write and replaced
+        with the updated item afterwards. The flight part of the materialized
+        handoff contexts is replaced too, and a flight that turns Delayed has
+        the contexts of its whole manifest materialized.
+        
+        Args:
+            flight_id: The unique identifier for the flight
+            status: New flight status (e.g. Delayed, On Time, Cancelled)
+            delay_minutes: Optional new delay in minutes
+            delay_reason: Optional new delay reason
+            actual_departure: Optional new expected departure time
+            actual_arrival: Optional new expected arrival time
+        
+        Returns:
+            The updated flight item
+        """
+        update_expression = "SET #status = :status"
+        expression_names = {'#status': 'status'}
+        expression_values = {':status': status}
+        
+        for attribute, value in (('delay_minutes', delay_minutes),
+                                 ('delay_reason', delay_reason),
+                                 ('actual_departure', actual_departure),
+                                 ('actual_arrival', actual_arrival)):
+            if value is not None:
+                update_expression += f", {attribute} = :{attribute}"
+                expression_values[f':{attribute}'] = value
+        
+        self.flight_cache.invalidate(flight_id)
+        response = self.flights_table.update_item(
+            Key={'flight_id': flight_id},
+            UpdateExpression=update_expression,
+            ConditionExpression='attribute_exists(flight_id)',
+            ExpressionAttributeNames=expression_names,
+            ExpressionAttributeValues=expression_values,
+            ReturnValues='ALL_NEW'
         )
-        return response.get('Items', [])
+        
+        flight = response['Attributes']
+        self.flight_cache.put(flight_id, flight)
+        self.handoff_contexts.put_flight(flight)
+        if status == 'Delayed' and not self.handoff_contexts.has_manifest(flight_id):
+            self.materialize_handoff_contexts(flight_id, flight)
+        return flight
     
-    def get_passengers_for_flight(self, flight_id):
+    def invalidate_flight(self, flight_id):
+        """Drop a flight from the cache after it was changed outside this service"""
+        self.flight_cache.invalidate(flight_id)
+        self.handoff_contexts.invalidate_flight(flight_id)
+    
+    def iter_passengers_for_flight(self, flight_id, projection=None, page_size=None):
+        """
+        Yield the passengers of a flight one at a time, page by page
+        
+        Follows LastEvaluatedKey so manifests larger than one 1 MB page are read in
+        full, while only one page is held in memory at a time.
+        
+        Args:
+            flight_id: The unique identifier for the flight
+            projection: Optional list of attribute names to return
+            page_size: Optional number of items to request per page
+        """
+        query_args = {
+            'IndexName': 'FlightIndex',
+            'KeyConditionExpression': Key('flight_id').eq(flight_id)
+        }
+        
+        if projection:
+            # Placeholders avoid clashes with reserved words such as name and status
+            names = {f'#p{i}': attribute for i, attribute in enumerate(projection)}
+            query_args['ProjectionExpression'] = ", ".join(names)
+            query_args['ExpressionAttributeNames'] = names
+        
+        if page_size:
+            query_args['Limit'] = page_size
+        
+        return self._paginate(self.passengers_table.query, **query_args)
+    
+    def get_passengers_for_flight(self, flight_id, projection=None):
         """Get all passengers for a specific flight"""
-        response = self.passengers_table.query(
-            IndexName='FlightIndex',
-            KeyConditionExpression=Key('flight_id').eq(flight_id)
-        )
-        return response.get('Items', [])
+        return list(self.iter_passengers_for_flight(flight_id, projection=projection))
+    
+    def list_passengers(self, limit, projection=None):
+        """
+        Get up to limit passengers from the start of the table
+        
+        Reads only as many pages as needed, so the cost depends on limit
+        rather than on the size of the table.
+        
+        Args:
+            limit: Maximum number of passengers to return
+            projection: Optional list of attribute names to return
+        """
+        scan_args = {'Limit': limit}
+        if projection:
+            names = {f'#p{i}': attribute for i, attribute in enumerate(projection)}
+            scan_args['ProjectionExpression'] = ", ".join(names)
+            scan_args['ExpressionAttributeNames'] = names
+        
+        passengers = []
+        for passenger in self._paginate(self.passengers_table.scan, **scan_args):
+            passengers.append(passenger)
+            if len(passengers) >= limit:
+                break
+        return passengers
     
     def get_passenger(self, passenger_id):
         """Get passenger details by passenger ID"""
@@ -41,92 +290,731 @@ class DynamoDBService:
         )
         return response.get('Item')
     
-    def update_passenger_rebooking(self, passenger_id, new_flight_id, new_seat=None):
-        """Update passenger's flight after rebooking"""
-        # Get current flight info to keep history
-        passenger = self.get_passenger(passenger_id)
+    def _batch_get(self, request_items):
+        """
+        Run BatchGetItem, retrying unprocessed keys with exponential backoff
+        
+        Args:
+            request_items: RequestItems mapping of table name to {'Keys': [...]}
+        
+        Returns:
+            Mapping of table name to the list of items found
+        """
+        results = {table_name: [] for table_name in request_items}
+        attempt = 0
+        while request_items:
+            response = self.dynamodb.batch_get_item(RequestItems=request_items)
+            for table_name, items in response.get('Responses', {}).items():
+                results[table_name].extend(items)
+            
+            request_items = response.get('UnprocessedKeys') or {}
+            if request_items:
+                attempt += 1
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        
+        return results
+    
+    def batch_get_flights(self, flight_ids):
+        """Get several flights with batched reads, keyed by flight ID"""
+        flight_ids = list(dict.fromkeys(fid for fid in flight_ids if fid))
+        flights, missing = self.flight_cache.get_many(flight_ids)
+        table_name = self.flights_table.name
+        
+        for start in range(0, len(missing), BATCH_GET_LIMIT):
+            keys = [{'flight_id': fid} for fid in missing[start:start + BATCH_GET_LIMIT]]
+            for item in self._batch_get({table_name: {'Keys': keys}})[table_name]:
+                flights[item['flight_id']] = item
+                self.flight_cache.put(item['flight_id'], item)
+        
+        return flights
+    
+    def get_passenger_with_flight(self, passenger_id, flight_id=None, include_rebooking_flights=False):
+        """
+        Get a passenger together with their flight
+        
+        When the passenger's flight ID is known, from the caller or from the
+        materialized handoff contexts, the passenger and flight are read in a
+        single BatchGetItem round trip, or just the passenger if the flight is
+        cached. Only without any hint is the flight read (through the cache)
+        after the passenger. Rebooking-option flights are fetched in one more
+        batched read when requested.
+        
+        Args:
+            passenger_id: The unique identifier for the passenger
+            flight_id: Optional expected flight ID of the passenger
+            include_rebooking_flights: Also fetch the flights listed in rebooking_options
+        
+        Returns:
+            Dict with 'passenger', 'flight' (and 'rebooking_flights'), or None if the
+            passenger does not exist
+        """
+        passenger = None
+        flight = None
+        
+        flight_id = flight_id or self.handoff_contexts.passenger_flight(passenger_id)
+        if flight_id:
+            flight = self.flight_cache.get(flight_id)
+        
+        if flight_id and flight is None:
+            passengers_name = self.passengers_table.name
+            flights_name = self.flights_table.name
+            results = self._batch_get({
+                passengers_name: {'Keys': [{'passenger_id': passenger_id}]},
+                flights_name: {'Keys': [{'flight_id': flight_id}]}
+            })
+            passenger = next(iter(results[passengers_name]), None)
+            flight = next(iter(results[flights_name]), None)
+            self.flight_cache.put(flight_id, flight)
+        else:
+            passenger = self.get_passenger(passenger_id)
+        
         if not passenger:
-            return False
+            return None
+        # Also remembers the passenger's flight, the hint for their next read
+        self.handoff_contexts.put_passenger(passenger)
+        
+        # The hint was stale (e.g. the passenger was rebooked) or missing
+        if not flight or flight.get('flight_id') != passenger.get('flight_id'):
+            flight = self.get_flight(passenger.get('flight_id'))
+        
+        record = {
+            'passenger': passenger,
+            'flight': flight
+        }
         
-        old_flight_id = passenger.get('flight_id')
+        if include_rebooking_flights:
+            option_ids = [option.get('flight_id') for option in (flight or {}).get('rebooking_options', [])]
+            record['rebooking_flights'] = self.batch_get_flights(option_ids)
         
-        # Update passenger record
-        update_expression = "SET flight_id = :new_flight_id"
+        return record
+    
+    @staticmethod
+    def _rebooking_update(expected_flight_id, new_flight_id, new_seat=None):
+        """Build the UpdateExpression and values that move a passenger and record the history"""
+        update_expression = "SET flight_id = :new_flight_id, " \
+                            "rebooking_history = list_append(if_not_exists(rebooking_history, :empty_list), :history)"
         expression_values = {
-            ':new_flight_id': new_flight_id
+            ':new_flight_id': new_flight_id,
+            ':expected_flight_id': expected_flight_id,
+            ':empty_list': [],
+            ':history': [{
+                'timestamp': datetime.now().isoformat(),
+                'old_flight_id': expected_flight_id,
+                'new_flight_id': new_flight_id
+            }]
         }
         
         if new_seat:
             update_expression += ", seat = :new_seat"
             expression_values[':new_seat'] = new_seat
         
-        # Add rebooking history
-        if 'rebooking_history' not in passenger:
-            update_expression += ", rebooking_history = :history"
-            expression_values[':history'] = [{
-                'timestamp': datetime.now().isoformat(),
-                'old_flight_id': old_flight_id,
-                'new_flight_id': new_flight_id
-            }]
-        else:
-            update_expression += ", rebooking_history = list_append(rebooking_history, :history)"
-            expression_values[':history'] = [{
-                'timestamp': datetime.now().isoformat(),
-                'old_flight_id': old_flight_id,
-                'new_flight_id': new_flight_id
-            }]
+        return update_expression, expression_values
+    
+    def update_passenger_rebooking(self, passenger_id, new_flight_id, new_seat=None, expected_flight_id=None):
+        """
+        Move a passenger to a new flight in a single conditional write
         
-        self.passengers_table.update_item(
-            Key={'passenger_id': passenger_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values
+        The write only succeeds while the passenger is still booked on
+        expected_flight_id, so two concurrent rebookings cannot both win,
+        and never when new_flight_id is the flight they are already on.
+        
+        Args:
+            passenger_id: Passenger to rebook
+            new_flight_id: Flight ID of the new booking
+            new_seat: Optional new seat
+            expected_flight_id: Flight the caller believes the passenger is on;
+                if omitted it is read from the passenger item first
+        
+        Returns:
+            The updated passenger item, or None if the passenger does not exist
+        
+        Raises:
+            RebookingConflictError: The passenger's flight changed since it was read,
+                or they are already booked on new_flight_id
+        """
+        if expected_flight_id is None:
+            passenger = self.get_passenger(passenger_id)
+            if not passenger:
+                return None
+            expected_flight_id = passenger.get('flight_id')
+        
+        update_expression, expression_values = self._rebooking_update(
+            expected_flight_id, new_flight_id, new_seat
         )
         
-        return True
+        try:
+            response = self.passengers_table.update_item(
+                Key={'passenger_id': passenger_id},
+                UpdateExpression=update_expression,
+                ConditionExpression=REBOOKING_CONDITION,
+                ExpressionAttributeValues=expression_values,
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            current = e.response.get('Item')
+            if not current:
+                return None
+            current_flight_id = _deserialize_item(current).get('flight_id')
+            raise RebookingConflictError(passenger_id, expected_flight_id, current_flight_id) from e
+        
+        passenger = response['Attributes']
+        self.handoff_contexts.put_passenger(passenger)
+        return passenger
     
     def get_rebooking_options(self, flight_id):
-        """Get rebooking options for a delayed flight"""
+        """Get rebooking options for a delayed flight with their live seat counts"""
         flight = self.get_flight(flight_id)
         if not flight:
             return []
         
-        return flight.get('rebooking_options', [])
+        options = flight.get('rebooking_options', [])
+        availability = self.get_seat_availability([option.get('flight_id') for option in options])
+        # Copy the options; cached flight items are shared and read-only
+        return [
+            dict(option, seats_available=availability.get(option.get('flight_id')))
+            for option in options
+        ]
     
-    def generate_handoff_context(self, passenger_id):
-        """Generate handoff context for call center agents"""
-        passenger = self.get_passenger(passenger_id)
-        if not passenger:
-            return {}
+    @staticmethod
+    def _is_condition_failure(error):
+        return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+    
+    def get_seat_availability(self, flight_ids):
+        """
+        Get the live number of open seats on rebooking flights
+        
+        Seats held by expired reservations are counted as open and are
+        returned to the inventory by this call.
+        
+        Args:
+            flight_ids: Flight IDs to look up
+        
+        Returns:
+            Dict of flight ID to open seats; flights without inventory are omitted
+        """
+        flight_ids = list(dict.fromkeys(fid for fid in flight_ids if fid))
+        table_name = self.seat_inventory_table.name
+        availability = {}
+        now = time.time()
+        
+        for start in range(0, len(flight_ids), BATCH_GET_LIMIT):
+            keys = [{'flight_id': fid} for fid in flight_ids[start:start + BATCH_GET_LIMIT]]
+            request = {table_name: {'Keys': keys, 'ConsistentRead': True}}
+            for item in self._batch_get(request)[table_name]:
+                expired = [
+                    passenger_id for passenger_id, hold in item.get('holds', {}).items()
+                    if hold['expires_at'] <= now
+                ]
+                availability[item['flight_id']] = int(item['seats_available']) + len(expired)
+                if expired:
+                    self.expire_holds(item['flight_id'], item)
+        
+        return availability
+    
+    def hold_seat(self, flight_id, passenger_id, ttl=SEAT_HOLD_TTL):
+        """
+        Reserve one seat on a rebooking flight for a passenger
+        
+        The seat count is decremented in the same conditional write that
+        records the hold, so the flight can never be oversold. A passenger
+        who already holds a seat on the flight has the hold renewed instead.
+        
+        Args:
+            flight_id: Rebooking flight ID
+            passenger_id: Passenger the seat is held for
+            ttl: Seconds until the hold expires
+        
+        Returns:
+            Hold dict, or None if the flight has no seat inventory
+        
+        Raises:
+            SeatUnavailableError: Every seat on the flight is sold or held
+        """
+        for attempt in range(3):
+            expires_at = int(time.time() + ttl)
+            hold = {'flight_id': flight_id, 'passenger_id': passenger_id, 'expires_at': expires_at}
+            try:
+                self.seat_inventory_table.update_item(
+                    Key={'flight_id': flight_id},
+                    UpdateExpression="SET seats_available = seats_available - :one, holds.#passenger = :hold",
+                    ConditionExpression="attribute_exists(flight_id) AND seats_available >= :one "
+                                        "AND attribute_not_exists(holds.#passenger)",
+                    ExpressionAttributeNames={'#passenger': passenger_id},
+                    ExpressionAttributeValues={':one': 1, ':hold': {'expires_at': expires_at}},
+                    ReturnValuesOnConditionCheckFailure='ALL_OLD'
+                )
+                return hold
+            except ClientError as e:
+                if not self._is_condition_failure(e):
+                    raise
+                current = _deserialize_item(e.response.get('Item'))
+            
+            if not current:
+                return None
+            if passenger_id not in current.get('holds', {}):
+                raise SeatUnavailableError(flight_id)
+            
+            # Renew the passenger's hold; the seat is already counted against it
+            try:
+                self.seat_inventory_table.update_item(
+                    Key={'flight_id': flight_id},
+                    UpdateExpression="SET holds.#passenger.expires_at = :expires_at",
+                    ConditionExpression="attribute_exists(holds.#passenger)",
+                    ExpressionAttributeNames={'#passenger': passenger_id},
+                    ExpressionAttributeValues={':expires_at': expires_at}
+                )
+                return hold
+            except ClientError as e:
+                # The hold expired and was released meanwhile; take a fresh one
+                if not self._is_condition_failure(e):
+                    raise
+        
+        raise SeatUnavailableError(flight_id)
+    
+    def confirm_hold(self, flight_id, passenger_id):
+        """Turn a passenger's hold into a sold seat; returns False if the hold is gone"""
+        try:
+            self.seat_inventory_table.update_item(
+                Key={'flight_id': flight_id},
+                UpdateExpression="SET seats_sold = if_not_exists(seats_sold, :zero) + :one "
+                                 "REMOVE holds.#passenger",
+                ConditionExpression="attribute_exists(holds.#passenger)",
+                ExpressionAttributeNames={'#passenger': passenger_id},
+                ExpressionAttributeValues={':zero': 0, ':one': 1}
+            )
+            return True
+        except ClientError as e:
+            if not self._is_condition_failure(e):
+                raise
+            return False
+    
+    def release_hold(self, flight_id, passenger_id, expires_at=None):
+        """
+        Give a held seat back to the inventory
+        
+        Args:
+            flight_id: Rebooking flight ID
+            passenger_id: Passenger holding the seat
+            expires_at: Only release the hold if it still has this expiry (used by expiry)
+        
+        Returns:
+            True if a hold was released
+        """
+        condition = "attribute_exists(holds.#passenger)"
+        values = {':one': 1}
+        if expires_at is not None:
+            condition += " AND holds.#passenger.expires_at = :expires_at"
+            values[':expires_at'] = expires_at
+        try:
+            self.seat_inventory_table.update_item(
+                Key={'flight_id': flight_id},
+                UpdateExpression="SET seats_available = seats_available + :one REMOVE holds.#passenger",
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#passenger': passenger_id},
+                ExpressionAttributeValues=values
+            )
+            return True
+        except ClientError as e:
+            if not self._is_condition_failure(e):
+                raise
+            return False
+    
+    def release_seat(self, flight_id):
+        """Return a sold seat to the inventory when a passenger leaves a rebooking flight"""
+        try:
+            self.seat_inventory_table.update_item(
+                Key={'flight_id': flight_id},
+                UpdateExpression="SET seats_available = seats_available + :one, seats_sold = seats_sold - :one",
+                ConditionExpression="attribute_exists(flight_id) AND seats_sold >= :one",
+                ExpressionAttributeValues={':one': 1}
+            )
+            return True
+        except ClientError as e:
+            if not self._is_condition_failure(e):
+                raise
+            return False
+    
+    def expire_holds(self, flight_id, item=None):
+        """
+        Release every expired hold on a flight
+        
+        Args:
+            flight_id: Rebooking flight ID
+            item: Optional inventory item already read by the caller
+        
+        Returns:
+            Number of holds released
+        """
+        if item is None:
+            item = self.seat_inventory_table.get_item(
+                Key={'flight_id': flight_id}, ConsistentRead=True
+            ).get('Item') or {}
+        
+        now = time.time()
+        released = 0
+        for passenger_id, hold in item.get('holds', {}).items():
+            # The expiry condition skips holds renewed or confirmed since the read
+            if hold['expires_at'] <= now and self.release_hold(flight_id, passenger_id, hold['expires_at']):
+                released += 1
+        return released
+    
+    @staticmethod
+    def _tier_rank(passenger):
+        """Get the re-accommodation rank of a passenger's loyalty tier (lower goes first)"""
+        tier = passenger.get('loyalty_tier')
+        return LOYALTY_TIER_ORDER.index(tier) if tier in LOYALTY_TIER_ORDER else len(LOYALTY_TIER_ORDER)
+    
+    @classmethod
+    def _rank_parties(cls, passengers):
+        """
+        Group passengers into travel parties in re-accommodation order
+        
+        Passengers sharing a booking_ref (or group_id) form one party, tagged
+        with a 'group' for _fit_parties. Parties are ordered by the best
+        loyalty tier among their members, so a family travels together at
+        the rank of its highest-tier member.
+        
+        Returns:
+            List of parties, each a list of passenger items
+        """
+        parties = {}
+        for passenger in sorted(passengers, key=lambda p: (cls._tier_rank(p), p['passenger_id'])):
+            passenger['group'] = passenger.get('booking_ref') or passenger.get('group_id') or passenger['passenger_id']
+            parties.setdefault(passenger['group'], []).append(passenger)
+        return list(parties.values())
+    
+    @staticmethod
+    def _fit_parties(passengers, seats):
+        """
+        Split passengers into the leading whole parties that fit in seats and the rest
+        
+        Passengers of one party share a 'group' and are listed next to each
+        other; passengers without one are parties of their own.
+        """
+        kept = []
+        left_out = []
+        for _, party in groupby(passengers, key=lambda p: p.get('group') or p['passenger_id']):
+            party = list(party)
+            if not left_out and len(kept) + len(party) <= seats:
+                kept.extend(party)
+            else:
+                left_out.extend(party)
+        return kept, left_out
+    
+    def _commit_rebooking_chunk(self, flight_id, new_flight_id, passengers, max_attempts):
+        """
+        Move a chunk of passengers to one rebooking flight in a single transaction
+        
+        The seat count of the new flight is decremented for the whole chunk
+        and every passenger is conditioned on still being on flight_id.
+        Passengers whose booking changed are dropped and the rest retried;
+        if the flight ran out of seats, the chunk is cut to the leading whole
+        parties (passengers sharing a 'group', listed next to each other)
+        that fit in the seats left, so a family is never split by the cut.
+        A party member whose own booking changed is still dropped alone.
+        
+        Returns:
+            Tuple of (rebooked, conflicts, without_seat, retries) where the
+            first three are lists of passenger items
+        """
+        client = self.dynamodb.meta.client
+        conflicts = []
+        without_seat = []
+        retries = 0
+        attempt = 0
+        
+        while passengers:
+            actions = [{
+                'Update': {
+                    'TableName': self.seat_inventory_table.name,
+                    'Key': {'flight_id': new_flight_id},
+                    'UpdateExpression': "SET seats_available = seats_available - :count, "
+                                        "seats_sold = if_not_exists(seats_sold, :zero) + :count",
+                    'ConditionExpression': "seats_available >= :count",
+                    'ExpressionAttributeValues': {':count': len(passengers), ':zero': 0}
+                }
+            }]
+            for passenger in passengers:
+                update_expression, expression_values = self._rebooking_update(flight_id, new_flight_id)
+                actions.append({
+                    'Update': {
+                        'TableName': self.passengers_table.name,
+                        'Key': {'passenger_id': passenger['passenger_id']},
+                        'UpdateExpression': update_expression,
+                        'ConditionExpression': REBOOKING_CONDITION,
+                        'ExpressionAttributeValues': expression_values
+                    }
+                })
+            
+            try:
+                client.transact_write_items(TransactItems=actions)
+                for passenger in passengers:
+                    # Their flight and rebooking history changed
+                    self.handoff_contexts.invalidate_passenger(passenger['passenger_id'])
+                return passengers, conflicts, without_seat, retries
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons') or []]
+                if code == 'TransactionCanceledException' and 'ConditionalCheckFailed' in reasons:
+                    passenger_reasons = reasons[1:]
+                    conflicts.extend(
+                        p for p, reason in zip(passengers, passenger_reasons) if reason == 'ConditionalCheckFailed'
+                    )
+                    passengers = [
+                        p for p, reason in zip(passengers, passenger_reasons) if reason != 'ConditionalCheckFailed'
+                    ]
+                    if reasons[0] == 'ConditionalCheckFailed':
+                        # Seats were taken elsewhere; the lowest-priority passengers miss out
+                        item = client.get_item(
+                            TableName=self.seat_inventory_table.name,
+                            Key={'flight_id': new_flight_id},
+                            ConsistentRead=True
+                        ).get('Item') or {}
+                        seats = max(0, int(item.get('seats_available', 0)))
+                        passengers, left_out = self._fit_parties(passengers, seats)
+                        without_seat.extend(left_out)
+                    continue
+                
+                if code not in RETRYABLE_TRANSACTION_CODES and code != 'TransactionCanceledException':
+                    raise
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise
+                retries += 1
+                time.sleep(min(0.05 * (2 ** attempt), 2.0) * (0.5 + random.random() / 2))
+        
+        return [], conflicts, without_seat, retries
+    
+    def reaccommodate_flight(self, flight_id, chunk_size=50, max_attempts=8):
+        """
+        Move every passenger on a cancelled flight to its rebooking options
+        
+        Passengers are grouped into travel parties by booking, ordered by
+        loyalty tier and filled into the options in listed order, within each
+        option's live seat inventory. A party always lands on one flight and
+        is left unaccommodated if no option has room for all of it. Each
+        chunk of whole parties is committed together with its seat decrement
+        in one TransactWriteItems call, highest tier first, so a seat lost to
+        a concurrent rebooking always costs the lowest-priority passengers.
+        
+        Args:
+            flight_id: The cancelled flight
+            chunk_size: Passengers per transaction (at most 99)
+            max_attempts: Attempts per transaction on throttling or conflicts
+        
+        Returns:
+            Report dict with rebooked, conflict and unaccommodated counts
+        """
+        started = time.monotonic()
+        chunk_size = max(1, min(chunk_size, TRANSACT_WRITE_LIMIT - 1))
+        report = {
+            'flight_id': flight_id,
+            'passengers': 0,
+            'rebooked': 0,
+            'by_flight': {},
+            'by_tier': {},
+            'conflicts': [],
+            'unaccommodated': [],
+            'transactions': 0,
+            'retries': 0
+        }
+        
+        def count_tier(passenger, key):
+            tier = report['by_tier'].setdefault(
+                passenger.get('loyalty_tier') or 'None', {'rebooked': 0, 'unaccommodated': 0}
+            )
+            tier[key] += 1
         
-        flight_id = passenger.get('flight_id')
         flight = self.get_flight(flight_id)
         if not flight:
-            return {}
+            report['seconds'] = time.monotonic() - started
+            return report
+        
+        option_ids = [option['flight_id'] for option in flight.get('rebooking_options', []) if option.get('flight_id')]
+        passengers = self.get_passengers_for_flight(
+            flight_id, projection=['passenger_id', 'name', 'loyalty_tier', 'flight_id', 'booking_ref', 'group_id']
+        )
+        pending = deque(self._rank_parties(passengers))
+        report['passengers'] = len(passengers)
+        remaining = self.get_seat_availability(option_ids)
+        unaccommodated = []
+        
+        while pending:
+            if not any(remaining.get(fid, 0) > 0 for fid in option_ids):
+                break
+            new_flight_id = next((fid for fid in option_ids if remaining.get(fid, 0) >= len(pending[0])), None)
+            if new_flight_id is None:
+                # No option has room for the whole party; smaller parties may still fit
+                unaccommodated.extend(pending.popleft())
+                continue
+            
+            chunk = []
+            while pending and len(chunk) + len(pending[0]) <= min(chunk_size, remaining[new_flight_id]):
+                chunk.extend(pending.popleft())
+            if not chunk:
+                # A party larger than chunk_size goes in a transaction of its own
+                chunk = pending.popleft()
+            rebooked, conflicts, without_seat, retries = self._commit_rebooking_chunk(
+                flight_id, new_flight_id, chunk, max_attempts
+            )
+            
+            remaining[new_flight_id] -= len(rebooked)
+            if without_seat:
+                # The flight filled up elsewhere; these parties try the next option first
+                remaining[new_flight_id] = 0
+                parties = [list(party) for _, party in groupby(without_seat, key=lambda p: p['group'])]
+                pending.extendleft(reversed(parties))
+            
+            report['rebooked'] += len(rebooked)
+            report['by_flight'][new_flight_id] = report['by_flight'].get(new_flight_id, 0) + len(rebooked)
+            report['conflicts'].extend(p['passenger_id'] for p in conflicts)
+            report['transactions'] += 1 + retries
+            report['retries'] += retries
+            for passenger in rebooked:
+                count_tier(passenger, 'rebooked')
+        
+        for party in pending:
+            unaccommodated.extend(party)
+        for passenger in unaccommodated:
+            report['unaccommodated'].append(passenger['passenger_id'])
+            count_tier(passenger, 'unaccommodated')
+        
+        report['seconds'] = time.monotonic() - started
+        return report
+    
+    def apply_rebooking_plan(self, flight_id, assignments, chunk_size=50, max_attempts=8):
+        """
+        Commit a rebooking plan built by the rebooking solver
         
-        # Create handoff context with all relevant information
-        handoff_context = {
-            'passenger': {
-                'id': passenger.get('passenger_id'),
-                'name': passenger.get('name'),
-                'loyalty_tier': passenger.get('loyalty_tier'),
-                'seat': passenger.get('seat')
-            },
-            'flight': {
-                'id': flight.get('flight_id'),
-                'number': flight.get('flight_number'),
-                'airline': flight.get('airline'),
-                'origin': flight.get('origin'),
-                'destination': flight.get('destination'),
-                'scheduled_departure': flight.get('scheduled_departure'),
-                'scheduled_arrival': flight.get('scheduled_arrival'),
-                'status': flight.get('status'),
-                'delay_minutes': flight.get('delay_minutes'),
-                'delay_reason': flight.get('delay_reason'),
-                'gate': flight.get('gate'),
-                'terminal': flight.get('terminal')
-            },
-            'rebooking_history': passenger.get('rebooking_history', []),
-            'timestamp': datetime.now().isoformat()
+        Assignments are grouped by new flight and committed in transactions
+        of whole travel parties, each with its seat decrement. Passengers
+        whose booking changed since the plan was built are reported as
+        conflicts, and those that no longer fit because seats were sold in
+        the meantime as unaccommodated.
+        
+        Args:
+            flight_id: The displaced flight
+            assignments: The plan's assignment dicts (passenger_id, group, new_flight_id)
+            chunk_size: Passengers per transaction (at most 99)
+            max_attempts: Attempts per transaction on throttling or conflicts
+        
+        Returns:
+            Report dict in the same shape as reaccommodate_flight's
+        """
+        started = time.monotonic()
+        chunk_size = max(1, min(chunk_size, TRANSACT_WRITE_LIMIT - 1))
+        report = {
+            'flight_id': flight_id,
+            'passengers': len(assignments),
+            'rebooked': 0,
+            'by_flight': {},
+            'conflicts': [],
+            'unaccommodated': [],
+            'transactions': 0,
+            'retries': 0
+        }
+        
+        by_flight = {}
+        for assignment in assignments:
+            if assignment.get('new_flight_id'):
+                by_flight.setdefault(assignment['new_flight_id'], []).append(assignment)
+            else:
+                report['unaccommodated'].append(assignment['passenger_id'])
+        
+        for new_flight_id, planned in by_flight.items():
+            # Cut chunks on party boundaries so a family is committed together
+            chunks = [[]]
+            for assignment in planned:
+                chunk = chunks[-1]
+                new_party = not chunk or chunk[-1].get('group') != assignment.get('group')
+                if len(chunk) >= TRANSACT_WRITE_LIMIT - 1 or (new_party and len(chunk) >= chunk_size):
+                    chunks.append([])
+                chunks[-1].append(assignment)
+            
+            for chunk in chunks:
+                rebooked, conflicts, without_seat, retries = self._commit_rebooking_chunk(
+                    flight_id, new_flight_id, chunk, max_attempts
+                )
+                report['rebooked'] += len(rebooked)
+                report['by_flight'][new_flight_id] = report['by_flight'].get(new_flight_id, 0) + len(rebooked)
+                report['conflicts'].extend(a['passenger_id'] for a in conflicts)
+                report['unaccommodated'].extend(a['passenger_id'] for a in without_seat)
+                report['transactions'] += 1 + retries
+                report['retries'] += retries
+        
+        report['seconds'] = time.monotonic() - started
+        return report
+    
+    def materialize_handoff_contexts(self, flight_id, flight=None, page_size=500):
+        """
+        Precompute the handoff context of every passenger on a flight
+        
+        Args:
+            flight_id: The unique identifier for the flight
+            flight: Optional flight item, if the caller already has it
+            page_size: Manifest page size requested from DynamoDB
+        
+        Returns:
+            Number of passenger contexts stored
+        """
+        flight = flight or self.get_flight(flight_id)
+        if not flight:
+            return 0
+        
+        self.handoff_contexts.put_flight(flight)
+        count = self.handoff_contexts.put_passengers(self.iter_passengers_for_flight(
+            flight_id, projection=HANDOFF_PASSENGER_PROJECTION, page_size=page_size
+        ))
+        self.handoff_contexts.mark_manifest(flight_id, count)
+        return count
+    
+    def materialize_delayed_flights(self, departure_date=None):
+        """
+        Precompute handoff contexts for every delayed flight not materialized yet
+        
+        Flights whose manifest mark expired or lost a passenger part to
+        eviction are materialized again.
+        
+        Returns:
+            Dict of flight ID to number of passenger contexts stored
+        """
+        return {
+            flight['flight_id']: self.materialize_handoff_contexts(flight['flight_id'], flight)
+            for flight in self.get_delayed_flights(departure_date=departure_date)
+            if not self.handoff_contexts.has_manifest(flight['flight_id'])
         }
+    
+    def generate_handoff_context(self, passenger_id, flight_id=None):
+        """
+        Generate handoff context for call center agents
+        
+        Served from the materialized contexts when possible. An expired flight
+        part costs one (cached) flight read; otherwise the passenger and
+        flight are read, in one round trip when the flight ID is known, and
+        stored for the next request.
+        
+        Args:
+            passenger_id: The unique identifier for the passenger
+            flight_id: Optional flight ID the passenger is expected to be on
+        """
+        handoff_context = self.handoff_contexts.get(passenger_id)
+        if handoff_context:
+            return handoff_context
+        
+        stored_flight_id = self.handoff_contexts.passenger_flight(passenger_id)
+        if stored_flight_id:
+            self.handoff_contexts.put_flight(self.get_flight(stored_flight_id))
+            handoff_context = self.handoff_contexts.get(passenger_id)
+            if handoff_context:
+                return handoff_context
+        
+        record = self.get_passenger_with_flight(passenger_id, flight_id=flight_id)
+        if not record or not record['flight']:
+            return {}
         
-        return handoff_context
+        self.handoff_contexts.put_flight(record['flight'])
+        self.handoff_contexts.put_passenger(record['passenger'])
+        return self.handoff_contexts.get(passenger_id) or {}
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class FlightCache:
+    """Bounded in-process LRU cache of flight items with a TTL
+
+    Flights are read far more often than they change, so DynamoDBService reads
+    through this cache and refreshes or invalidates entries whenever it writes
+    a flight. Cached items are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_size=10000, ttl=30.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of flights kept in memory
+            ttl: Seconds an entry stays valid after it was stored
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, flight_id, now):
+        """Get a live entry and mark it recently used (caller holds the lock)"""
+        entry = self._items.get(flight_id)
+        if entry is None:
+            return None
+        item, expires_at = entry
+        if expires_at <= now:
+            del self._items[flight_id]
+            return None
+        self._items.move_to_end(flight_id)
+        return item
+
+    def get(self, flight_id):
+        """Get a cached flight, or None on a miss"""
+        with self._lock:
+            item = self._lookup(flight_id, time.monotonic())
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return item
+
+    def get_many(self, flight_ids):
+        """
+        Get several cached flights
+
+        Returns:
+            Tuple of (dict of cached flights keyed by ID, list of missing IDs)
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            now = time.monotonic()
+            for flight_id in flight_ids:
+                item = self._lookup(flight_id, now)
+                if item is None:
+                    missing.append(flight_id)
+                else:
+                    found[flight_id] = item
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, flight_id, item):
+        """Store a flight, evicting the least recently used entries beyond max_size"""
+        if not flight_id or item is None:
+            return
+        with self._lock:
+            self._items[flight_id] = (item, time.monotonic() + self.ttl)
+            self._items.move_to_end(flight_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, flight_id):
+        """Drop a flight so the next read goes to DynamoDB"""
+        with self._lock:
+            if self._items.pop(flight_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached flight"""
+        with self._lock:
+            self.invalidations += len(self._items)
+            self._items.clear()
+
+    def stats(self):
+        """Get the size and hit/miss counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_flight_cache():
+    """Get the process-wide flight cache shared by the agent tools and the web app"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = FlightCache()
+        return _shared_cache
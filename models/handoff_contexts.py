@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Passenger attributes a handoff context is built from
+HANDOFF_PASSENGER_PROJECTION = ['passenger_id', 'name', 'loyalty_tier', 'seat', 'flight_id', 'rebooking_history']
+
+
+def flight_context(flight):
+    """Build the flight part of a handoff context"""
+    return {
+        'id': flight.get('flight_id'),
+        'number': flight.get('flight_number'),
+        'airline': flight.get('airline'),
+        'origin': flight.get('origin'),
+        'destination': flight.get('destination'),
+        'scheduled_departure': flight.get('scheduled_departure'),
+        'scheduled_arrival': flight.get('scheduled_arrival'),
+        'status': flight.get('status'),
+        'delay_minutes': flight.get('delay_minutes'),
+        'delay_reason': flight.get('delay_reason'),
+        'gate': flight.get('gate'),
+        'terminal': flight.get('terminal')
+    }
+
+
+def passenger_context(passenger):
+    """Build the passenger part of a handoff context"""
+    return {
+        'id': passenger.get('passenger_id'),
+        'name': passenger.get('name'),
+        'loyalty_tier': passenger.get('loyalty_tier'),
+        'seat': passenger.get('seat')
+    }
+
+
+class HandoffContextStore:
+    """Precomputed handoff contexts, stored as one flight part per flight
+    and one passenger part per passenger
+
+    A context is assembled from two dict lookups, so a flight change only
+    replaces its single flight part and every passenger on the manifest
+    sees it at once. Flight parts expire after flight_ttl seconds so
+    changes made by other processes are picked up, which costs one flight
+    read; passenger parts are LRU bounded and expire after passenger_ttl.
+    A flight's manifest mark expires with its passenger parts and is
+    dropped as soon as one of them is evicted, so the manifest gets
+    materialized again.
+    """
+
+    def __init__(self, max_passengers=100000, flight_ttl=60.0, passenger_ttl=900.0):
+        """
+        Initialize the store
+
+        Args:
+            max_passengers: Maximum number of passenger parts kept in memory
+            flight_ttl: Seconds a flight part is used before it is rebuilt
+            passenger_ttl: Seconds a passenger part is used before it is rebuilt
+        """
+        self.max_passengers = max_passengers
+        self.flight_ttl = flight_ttl
+        self.passenger_ttl = passenger_ttl
+        self._flights = {}
+        # Flight ID -> time its manifest was materialized
+        self._manifests = {}
+        self._passengers = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def put_flight(self, flight):
+        """Store or replace the flight part built from a flight item"""
+        if not flight or not flight.get('flight_id'):
+            return
+        with self._lock:
+            self._flights[flight['flight_id']] = (flight_context(flight), time.monotonic() + self.flight_ttl)
+
+    def mark_manifest(self, flight_id, count=0):
+        """
+        Record that every passenger of a flight has been stored
+
+        Args:
+            flight_id: The unique identifier for the flight
+            count: Number of passengers stored; a manifest larger than the
+                store cannot be held whole and is not marked
+
+        Returns:
+            True if the manifest was marked
+        """
+        if count > self.max_passengers:
+            return False
+        with self._lock:
+            self._manifests[flight_id] = time.monotonic()
+        return True
+
+    def has_manifest(self, flight_id):
+        """Check whether a flight's whole manifest is materialized and not expired"""
+        with self._lock:
+            marked_at = self._manifests.get(flight_id)
+            if marked_at is None:
+                return False
+            if marked_at + self.passenger_ttl <= time.monotonic():
+                # Its passenger parts have expired by now
+                del self._manifests[flight_id]
+                return False
+            return True
+
+    def put_passenger(self, passenger):
+        """Store or replace the passenger part built from a passenger item"""
+        if not passenger or not passenger.get('passenger_id'):
+            return
+        entry = (
+            passenger.get('flight_id'),
+            passenger_context(passenger),
+            passenger.get('rebooking_history', []),
+            time.monotonic() + self.passenger_ttl
+        )
+        with self._lock:
+            self._passengers[passenger['passenger_id']] = entry
+            self._passengers.move_to_end(passenger['passenger_id'])
+            while len(self._passengers) > self.max_passengers:
+                _, evicted = self._passengers.popitem(last=False)
+                self._manifests.pop(evicted[0], None)
+                self.evictions += 1
+
+    def put_passengers(self, passengers):
+        """Store the passenger parts of a whole manifest; returns how many were stored"""
+        count = 0
+        for passenger in passengers:
+            self.put_passenger(passenger)
+            count += 1
+        return count
+
+    def passenger_flight(self, passenger_id):
+        """Get the flight ID of a stored, unexpired passenger part, or None"""
+        with self._lock:
+            entry = self._passengers.get(passenger_id)
+            if entry is None or entry[3] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def get(self, passenger_id):
+        """
+        Get a passenger's handoff context
+
+        Returns:
+            Context dict in the shape of DynamoDBService.generate_handoff_context,
+            or None if either part is missing or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._passengers.get(passenger_id)
+            flight_entry = self._flights.get(entry[0]) if entry else None
+            if entry is None or entry[3] <= now or flight_entry is None or flight_entry[1] <= now:
+                self.misses += 1
+                return None
+            self._passengers.move_to_end(passenger_id)
+            self.hits += 1
+            flight_id, passenger_part, rebooking_history, _ = entry
+            flight_part = flight_entry[0]
+
+        # Parts are shared between contexts, so every caller gets its own copies
+        return {
+            'passenger': dict(passenger_part),
+            'flight': dict(flight_part),
+            'rebooking_history': list(rebooking_history),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def invalidate_passenger(self, passenger_id):
+        """Drop a passenger part after the passenger changed"""
+        with self._lock:
+            entry = self._passengers.pop(passenger_id, None)
+            if entry is not None:
+                self._manifests.pop(entry[0], None)
+
+    def invalidate_flight(self, flight_id):
+        """Drop a flight part; its passengers' contexts are rebuilt on next use"""
+        with self._lock:
+            self._flights.pop(flight_id, None)
+            self._manifests.pop(flight_id, None)
+
+    def clear(self):
+        """Drop every materialized context"""
+        with self._lock:
+            self._flights.clear()
+            self._manifests.clear()
+            self._passengers.clear()
+
+    def stats(self):
+        """Get the size and hit/miss counters of the store"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "flights": len(self._flights),
+                "manifests": len(self._manifests),
+                "passengers": len(self._passengers),
+                "max_passengers": self.max_passengers,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_shared_handoff_contexts():
+    """Get the process-wide handoff context store"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = HandoffContextStore()
+        return _shared_store
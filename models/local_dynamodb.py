@@ -0,0 +1,1655 @@
+import base64
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from types import SimpleNamespace
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, TypeSerializer
+from botocore.exceptions import ClientError
+
+# Request limits, enforced like DynamoDB does
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+TRANSACT_WRITE_LIMIT = 100
+
+# Seconds between checks for writes other processes made to the SQLite file
+SYNC_INTERVAL = 1.0
+
+# Stands for an attribute or document path that is not in the item
+MISSING = object()
+
+_serializer = TypeSerializer()
+_sort_value = itemgetter(0)
+
+
+class LocalClientError(ClientError):
+    """Error raised by the local tables, carrying the DynamoDB error code"""
+
+    code = None
+
+    def __init__(self, message, operation_name, **response):
+        response['Error'] = {'Code': self.code, 'Message': message}
+        super().__init__(response, operation_name)
+
+
+class ConditionalCheckFailedException(LocalClientError):
+    code = 'ConditionalCheckFailedException'
+
+
+class ResourceInUseException(LocalClientError):
+    code = 'ResourceInUseException'
+
+
+class ResourceNotFoundException(LocalClientError):
+    code = 'ResourceNotFoundException'
+
+
+class TransactionCanceledException(LocalClientError):
+    code = 'TransactionCanceledException'
+
+
+class ValidationException(LocalClientError):
+    code = 'ValidationException'
+
+
+# The client.exceptions namespace, for code that catches modeled exceptions
+EXCEPTIONS = SimpleNamespace(
+    ClientError=ClientError,
+    ConditionalCheckFailedException=ConditionalCheckFailedException,
+    ResourceInUseException=ResourceInUseException,
+    ResourceNotFoundException=ResourceNotFoundException,
+    TransactionCanceledException=TransactionCanceledException,
+    ValidationException=ValidationException
+)
+
+
+def _normalize(value):
+    """Convert a value to the form DynamoDB stores and returns (numbers become Decimal)"""
+    if isinstance(value, str) or value is None or isinstance(value, (bool, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {_normalize(item) for item in value}
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    raise TypeError(f"Unsupported type {type(value).__name__} for value {value!r}")
+
+
+def _copy(value):
+    """Copy a stored value so callers cannot change the table through it"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _type_code(value):
+    """Get the DynamoDB type descriptor of a stored value"""
+    if isinstance(value, str):
+        return 'S'
+    if isinstance(value, bool):
+        return 'BOOL'
+    if isinstance(value, Decimal):
+        return 'N'
+    if isinstance(value, bytes):
+        return 'B'
+    if value is None:
+        return 'NULL'
+    if isinstance(value, list):
+        return 'L'
+    if isinstance(value, dict):
+        return 'M'
+    return _type_code(next(iter(value))) + 'S' if value else 'SS'
+
+
+def _dump(value):
+    """Encode a stored value as DynamoDB JSON (binary values in base64)"""
+    code = _type_code(value)
+    if code == 'N':
+        return {'N': str(value)}
+    if code == 'B':
+        return {'B': base64.b64encode(value).decode('ascii')}
+    if code == 'NULL':
+        return {'NULL': True}
+    if code == 'L':
+        return {'L': [_dump(item) for item in value]}
+    if code == 'M':
+        return {'M': {key: _dump(item) for key, item in value.items()}}
+    if code in ('SS', 'NS', 'BS'):
+        return {code: sorted(_dump(item)[code[0]] for item in value)}
+    return {code: value}
+
+
+def _load(encoded):
+    """Decode a value written by _dump"""
+    (code, value), = encoded.items()
+    if code == 'N':
+        return Decimal(value)
+    if code == 'B':
+        return base64.b64decode(value)
+    if code == 'NULL':
+        return None
+    if code == 'L':
+        return [_load(item) for item in value]
+    if code == 'M':
+        return {key: _load(item) for key, item in value.items()}
+    if code in ('SS', 'NS', 'BS'):
+        return {_load({code[0]: item}) for item in value}
+    return value
+
+
+def _wire_item(item):
+    """Convert an item to the low-level format DynamoDB uses in error responses"""
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+_TOKEN = re.compile(r"\s*(?:(#\w+)|(:\w+)|([A-Za-z_]\w*)|(\d+)|(<>|<=|>=|[=<>(),.\[\]+-]))")
+
+COMPARATORS = ('=', '<>', '<', '<=', '>', '>=')
+BOOLEAN_FUNCTIONS = ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains')
+
+
+class _Parser:
+    """Recursive-descent parser for condition, update and projection expressions
+
+    Expressions parse into nested tuples. Paths are tuples of elements:
+    attribute names (placeholders keep their '#'), or ints for list indexes.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if not match:
+                raise ValueError(f"Invalid expression at {expression[position:]!r}")
+            self.tokens.append(match.group(match.lastindex))
+            position = match.end()
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def peek_keyword(self, *keywords):
+        token = self.peek()
+        return token is not None and token.upper() in keywords
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected.upper()):
+            raise ValueError(f"Expected {expected or 'a token'} in expression {self.expression!r}")
+        self.position += 1
+        return token
+
+    def done(self):
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()!r} in expression {self.expression!r}")
+
+    def path(self):
+        token = self.take()
+        if not (token[0] == '#' or token[0].isalpha() or token[0] == '_'):
+            raise ValueError(f"Expected an attribute name, got {token!r} in {self.expression!r}")
+        elements = [token]
+        while self.peek() in ('.', '['):
+            if self.take() == '.':
+                elements.append(self.take())
+            else:
+                elements.append(int(self.take()))
+                self.take(']')
+        return ('path', tuple(elements))
+
+    def operand(self):
+        token = self.peek()
+        if token is not None and token[0] == ':':
+            return ('value', self.take())
+        if token is not None and token.lower() == 'size' and self.peek(1) == '(':
+            self.take()
+            self.take('(')
+            path = self.path()
+            self.take(')')
+            return ('size', path)
+        return self.path()
+
+    def condition(self):
+        node = self.conjunction()
+        while self.peek_keyword('OR'):
+            self.take()
+            node = ('or', node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.peek_keyword('AND'):
+            self.take()
+            node = ('and', node, self.negation())
+        return node
+
+    def negation(self):
+        if self.peek_keyword('NOT'):
+            self.take()
+            return ('not', self.negation())
+        return self.predicate()
+
+    def predicate(self):
+        token = self.peek()
+        if token == '(':
+            self.take()
+            node = self.condition()
+            self.take(')')
+            return node
+        if token is not None and token.lower() in BOOLEAN_FUNCTIONS and self.peek(1) == '(':
+            name = self.take().lower()
+            self.take('(')
+            args = [self.operand()]
+            while self.peek() == ',':
+                self.take()
+                args.append(self.operand())
+            self.take(')')
+            return ('func', name, tuple(args))
+
+        left = self.operand()
+        token = self.take()
+        if token in COMPARATORS:
+            return ('cmp', token, left, self.operand())
+        if token.upper() == 'BETWEEN':
+            low = self.operand()
+            self.take('AND')
+            return ('between', left, low, self.operand())
+        if token.upper() == 'IN':
+            self.take('(')
+            options = [self.operand()]
+            while self.peek() == ',':
+                self.take()
+                options.append(self.operand())
+            self.take(')')
+            return ('in', left, tuple(options))
+        raise ValueError(f"Unexpected {token!r} in expression {self.expression!r}")
+
+    def set_value(self):
+        node = self.set_operand()
+        if self.peek() in ('+', '-'):
+            node = (self.take(), node, self.set_operand())
+        return node
+
+    def set_operand(self):
+        token = self.peek()
+        if token is not None and token.lower() in ('if_not_exists', 'list_append') and self.peek(1) == '(':
+            name = self.take().lower()
+            self.take('(')
+            first = self.path() if name == 'if_not_exists' else self.set_operand()
+            self.take(',')
+            second = self.set_operand()
+            self.take(')')
+            return (name, first, second)
+        return self.operand()
+
+    def update(self):
+        clauses = {'SET': [], 'REMOVE': [], 'ADD': [], 'DELETE': []}
+        while self.peek() is not None:
+            clause = self.take().upper()
+            if clause not in clauses:
+                raise ValueError(f"Unexpected {clause!r} in update expression {self.expression!r}")
+            while True:
+                path = self.path()
+                if clause == 'SET':
+                    self.take('=')
+                    clauses[clause].append((path, self.set_value()))
+                elif clause == 'REMOVE':
+                    clauses[clause].append(path)
+                else:
+                    clauses[clause].append((path, self.operand()))
+                if self.peek() != ',':
+                    break
+                self.take()
+        return clauses
+
+    def projection(self):
+        paths = [self.path()]
+        while self.peek() == ',':
+            self.take()
+            paths.append(self.path())
+        return tuple(paths)
+
+
+@lru_cache(maxsize=1024)
+def _parse(expression, kind):
+    """Parse a condition, update or projection expression (cached by its text)"""
+    parser = _Parser(expression)
+    node = getattr(parser, kind)()
+    parser.done()
+    return node
+
+
+class _Expressions:
+    """The expressions of one request with their name and value placeholders"""
+
+    def __init__(self, operation, names=None, values=None):
+        self.operation = operation
+        self.names = dict(names or {})
+        self.values = {key: _normalize(value) for key, value in (values or {}).items()}
+        self._builder = None
+
+    def parse(self, expression, kind, is_key_condition=False):
+        """Parse an expression string or a boto3 Key/Attr condition"""
+        if expression is None:
+            return None
+        if isinstance(expression, ConditionBase):
+            # One builder per request keeps generated placeholders unique across its expressions
+            self._builder = self._builder or ConditionExpressionBuilder()
+            built = self._builder.build_expression(expression, is_key_condition=is_key_condition)
+            self.names.update(built.attribute_name_placeholders)
+            self.values.update(
+                (key, _normalize(value)) for key, value in built.attribute_value_placeholders.items()
+            )
+            expression = built.condition_expression
+        try:
+            return _parse(expression, kind)
+        except ValueError as e:
+            raise ValidationException(f"Invalid {kind} expression: {e}", self.operation) from e
+
+    def path(self, elements):
+        """Resolve the name placeholders of a parsed path"""
+        resolved = []
+        for element in elements:
+            if isinstance(element, str) and element[0] == '#':
+                if element not in self.names:
+                    raise ValidationException(
+                        f"An expression attribute name used in the document path is not defined; "
+                        f"attribute name: {element}", self.operation
+                    )
+                element = self.names[element]
+            resolved.append(element)
+        return tuple(resolved)
+
+    def value(self, placeholder):
+        if placeholder not in self.values:
+            raise ValidationException(
+                f"An expression attribute value used in expression is not defined; "
+                f"attribute value: {placeholder}", self.operation
+            )
+        return self.values[placeholder]
+
+
+def _get_path(item, elements):
+    """Get the value at a resolved document path, or MISSING"""
+    value = item
+    for element in elements:
+        if isinstance(element, int):
+            if not isinstance(value, list) or element >= len(value):
+                return MISSING
+        elif not isinstance(value, dict) or element not in value:
+            return MISSING
+        value = value[element]
+    return value
+
+
+def _operand(node, item, expressions):
+    kind = node[0]
+    if kind == 'path':
+        return _get_path(item, expressions.path(node[1]))
+    if kind == 'value':
+        return expressions.value(node[1])
+    if kind == 'size':
+        value = _operand(node[1], item, expressions)
+        if isinstance(value, (str, bytes, list, dict, set)):
+            return Decimal(len(value))
+        return MISSING
+    raise ValidationException(f"{kind} cannot be used here", expressions.operation)
+
+
+def _compare(op, left, right):
+    """Compare two values the way DynamoDB does; values of different types never match"""
+    if left is MISSING or right is MISSING:
+        return op == '<>'
+    same_type = _type_code(left) == _type_code(right)
+    if op == '=':
+        return same_type and left == right
+    if op == '<>':
+        return not same_type or left != right
+    if not same_type or not isinstance(left, (str, Decimal, bytes)):
+        return False
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    return left >= right
+
+
+def _evaluate(node, item, expressions):
+    """Evaluate a parsed condition against an item"""
+    kind = node[0]
+    if kind == 'and':
+        return _evaluate(node[1], item, expressions) and _evaluate(node[2], item, expressions)
+    if kind == 'or':
+        return _evaluate(node[1], item, expressions) or _evaluate(node[2], item, expressions)
+    if kind == 'not':
+        return not _evaluate(node[1], item, expressions)
+    if kind == 'cmp':
+        return _compare(node[1], _operand(node[2], item, expressions), _operand(node[3], item, expressions))
+    if kind == 'between':
+        value = _operand(node[1], item, expressions)
+        return (_compare('>=', value, _operand(node[2], item, expressions))
+                and _compare('<=', value, _operand(node[3], item, expressions)))
+    if kind == 'in':
+        value = _operand(node[1], item, expressions)
+        return any(_compare('=', value, _operand(option, item, expressions)) for option in node[2])
+
+    name, args = node[1], node[2]
+    value = _operand(args[0], item, expressions)
+    if name == 'attribute_exists':
+        return value is not MISSING
+    if name == 'attribute_not_exists':
+        return value is MISSING
+    argument = _operand(args[1], item, expressions)
+    if name == 'attribute_type':
+        return value is not MISSING and _type_code(value) == argument
+    if name == 'begins_with':
+        return (isinstance(value, str) and isinstance(argument, str)
+                or isinstance(value, bytes) and isinstance(argument, bytes)) and value.startswith(argument)
+    # contains
+    if isinstance(value, str):
+        return isinstance(argument, str) and argument in value
+    if isinstance(value, (set, list)):
+        return any(_compare('=', element, argument) for element in value)
+    return False
+
+
+def _update_value(node, item, expressions):
+    """Evaluate the right-hand side of a SET action against the item before the update"""
+    kind = node[0]
+    if kind in ('+', '-'):
+        left = _update_value(node[1], item, expressions)
+        right = _update_value(node[2], item, expressions)
+        if not isinstance(left, Decimal) or not isinstance(right, Decimal):
+            raise ValidationException(
+                "An operand in the update expression has an incorrect data type", expressions.operation
+            )
+        return DYNAMODB_CONTEXT.add(left, right) if kind == '+' else DYNAMODB_CONTEXT.subtract(left, right)
+    if kind == 'if_not_exists':
+        value = _get_path(item, expressions.path(node[1][1]))
+        return _copy(value) if value is not MISSING else _update_value(node[2], item, expressions)
+    if kind == 'list_append':
+        first = _update_value(node[1], item, expressions)
+        second = _update_value(node[2], item, expressions)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise ValidationException(
+                "An operand in the update expression has an incorrect data type", expressions.operation
+            )
+        return first + second
+
+    value = _operand(node, item, expressions)
+    if value is MISSING:
+        raise ValidationException(
+            "The provided expression refers to an attribute that does not exist in the item", expressions.operation
+        )
+    return _copy(value)
+
+
+def _parent(item, elements, expressions):
+    """Get the map or list holding the last element of a path, for an update"""
+    parent = _get_path(item, elements[:-1])
+    last = elements[-1]
+    if not isinstance(parent, list if isinstance(last, int) else dict):
+        raise ValidationException(
+            "The document path provided in the update expression is invalid for update", expressions.operation
+        )
+    return parent, last
+
+
+def _apply_update(item, update, expressions, key_names):
+    """
+    Apply a parsed update expression
+
+    Args:
+        item: Current item (the key attributes only if it does not exist yet)
+        update: Parsed update expression
+        expressions: The request's expressions
+        key_names: Key attributes of the table, which cannot be updated
+
+    Returns:
+        Tuple of (updated copy of the item, names of the top-level attributes changed)
+    """
+    new_item = _copy(item)
+    touched = set()
+    if update is None:
+        return new_item, touched
+
+    # Every SET operand is read from the item as it was before the update
+    assignments = [
+        (expressions.path(path[1]), _update_value(value, item, expressions)) for path, value in update['SET']
+    ]
+    for elements, value in assignments:
+        parent, last = _parent(new_item, elements, expressions)
+        if isinstance(last, int) and last >= len(parent):
+            parent.append(value)
+        else:
+            parent[last] = value
+        touched.add(elements[0])
+
+    for path in update['REMOVE']:
+        elements = expressions.path(path[1])
+        parent = _get_path(new_item, elements[:-1])
+        last = elements[-1]
+        if isinstance(parent, dict) and isinstance(last, str):
+            parent.pop(last, None)
+        elif isinstance(parent, list) and isinstance(last, int) and last < len(parent):
+            del parent[last]
+        touched.add(elements[0])
+
+    for clause in ('ADD', 'DELETE'):
+        for path, operand in update[clause]:
+            elements = expressions.path(path[1])
+            value = _operand(operand, item, expressions)
+            current = _get_path(new_item, elements)
+            parent, last = _parent(new_item, elements, expressions)
+            if clause == 'ADD' and current is MISSING and isinstance(value, (Decimal, set)):
+                parent[last] = _copy(value)
+            elif clause == 'ADD' and isinstance(current, Decimal) and isinstance(value, Decimal):
+                parent[last] = DYNAMODB_CONTEXT.add(current, value)
+            elif isinstance(current, set) and isinstance(value, set):
+                remaining = current | value if clause == 'ADD' else current - value
+                if remaining:
+                    parent[last] = remaining
+                else:
+                    # DynamoDB does not store empty sets
+                    parent.pop(last)
+            elif not (clause == 'DELETE' and current is MISSING):
+                raise ValidationException(
+                    "An operand in the update expression has an incorrect data type", expressions.operation
+                )
+            touched.add(elements[0])
+
+    changed_keys = touched & set(key_names)
+    if changed_keys:
+        raise ValidationException(
+            f"Cannot update attribute {sorted(changed_keys)[0]}. This attribute is part of the key",
+            expressions.operation
+        )
+    return new_item, touched
+
+
+def _project(item, projection, expressions):
+    """Copy the attributes a ProjectionExpression asks for (the whole item without one)"""
+    if projection is None:
+        return _copy(item)
+    projected = {}
+    for path in projection:
+        elements = expressions.path(path[1])
+        value = _get_path(item, elements)
+        if value is MISSING:
+            continue
+        if len(elements) == 1:
+            projected[elements[0]] = _copy(value)
+            continue
+        # Nested paths keep their enclosing maps; list elements are collected in order
+        target = projected
+        for element, next_element in zip(elements, elements[1:]):
+            if isinstance(target, dict):
+                target = target.setdefault(element, [] if isinstance(next_element, int) else {})
+            else:
+                target.append([] if isinstance(next_element, int) else {})
+                target = target[-1]
+        if isinstance(target, dict):
+            target[elements[-1]] = _copy(value)
+        else:
+            target.append(_copy(value))
+    return projected
+
+
+def _prefix_end(prefix):
+    """Get the smallest value greater than every value starting with prefix, or None"""
+    if isinstance(prefix, str):
+        prefix = prefix.rstrip(chr(0x10FFFF))
+        return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else None
+    prefix = prefix.rstrip(b'\xff')
+    return prefix[:-1] + bytes([prefix[-1] + 1]) if prefix else None
+
+
+class _Index:
+    """A table's primary key or one of its GSIs
+
+    Entries are (sort key value, table key) tuples kept per partition key
+    value. Each partition is a list sorted by entry. Single writes insert
+    in place; bulk writes append and flag the partition, which is sorted
+    on its next read, so a bulk load costs one sort instead of one insert
+    per item. The primary
+    key of a table without a sort key needs no partitions at all; its
+    items are read straight from the table.
+    """
+
+    def __init__(self, table, name, key_schema, projection=None):
+        self.table = table
+        self.name = name
+        self.hash_name = next(key['AttributeName'] for key in key_schema if key['KeyType'] == 'HASH')
+        self.range_name = next((key['AttributeName'] for key in key_schema if key['KeyType'] == 'RANGE'), None)
+        self.definition = {
+            'IndexName': name,
+            'KeySchema': key_schema,
+            'Projection': projection or {'ProjectionType': 'ALL'}
+        }
+        self.partitions = {}
+        self.unsorted = set()
+
+        projection_type = self.definition['Projection'].get('ProjectionType', 'ALL')
+        if projection_type == 'ALL':
+            self.attributes = None
+        else:
+            self.attributes = set(table.key_names) | {self.hash_name} | ({self.range_name} - {None})
+            if projection_type == 'INCLUDE':
+                self.attributes.update(self.definition['Projection'].get('NonKeyAttributes', []))
+
+    @property
+    def primary(self):
+        return self.name is None
+
+    def entry(self, item, key):
+        """Get (partition value, entry) for an item, or None if the item is not in this index"""
+        hash_value = item.get(self.hash_name)
+        if hash_value is None:
+            return None
+        if self.range_name is None:
+            return hash_value, (None, key)
+        sort_value = item.get(self.range_name)
+        if sort_value is None:
+            return None
+        return hash_value, (sort_value, key)
+
+    def add(self, item, key, bulk=False):
+        """Add an item's entry; bulk adds defer sorting to the partition's next read"""
+        entry = self.entry(item, key)
+        if entry is None:
+            return
+        hash_value, entry = entry
+        partition = self.partitions.get(hash_value)
+        if partition is None:
+            self.partitions[hash_value] = [entry]
+        elif not entry < partition[-1]:
+            partition.append(entry)
+        elif bulk or hash_value in self.unsorted:
+            self.unsorted.add(hash_value)
+            partition.append(entry)
+        else:
+            insort(partition, entry)
+
+    def remove(self, item, key):
+        entry = self.entry(item, key)
+        if entry is None:
+            return
+        hash_value, entry = entry
+        partition = self.partition(hash_value)
+        position = bisect_left(partition, entry)
+        if position < len(partition) and partition[position] == entry:
+            del partition[position]
+        if not partition:
+            self.partitions.pop(hash_value, None)
+
+    def partition(self, hash_value):
+        """Get the sorted entries of one partition key value"""
+        if self.primary and self.range_name is None:
+            key = (hash_value,)
+            return [(None, key)] if key in self.table.items else []
+        partition = self.partitions.get(hash_value)
+        if partition is None:
+            return []
+        if hash_value in self.unsorted:
+            partition.sort()
+            self.unsorted.discard(hash_value)
+        return partition
+
+    def clear(self):
+        self.partitions.clear()
+        self.unsorted.clear()
+
+    def project(self, item):
+        """Get the attributes of an item that this index holds"""
+        if self.attributes is None:
+            return item
+        return {name: item[name] for name in self.attributes if name in item}
+
+    def last_key(self, item):
+        """Build the LastEvaluatedKey for an item read through this index"""
+        names = list(self.table.key_names) + [self.hash_name] + ([self.range_name] if self.range_name else [])
+        return {name: _copy(item[name]) for name in dict.fromkeys(names)}
+
+    def start_entry(self, start_key, operation):
+        """Get the (partition value, entry) an ExclusiveStartKey points at"""
+        start_key = _normalize(start_key)
+        try:
+            key = self.table.key_of(start_key, operation)
+            hash_value = start_key[self.hash_name]
+            sort_value = start_key[self.range_name] if self.range_name else None
+        except KeyError as e:
+            raise ValidationException("The provided starting key is invalid", operation) from e
+        return hash_value, (sort_value, key)
+
+    def describe(self):
+        description = dict(self.definition, IndexStatus='ACTIVE')
+        description['ItemCount'] = sum(len(partition) for partition in self.partitions.values())
+        return description
+
+
+class _Table:
+    """Items of one local table, keyed by their key tuple, with its indexes"""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.name = definition['TableName']
+        self.key_schema = definition['KeySchema']
+        self.key_names = tuple(
+            key['AttributeName'] for key in sorted(self.key_schema, key=lambda key: key['KeyType'] != 'HASH')
+        )
+        self.attribute_types = {
+            attribute['AttributeName']: attribute['AttributeType']
+            for attribute in definition.get('AttributeDefinitions', [])
+        }
+        self.items = {}
+        self._order = []
+        self._order_sorted = True
+        self.primary = _Index(self, None, self.key_schema)
+        self.indexes = {}
+        for index in definition.get('GlobalSecondaryIndexes') or []:
+            self.indexes[index['IndexName']] = _Index(
+                self, index['IndexName'], index['KeySchema'], index.get('Projection')
+            )
+
+    def index(self, index_name, operation):
+        if index_name is None:
+            return self.primary
+        if index_name not in self.indexes:
+            raise ValidationException(
+                f"The table does not have the specified index: {index_name}", operation
+            )
+        return self.indexes[index_name]
+
+    def key_of(self, key, operation):
+        """Get the key tuple of an item or Key dict"""
+        try:
+            values = tuple(key[name] for name in self.key_names)
+        except KeyError as e:
+            raise ValidationException("The provided key element does not match the schema", operation) from e
+        for name, value in zip(self.key_names, values):
+            if _type_code(value) != self.attribute_types.get(name, _type_code(value)):
+                raise ValidationException("The provided key element does not match the schema", operation)
+        return values
+
+    def validate(self, item, operation):
+        """Check an item's key and index key attributes before it is stored"""
+        for name in self.key_names:
+            if name not in item:
+                raise ValidationException(
+                    f"One or more parameter values were invalid: Missing the key {name} in the item", operation
+                )
+        for index in self.indexes.values():
+            for name in (index.hash_name, index.range_name):
+                if name and name in item and _type_code(item[name]) != self.attribute_types.get(name, 'S'):
+                    raise ValidationException(
+                        f"One or more parameter values were invalid: Type mismatch for Index Key {name}", operation
+                    )
+        return self.key_of(item, operation)
+
+    def put(self, key, item, bulk=False):
+        """Store an item; bulk puts (batch writes, loads) defer index sorting to the next read"""
+        old = self.items.get(key)
+        if old is not None:
+            for index in self.indexes.values():
+                if index.entry(old, key) != index.entry(item, key):
+                    index.remove(old, key)
+                    index.add(item, key, bulk)
+        else:
+            for index in self.indexes.values():
+                index.add(item, key, bulk)
+            if not self._order or not key < self._order[-1]:
+                self._order.append(key)
+            elif bulk or not self._order_sorted:
+                self._order_sorted = False
+                self._order.append(key)
+            else:
+                insort(self._order, key)
+            if self.primary.range_name is not None:
+                self.primary.add(item, key, bulk)
+        self.items[key] = item
+
+    def delete(self, key):
+        old = self.items.pop(key, None)
+        if old is None:
+            return None
+        for index in self.indexes.values():
+            index.remove(old, key)
+        if self.primary.range_name is not None:
+            self.primary.remove(old, key)
+        order = self.ordered_keys()
+        del order[bisect_left(order, key)]
+        return old
+
+    def ordered_keys(self):
+        """Get every key in scan order"""
+        if not self._order_sorted:
+            self._order.sort()
+            self._order_sorted = True
+        return self._order
+
+    def add_index(self, definition):
+        index = _Index(self, definition['IndexName'], definition['KeySchema'], definition.get('Projection'))
+        for key, item in self.items.items():
+            index.add(item, key)
+        self.indexes[index.name] = index
+        self.definition['GlobalSecondaryIndexes'] = [
+            existing.definition for existing in self.indexes.values()
+        ]
+
+    def remove_index(self, index_name):
+        self.indexes.pop(index_name, None)
+        self.definition['GlobalSecondaryIndexes'] = [
+            existing.definition for existing in self.indexes.values()
+        ]
+
+    def describe(self):
+        description = {
+            'TableName': self.name,
+            'TableStatus': 'ACTIVE',
+            'KeySchema': self.key_schema,
+            'AttributeDefinitions': self.definition.get('AttributeDefinitions', []),
+            'ItemCount': len(self.items)
+        }
+        if self.indexes:
+            description['GlobalSecondaryIndexes'] = [index.describe() for index in self.indexes.values()]
+        return description
+
+
+class LocalTable:
+    """The boto3 Table interface over a LocalDynamoDB table"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.table_name = name
+        self.meta = SimpleNamespace(client=db)
+
+    def _description(self):
+        return self.db.describe_table(TableName=self.name)['Table']
+
+    @property
+    def key_schema(self):
+        return self._description()['KeySchema']
+
+    @property
+    def attribute_definitions(self):
+        return self._description()['AttributeDefinitions']
+
+    @property
+    def global_secondary_indexes(self):
+        return self._description().get('GlobalSecondaryIndexes')
+
+    @property
+    def item_count(self):
+        return self._description()['ItemCount']
+
+    @property
+    def table_status(self):
+        return self._description()['TableStatus']
+
+    def reload(self):
+        """Nothing to refresh; attributes are always read from the live table"""
+
+    load = reload
+
+    def get_item(self, **kwargs):
+        return self.db.get_item(TableName=self.name, **kwargs)
+
+    def put_item(self, **kwargs):
+        return self.db.put_item(TableName=self.name, **kwargs)
+
+    def update_item(self, **kwargs):
+        return self.db.update_item(TableName=self.name, **kwargs)
+
+    def delete_item(self, **kwargs):
+        return self.db.delete_item(TableName=self.name, **kwargs)
+
+    def query(self, **kwargs):
+        return self.db.query(TableName=self.name, **kwargs)
+
+    def scan(self, **kwargs):
+        return self.db.scan(TableName=self.name, **kwargs)
+
+    def delete(self):
+        return self.db.delete_table(TableName=self.name)
+
+
+class _Waiter:
+    """Local tables are created and updated synchronously, so there is nothing to wait for"""
+
+    def wait(self, **kwargs):
+        return None
+
+
+class LocalDynamoDB:
+    """In-process stand-in for the boto3 DynamoDB resource and its client
+
+    Implements the calls DelayCompanion makes (item reads and conditional
+    writes, Query and Scan with pagination, BatchGetItem, BatchWriteItem,
+    TransactWriteItems, GSIs and table management) over plain dicts, so
+    development, load tests and benchmarks need no AWS account. Condition,
+    update and projection expressions are interpreted like DynamoDB does,
+    and failures raise ClientError with DynamoDB's error codes, so the
+    service's error handling runs unchanged. Reserved words, item sizes
+    and throughput limits are not enforced. One object serves as both the
+    resource and its meta.client.
+
+    Every call holds one lock, which makes the object safe to share between
+    threads and transactions atomic. With a path, every write is also
+    committed to SQLite and the tables are loaded from it on start. Reads
+    pick up writes other processes committed to the file within
+    SYNC_INTERVAL seconds, applying only the items those writes changed.
+    Every write holds SQLite's write lock and first applies what another
+    process committed meanwhile, so conditions and transactions stay
+    atomic across processes too.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the local tables
+
+        Args:
+            path: Optional SQLite file the tables are persisted to; in memory only if omitted
+        """
+        self.path = str(path) if path else None
+        self.meta = SimpleNamespace(client=self)
+        self.exceptions = EXCEPTIONS
+        self._tables = {}
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pending = []
+        self._data_version = None
+        self._next_sync = 0.0
+        # Last change version applied from the file, and the version of every table definition
+        self._version = 0
+        self._table_versions = {}
+
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS local_tables (table_name TEXT PRIMARY KEY, definition TEXT NOT NULL)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS local_items (
+                    table_name TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    PRIMARY KEY (table_name, item_key)
+                ) WITHOUT ROWID
+            """)
+            self._migrate()
+            self._conn.commit()
+            self._sync(force=True)
+
+    def _migrate(self):
+        """
+        Add the change versions incremental syncs read to an existing file
+
+        Every committed write takes the next value of the local_version
+        counter; rows and table definitions record the version that last
+        changed them, and deleted items are kept as tombstones, so other
+        processes can apply just the rows changed since they last synced.
+        """
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS local_version "
+            "(id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO local_version (id, version) VALUES (0, 0)")
+        for table_name, columns in (('local_tables', ('version',)), ('local_items', ('version', 'deleted'))):
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table_name})")}
+            for column in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS local_items_version ON local_items (version)")
+
+    def _sync(self, force=False, immediate=False):
+        """
+        Apply the writes other processes committed to the SQLite file
+
+        Only the items changed since the last sync are read, so a foreign
+        write costs the rows it touched. The tables are reloaded in full
+        on start, when forced, or when a table was created, updated or
+        deleted.
+
+        Args:
+            force: Reload every table even if nothing changed
+            immediate: Check for changes now instead of waiting for SYNC_INTERVAL
+        """
+        if self._conn is None:
+            return
+        now = time.monotonic()
+        if not (force or immediate) and now < self._next_sync:
+            return
+        self._next_sync = now + SYNC_INTERVAL
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version and not force:
+            return
+        self._data_version = version
+
+        # Read the counter, definitions and rows from one snapshot
+        snapshot = not self._conn.in_transaction
+        if snapshot:
+            self._conn.execute("BEGIN")
+        try:
+            latest = self._conn.execute("SELECT version FROM local_version").fetchone()[0]
+            definitions = list(self._conn.execute("SELECT table_name, definition, version FROM local_tables"))
+            table_versions = {table_name: table_version for table_name, _, table_version in definitions}
+            if force or table_versions != self._table_versions:
+                self._tables = {}
+                for table_name, definition, _ in definitions:
+                    self._tables[table_name] = _Table(json.loads(definition))
+                rows = self._conn.execute(
+                    "SELECT table_name, item_key, item, deleted FROM local_items WHERE deleted = 0"
+                )
+            elif latest > self._version:
+                rows = self._conn.execute(
+                    "SELECT table_name, item_key, item, deleted FROM local_items WHERE version > ? ORDER BY version",
+                    (self._version,)
+                )
+            else:
+                rows = ()
+            for table_name, item_key, item, deleted in rows:
+                table = self._tables.get(table_name)
+                if table is None:
+                    continue
+                if deleted:
+                    table.delete(tuple(_load(value) for value in json.loads(item_key)))
+                else:
+                    item = {name: _load(value) for name, value in json.loads(item).items()}
+                    table.put(table.key_of(item, 'Load'), item, bulk=True)
+        finally:
+            if snapshot:
+                self._conn.commit()
+        self._version = latest
+        self._table_versions = table_versions
+
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the lock, and SQLite's write lock if there is a file, for one write
+
+        Other processes' writes are loaded first, so conditions are checked
+        against the latest items. Queued writes are committed at the end, or
+        discarded with the transaction if the write fails.
+        """
+        with self._lock:
+            if self._conn is None:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync(immediate=True)
+                yield
+                self._commit()
+                self._conn.commit()
+            except LocalClientError:
+                # Requests are rejected before anything is applied
+                self._pending = []
+                self._conn.rollback()
+                raise
+            except BaseException:
+                # The tables may be ahead of the file; reload them from it
+                self._pending = []
+                self._conn.rollback()
+                self._sync(force=True)
+                raise
+
+    @staticmethod
+    def _item_key(key):
+        return json.dumps([_dump(value) for value in key])
+
+    def _next_version(self):
+        """Take the next change version; only called under SQLite's write lock, after a sync"""
+        self._conn.execute("UPDATE local_version SET version = version + 1")
+        self._version = self._conn.execute("SELECT version FROM local_version").fetchone()[0]
+        return self._version
+
+    def _persist_table(self, table):
+        if self._conn is not None:
+            version = self._next_version()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO local_tables (table_name, definition, version) VALUES (?, ?, ?)",
+                (table.name, json.dumps(table.definition), version)
+            )
+            self._conn.commit()
+            self._table_versions[table.name] = version
+
+    def _write(self, table, key, item):
+        """Queue a put (or a delete, for item None) for the next commit"""
+        if self._conn is not None:
+            self._pending.append((table.name, key, item))
+
+    def _commit(self):
+        if self._conn is None or not self._pending:
+            return
+        version = self._next_version()
+        rows = []
+        for table_name, key, item in self._pending:
+            if item is None:
+                # Deletes stay behind as tombstones for other processes' incremental syncs
+                rows.append((table_name, self._item_key(key), '{}', version, 1))
+            else:
+                encoded = json.dumps({name: _dump(value) for name, value in item.items()})
+                rows.append((table_name, self._item_key(key), encoded, version, 0))
+        self._pending = []
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO local_items (table_name, item_key, item, version, deleted) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Close the SQLite file, if any"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _table(self, table_name, operation):
+        table = self._tables.get(table_name)
+        if table is None:
+            raise ResourceNotFoundException(
+                f"Requested resource not found: Table: {table_name} not found", operation
+            )
+        return table
+
+    def Table(self, name):
+        return LocalTable(self, name)
+
+    def get_waiter(self, name):
+        return _Waiter()
+
+    def create_table(self, TableName, KeySchema, AttributeDefinitions, GlobalSecondaryIndexes=None, **options):
+        """Create a table; billing and throughput options are accepted and ignored"""
+        with self._writing():
+            if TableName in self._tables:
+                raise ResourceInUseException(f"Table already exists: {TableName}", 'CreateTable')
+            defined = {attribute['AttributeName'] for attribute in AttributeDefinitions}
+            key_names = [key['AttributeName'] for key in KeySchema] + [
+                key['AttributeName'] for index in GlobalSecondaryIndexes or [] for key in index['KeySchema']
+            ]
+            undefined = [name for name in key_names if name not in defined]
+            if undefined:
+                raise ValidationException(
+                    f"One or more parameter values were invalid: Some index key attributes are not defined "
+                    f"in AttributeDefinitions: {undefined}", 'CreateTable'
+                )
+            table = _Table({
+                'TableName': TableName,
+                'KeySchema': KeySchema,
+                'AttributeDefinitions': AttributeDefinitions,
+                'GlobalSecondaryIndexes': GlobalSecondaryIndexes or []
+            })
+            self._tables[TableName] = table
+            self._persist_table(table)
+            return LocalTable(self, TableName)
+
+    def update_table(self, TableName, AttributeDefinitions=None, GlobalSecondaryIndexUpdates=None, **options):
+        """Add or drop GSIs; new indexes are backfilled before the call returns"""
+        with self._writing():
+            table = self._table(TableName, 'UpdateTable')
+            for attribute in AttributeDefinitions or []:
+                table.attribute_types[attribute['AttributeName']] = attribute['AttributeType']
+            table.definition['AttributeDefinitions'] = [
+                {'AttributeName': name, 'AttributeType': code} for name, code in table.attribute_types.items()
+            ]
+            for update in GlobalSecondaryIndexUpdates or []:
+                if 'Create' in update:
+                    if update['Create']['IndexName'] in table.indexes:
+                        raise ValidationException(
+                            f"Attempting to create an index which already exists: {update['Create']['IndexName']}",
+                            'UpdateTable'
+                        )
+                    table.add_index(update['Create'])
+                elif 'Delete' in update:
+                    table.remove_index(update['Delete']['IndexName'])
+            self._persist_table(table)
+            return {'TableDescription': table.describe()}
+
+    def delete_table(self, TableName):
+        with self._writing():
+            table = self._table(TableName, 'DeleteTable')
+            del self._tables[TableName]
+            if self._conn is not None:
+                self._next_version()
+                self._conn.execute("DELETE FROM local_items WHERE table_name = ?", (TableName,))
+                self._conn.execute("DELETE FROM local_tables WHERE table_name = ?", (TableName,))
+                self._conn.commit()
+                self._table_versions.pop(TableName, None)
+            return {'TableDescription': table.describe()}
+
+    def describe_table(self, TableName):
+        with self._lock:
+            self._sync()
+            return {'Table': self._table(TableName, 'DescribeTable').describe()}
+
+    def list_tables(self, **kwargs):
+        with self._lock:
+            self._sync()
+            return {'TableNames': sorted(self._tables)}
+
+    @staticmethod
+    def _check(condition, item, expressions, return_values=None):
+        """Raise ConditionalCheckFailedException unless the item satisfies the condition"""
+        if condition is None or _evaluate(condition, item or {}, expressions):
+            return
+        extra = {'Item': _wire_item(item)} if return_values == 'ALL_OLD' and item else {}
+        raise ConditionalCheckFailedException("The conditional request failed", expressions.operation, **extra)
+
+    def get_item(self, TableName, Key, ProjectionExpression=None, ExpressionAttributeNames=None,
+                 ConsistentRead=False, ReturnConsumedCapacity=None):
+        with self._lock:
+            self._sync()
+            table = self._table(TableName, 'GetItem')
+            item = table.items.get(table.key_of(_normalize(Key), 'GetItem'))
+            if item is None:
+                return {}
+            expressions = _Expressions('GetItem', ExpressionAttributeNames)
+            return {'Item': _project(item, expressions.parse(ProjectionExpression, 'projection'), expressions)}
+
+    def put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues='NONE', ReturnValuesOnConditionCheckFailure=None,
+                 ReturnConsumedCapacity=None):
+        with self._writing():
+            table = self._table(TableName, 'PutItem')
+            item = _normalize(Item)
+            key = table.validate(item, 'PutItem')
+            old = table.items.get(key)
+            expressions = _Expressions('PutItem', ExpressionAttributeNames, ExpressionAttributeValues)
+            self._check(expressions.parse(ConditionExpression, 'condition'), old, expressions,
+                        ReturnValuesOnConditionCheckFailure)
+            table.put(key, item)
+            self._write(table, key, item)
+            self._commit()
+            return {'Attributes': _copy(old)} if ReturnValues == 'ALL_OLD' and old else {}
+
+    def update_item(self, TableName, Key, UpdateExpression=None, ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None, ReturnValues='NONE',
+                    ReturnValuesOnConditionCheckFailure=None, ReturnConsumedCapacity=None):
+        with self._writing():
+            table = self._table(TableName, 'UpdateItem')
+            key_item = _normalize(Key)
+            key = table.key_of(key_item, 'UpdateItem')
+            old = table.items.get(key)
+            expressions = _Expressions('UpdateItem', ExpressionAttributeNames, ExpressionAttributeValues)
+            self._check(expressions.parse(ConditionExpression, 'condition'), old, expressions,
+                        ReturnValuesOnConditionCheckFailure)
+            new_item, touched = _apply_update(
+                old if old is not None else key_item, expressions.parse(UpdateExpression, 'update'),
+                expressions, table.key_names
+            )
+            table.validate(new_item, 'UpdateItem')
+            table.put(key, new_item)
+            self._write(table, key, new_item)
+            self._commit()
+
+            if ReturnValues == 'ALL_NEW':
+                return {'Attributes': _copy(new_item)}
+            if ReturnValues == 'ALL_OLD':
+                return {'Attributes': _copy(old)} if old else {}
+            if ReturnValues in ('UPDATED_NEW', 'UPDATED_OLD'):
+                source = new_item if ReturnValues == 'UPDATED_NEW' else (old or {})
+                return {'Attributes': {name: _copy(source[name]) for name in touched if name in source}}
+            return {}
+
+    def delete_item(self, TableName, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', ReturnValuesOnConditionCheckFailure=None,
+                    ReturnConsumedCapacity=None):
+        with self._writing():
+            table = self._table(TableName, 'DeleteItem')
+            key = table.key_of(_normalize(Key), 'DeleteItem')
+            old = table.items.get(key)
+            expressions = _Expressions('DeleteItem', ExpressionAttributeNames, ExpressionAttributeValues)
+            self._check(expressions.parse(ConditionExpression, 'condition'), old, expressions,
+                        ReturnValuesOnConditionCheckFailure)
+            if old is not None:
+                table.delete(key)
+                self._write(table, key, None)
+                self._commit()
+            return {'Attributes': old} if ReturnValues == 'ALL_OLD' and old else {}
+
+    @staticmethod
+    def _key_condition(condition, expressions, index):
+        """
+        Split a parsed KeyConditionExpression into its partition key value and sort key condition
+
+        Returns:
+            Tuple of (partition key value, (operator, value, upper value) or None)
+        """
+        terms = []
+        pending = [condition]
+        while pending:
+            node = pending.pop()
+            if node[0] == 'and':
+                pending.extend(node[1:])
+            else:
+                terms.append(node)
+
+        hash_value = MISSING
+        sort_condition = None
+        for term in terms:
+            # The attribute a key condition term constrains, e.g. #n1 in begins_with(#n1, :v1)
+            operand = None
+            if term[0] == 'cmp':
+                operand = term[2]
+            elif term[0] == 'between':
+                operand = term[1]
+            elif term[0] == 'func':
+                operand = term[2][0]
+            attribute = None
+            if operand is not None and operand[0] == 'path' and len(operand[1]) == 1:
+                attribute = expressions.path(operand[1])[0]
+            if term[0] == 'cmp' and term[1] == '=' and attribute == index.hash_name and hash_value is MISSING:
+                hash_value = _operand(term[3], {}, expressions)
+            elif attribute is not None and attribute == index.range_name and sort_condition is None:
+                if term[0] == 'cmp' and term[1] != '<>':
+                    sort_condition = (term[1], _operand(term[3], {}, expressions), None)
+                elif term[0] == 'between':
+                    sort_condition = ('between', _operand(term[2], {}, expressions), _operand(term[3], {}, expressions))
+                elif term[0] == 'func' and term[1] == 'begins_with':
+                    sort_condition = ('begins_with', _operand(term[2][1], {}, expressions), None)
+                else:
+                    raise ValidationException("Query key condition not supported", expressions.operation)
+            else:
+                raise ValidationException("Query key condition not supported", expressions.operation)
+
+        if hash_value is MISSING:
+            raise ValidationException("Query condition missed key schema element: " + index.hash_name,
+                                      expressions.operation)
+        expected = index.table.attribute_types
+        if _type_code(hash_value) != expected.get(index.hash_name, _type_code(hash_value)) or (
+                sort_condition and any(
+                    value is not None and _type_code(value) != expected.get(index.range_name, _type_code(value))
+                    for value in sort_condition[1:])):
+            raise ValidationException(
+                "One or more parameter values were invalid: Condition parameter type does not match schema type",
+                expressions.operation
+            )
+        return hash_value, sort_condition
+
+    @staticmethod
+    def _sort_range(entries, sort_condition):
+        """Get the [low, high) positions of the entries matching a sort key condition"""
+        if sort_condition is None:
+            return 0, len(entries)
+        op, value, upper = sort_condition
+        if op == '=':
+            return bisect_left(entries, value, key=_sort_value), bisect_right(entries, value, key=_sort_value)
+        if op == '<':
+            return 0, bisect_left(entries, value, key=_sort_value)
+        if op == '<=':
+            return 0, bisect_right(entries, value, key=_sort_value)
+        if op == '>':
+            return bisect_right(entries, value, key=_sort_value), len(entries)
+        if op == '>=':
+            return bisect_left(entries, value, key=_sort_value), len(entries)
+        if op == 'between':
+            return bisect_left(entries, value, key=_sort_value), bisect_right(entries, upper, key=_sort_value)
+        # begins_with
+        end = _prefix_end(value) if value else None
+        low = bisect_left(entries, value, key=_sort_value)
+        return low, bisect_left(entries, end, key=_sort_value) if end is not None else len(entries)
+
+    @staticmethod
+    def _read_page(table, index, keys, filter_condition, projection, expressions, limit, select):
+        """
+        Read items in key order until the page limit is reached
+
+        Args:
+            keys: Iterator of table keys in read order
+            limit: Maximum number of items evaluated (before the filter), or None
+
+        Returns:
+            Query/Scan response dict
+        """
+        if limit is not None and limit < 1:
+            raise ValidationException("Limit must be at least 1", expressions.operation)
+        matched = []
+        scanned = 0
+        last_item = None
+        more = False
+        for key in keys:
+            if limit is not None and scanned >= limit:
+                more = True
+                break
+            last_item = table.items[key]
+            scanned += 1
+            item = index.project(last_item)
+            if filter_condition is None or _evaluate(filter_condition, item, expressions):
+                matched.append(item)
+
+        response = {'Count': len(matched), 'ScannedCount': scanned}
+        if select != 'COUNT':
+            response['Items'] = [_project(item, projection, expressions) for item in matched]
+        if more:
+            response['LastEvaluatedKey'] = index.last_key(last_item)
+        return response
+
+    def query(self, TableName, KeyConditionExpression, IndexName=None, FilterExpression=None,
+              ProjectionExpression=None, ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit=None,
+              ExclusiveStartKey=None, ScanIndexForward=True, Select=None, ConsistentRead=False,
+              ReturnConsumedCapacity=None):
+        with self._lock:
+            self._sync()
+            table = self._table(TableName, 'Query')
+            index = table.index(IndexName, 'Query')
+            expressions = _Expressions('Query', ExpressionAttributeNames, ExpressionAttributeValues)
+            key_condition = expressions.parse(KeyConditionExpression, 'condition', is_key_condition=True)
+            filter_condition = expressions.parse(FilterExpression, 'condition')
+            projection = expressions.parse(ProjectionExpression, 'projection')
+
+            hash_value, sort_condition = self._key_condition(key_condition, expressions, index)
+            entries = index.partition(hash_value)
+            low, high = self._sort_range(entries, sort_condition)
+            if ExclusiveStartKey:
+                start_hash, start = index.start_entry(ExclusiveStartKey, 'Query')
+                if start_hash != hash_value:
+                    raise ValidationException("The provided starting key is invalid", 'Query')
+                if ScanIndexForward:
+                    low = max(low, bisect_right(entries, start, low, high))
+                else:
+                    high = min(high, bisect_left(entries, start, low, high))
+
+            positions = range(low, high) if ScanIndexForward else range(high - 1, low - 1, -1)
+            return self._read_page(
+                table, index, (entries[position][1] for position in positions),
+                filter_condition, projection, expressions, Limit, Select
+            )
+
+    def scan(self, TableName, IndexName=None, FilterExpression=None, ProjectionExpression=None,
+             ExpressionAttributeNames=None, ExpressionAttributeValues=None, Limit=None, ExclusiveStartKey=None,
+             Segment=None, TotalSegments=None, Select=None, ConsistentRead=False, ReturnConsumedCapacity=None):
+        with self._lock:
+            self._sync()
+            table = self._table(TableName, 'Scan')
+            index = table.index(IndexName, 'Scan')
+            expressions = _Expressions('Scan', ExpressionAttributeNames, ExpressionAttributeValues)
+            filter_condition = expressions.parse(FilterExpression, 'condition')
+            projection = expressions.parse(ProjectionExpression, 'projection')
+
+            if index.primary:
+                order = table.ordered_keys()
+                start = bisect_right(order, table.key_of(_normalize(ExclusiveStartKey), 'Scan')) \
+                    if ExclusiveStartKey else 0
+                keys = (order[position] for position in range(start, len(order)))
+            else:
+                # Index scans walk the partitions in key order
+                order = [(hash_value, entry) for hash_value in sorted(index.partitions)
+                         for entry in index.partition(hash_value)]
+                start = bisect_right(order, index.start_entry(ExclusiveStartKey, 'Scan')) if ExclusiveStartKey else 0
+                keys = (order[position][1][1] for position in range(start, len(order)))
+
+            if TotalSegments is not None or Segment is not None:
+                if TotalSegments is None or Segment is None or not 0 <= Segment < TotalSegments:
+                    raise ValidationException("Segment must be less than TotalSegments", 'Scan')
+                # Items are spread over segments by a hash of their partition key
+                keys = (key for key in keys if zlib.crc32(repr(key[0]).encode()) % TotalSegments == Segment)
+
+            return self._read_page(table, index, keys, filter_condition, projection, expressions, Limit, Select)
+
+    def batch_get_item(self, RequestItems, ReturnConsumedCapacity=None):
+        if sum(len(request['Keys']) for request in RequestItems.values()) > BATCH_GET_LIMIT:
+            raise ValidationException("Too many items requested for the BatchGetItem call", 'BatchGetItem')
+        with self._lock:
+            self._sync()
+            responses = {}
+            for table_name, request in RequestItems.items():
+                table = self._table(table_name, 'BatchGetItem')
+                expressions = _Expressions('BatchGetItem', request.get('ExpressionAttributeNames'))
+                projection = expressions.parse(request.get('ProjectionExpression'), 'projection')
+                keys = [table.key_of(_normalize(key), 'BatchGetItem') for key in request['Keys']]
+                if len(set(keys)) != len(keys):
+                    raise ValidationException("Provided list of item keys contains duplicates", 'BatchGetItem')
+                responses[table_name] = [
+                    _project(table.items[key], projection, expressions) for key in keys if key in table.items
+                ]
+            return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity=None, ReturnItemCollectionMetrics=None):
+        if sum(len(requests) for requests in RequestItems.values()) > BATCH_WRITE_LIMIT:
+            raise ValidationException("Too many items requested for the BatchWriteItem call", 'BatchWriteItem')
+        with self._writing():
+            writes = []
+            for table_name, requests in RequestItems.items():
+                table = self._table(table_name, 'BatchWriteItem')
+                keys = set()
+                for request in requests:
+                    if 'PutRequest' in request:
+                        item = _normalize(request['PutRequest']['Item'])
+                        key = table.validate(item, 'BatchWriteItem')
+                    else:
+                        item = None
+                        key = table.key_of(_normalize(request['DeleteRequest']['Key']), 'BatchWriteItem')
+                    if key in keys:
+                        raise ValidationException("Provided list of item keys contains duplicates", 'BatchWriteItem')
+                    keys.add(key)
+                    writes.append((table, key, item))
+
+            for table, key, item in writes:
+                if item is None:
+                    table.delete(key)
+                else:
+                    table.put(key, item, bulk=True)
+                self._write(table, key, item)
+            self._commit()
+
+            response = {'UnprocessedItems': {}}
+            if ReturnConsumedCapacity in ('TOTAL', 'INDEXES'):
+                # One write unit per item, the cost of items up to 1 KB
+                response['ConsumedCapacity'] = [
+                    {'TableName': table_name, 'CapacityUnits': float(len(requests))}
+                    for table_name, requests in RequestItems.items()
+                ]
+            return response
+
+    def transact_write_items(self, TransactItems, ClientRequestToken=None, ReturnConsumedCapacity=None,
+                             ReturnItemCollectionMetrics=None):
+        """
+        Apply Put, Update, Delete and ConditionCheck actions all or nothing
+
+        Every condition is checked before anything is written. If any fails,
+        TransactionCanceledException is raised with one CancellationReason
+        per action, like DynamoDB does.
+        """
+        if len(TransactItems) > TRANSACT_WRITE_LIMIT:
+            raise ValidationException(
+                f"Member must have length less than or equal to {TRANSACT_WRITE_LIMIT}", 'TransactWriteItems'
+            )
+        with self._writing():
+            writes = []
+            reasons = []
+            seen = set()
+            for action in TransactItems:
+                (kind, request), = action.items()
+                table = self._table(request['TableName'], 'TransactWriteItems')
+                if kind == 'Put':
+                    item = _normalize(request['Item'])
+                    key = table.validate(item, 'TransactWriteItems')
+                else:
+                    key_item = _normalize(request['Key'])
+                    key = table.key_of(key_item, 'TransactWriteItems')
+                if (table.name, key) in seen:
+                    raise ValidationException(
+                        "Transaction request cannot include multiple operations on one item", 'TransactWriteItems'
+                    )
+                seen.add((table.name, key))
+
+                old = table.items.get(key)
+                expressions = _Expressions(
+                    'TransactWriteItems',
+                    request.get('ExpressionAttributeNames'),
+                    request.get('ExpressionAttributeValues')
+                )
+                condition = expressions.parse(request.get('ConditionExpression'), 'condition')
+                if condition is not None and not _evaluate(condition, old or {}, expressions):
+                    reason = {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'}
+                    if request.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' and old:
+                        reason['Item'] = _wire_item(old)
+                    reasons.append(reason)
+                    continue
+                reasons.append({'Code': 'None'})
+
+                if kind == 'Update':
+                    item, _ = _apply_update(
+                        old if old is not None else key_item,
+                        expressions.parse(request.get('UpdateExpression'), 'update'),
+                        expressions,
+                        table.key_names
+                    )
+                    table.validate(item, 'TransactWriteItems')
+                elif kind == 'Delete':
+                    item = None
+                elif kind == 'ConditionCheck':
+                    continue
+                writes.append((table, key, item))
+
+            if any(reason['Code'] != 'None' for reason in reasons):
+                codes = ", ".join(reason['Code'] for reason in reasons)
+                raise TransactionCanceledException(
+                    f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                    'TransactWriteItems', CancellationReasons=reasons
+                )
+
+            for table, key, item in writes:
+                if item is None:
+                    table.delete(key)
+                else:
+                    table.put(key, item)
+                self._write(table, key, item)
+            self._commit()
+            return {}
+
+    def stats(self):
+        """Get the item count of every table"""
+        with self._lock:
+            self._sync()
+            return {name: len(table.items) for name, table in self._tables.items()}
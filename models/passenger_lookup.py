@@ -0,0 +1,165 @@
+import re
+import unicodedata
+
+from boto3.dynamodb.conditions import Key
+
+from .dynamodb import DynamoDBService
+
+# Sparse GSIs on the passengers table; items without the key attribute are not indexed
+EMAIL_INDEX = 'EmailIndex'
+BOOKING_REF_INDEX = 'BookingRefIndex'
+NAME_INDEX = 'NameIndex'
+
+# Attributes copied into the lookup indexes, enough to render a login result
+LOOKUP_ATTRIBUTES = ['name', 'flight_id', 'loyalty_tier']
+
+# Name searches are partitioned by the first letters of the normalized name
+NAME_PREFIX_LENGTH = 2
+
+DEFAULT_PAGE_SIZE = 10
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+$")
+PASSENGER_ID_PATTERN = re.compile(r"^P\d+$", re.IGNORECASE)
+BOOKING_REF_PATTERN = re.compile(r"^[A-Z0-9]{6}$")
+
+
+def normalize_name(name):
+    """Lowercase a name and strip accents, punctuation and extra whitespace"""
+    decomposed = unicodedata.normalize("NFKD", str(name or ""))
+    ascii_name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", ascii_name.lower()).split())
+
+
+def search_keys(passenger):
+    """
+    Get the derived attributes that place a passenger in the lookup indexes
+
+    Args:
+        passenger: Passenger item with at least passenger_id
+
+    Returns:
+        Dict of attribute name to value; missing source fields are left out
+    """
+    keys = {}
+    if passenger.get('email'):
+        keys['email_key'] = str(passenger['email']).strip().lower()
+    if passenger.get('booking_ref'):
+        keys['booking_ref'] = str(passenger['booking_ref']).strip().upper()
+    name = normalize_name(passenger.get('name'))
+    if name:
+        keys['name_prefix'] = name[:NAME_PREFIX_LENGTH]
+        # The passenger ID keeps sort keys unique for passengers with the same name
+        keys['name_key'] = f"{name}#{passenger['passenger_id']}"
+    return keys
+
+
+class PassengerLookup:
+    """Passenger login lookups served from GSIs instead of table scans
+
+    Exact lookups by passenger ID, email or booking reference read one key;
+    name typeahead reads one NameIndex partition with begins_with on the
+    normalized full name, so it matches from the first name on and a
+    surname alone finds nothing. Every call returns one page of results and a cursor for
+    the next, so the cost follows the result size, not the table size.
+    """
+
+    def __init__(self, db_service=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Initialize the lookup
+
+        Args:
+            db_service: Optional DynamoDBService whose passengers table is searched
+            page_size: Default number of results per page
+        """
+        self.db_service = db_service or DynamoDBService()
+        self.passengers_table = self.db_service.passengers_table
+        self.page_size = page_size
+
+    @staticmethod
+    def _summary(item):
+        """Reduce an index item to the fields a login result shows"""
+        return {key: item.get(key) for key in ['passenger_id'] + LOOKUP_ATTRIBUTES}
+
+    def _query_page(self, index_name, key_condition, limit, cursor):
+        """
+        Read one page from a lookup index
+
+        Returns:
+            Dict with 'items' and 'next_cursor' (None on the last page)
+        """
+        query_args = {
+            'IndexName': index_name,
+            'KeyConditionExpression': key_condition,
+            'Limit': limit or self.page_size
+        }
+        if cursor:
+            query_args['ExclusiveStartKey'] = cursor
+
+        response = self.passengers_table.query(**query_args)
+        return {
+            'items': [self._summary(item) for item in response.get('Items', [])],
+            'next_cursor': response.get('LastEvaluatedKey')
+        }
+
+    def find_by_id(self, passenger_id):
+        """Get the login result for a passenger ID, or None"""
+        passenger = self.db_service.get_passenger(passenger_id.strip().upper())
+        return self._summary(passenger) if passenger else None
+
+    def find_by_email(self, email, limit=None, cursor=None):
+        """Get the passengers registered with an email address (case-insensitive)"""
+        condition = Key('email_key').eq(email.strip().lower())
+        return self._query_page(EMAIL_INDEX, condition, limit, cursor)
+
+    def find_by_booking_ref(self, booking_ref, limit=None, cursor=None):
+        """Get the passengers travelling on a booking reference"""
+        condition = Key('booking_ref').eq(booking_ref.strip().upper())
+        return self._query_page(BOOKING_REF_INDEX, condition, limit, cursor)
+
+    def search_names(self, prefix, limit=None, cursor=None):
+        """
+        Get passengers whose name starts with a prefix, in name order
+
+        Only the start of the full name is indexed: "ann sm" finds Ann Smith,
+        "smith" does not.
+
+        Args:
+            prefix: Start of the passenger's full name; at least NAME_PREFIX_LENGTH letters
+            limit: Optional page size
+            cursor: Optional next_cursor of the previous page
+        """
+        prefix = normalize_name(prefix)
+        if len(prefix) < NAME_PREFIX_LENGTH:
+            return {'items': [], 'next_cursor': None}
+        condition = Key('name_prefix').eq(prefix[:NAME_PREFIX_LENGTH]) & Key('name_key').begins_with(prefix)
+        return self._query_page(NAME_INDEX, condition, limit, cursor)
+
+    def search(self, query, limit=None, cursor=None):
+        """
+        Look a passenger up by whatever they typed
+
+        Email addresses, passenger IDs and six-character booking references
+        are matched exactly; anything else is treated as a name prefix.
+
+        Returns:
+            Dict with 'items' and 'next_cursor'
+        """
+        query = (query or "").strip()
+        if not query:
+            return {'items': [], 'next_cursor': None}
+
+        if EMAIL_PATTERN.match(query):
+            return self.find_by_email(query, limit, cursor)
+
+        if PASSENGER_ID_PATTERN.match(query) and not cursor:
+            passenger = self.find_by_id(query)
+            if passenger:
+                return {'items': [passenger], 'next_cursor': None}
+
+        # A cursor always continues the index it came from
+        if BOOKING_REF_PATTERN.match(query.upper()) and (not cursor or 'booking_ref' in cursor):
+            page = self.find_by_booking_ref(query, limit, cursor)
+            if page['items'] or cursor:
+                return page
+
+        return self.search_names(query, limit, cursor)
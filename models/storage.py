@@ -0,0 +1,109 @@
+import os
+import threading
+from pathlib import Path
+
+import boto3
+
+from .local_dynamodb import LocalDynamoDB
+
+DEFAULT_LOCAL_PATH = Path(
+    os.environ.get("DELAYCOMPANION_CACHE_DIR", Path.home() / ".cache" / "delaycompanion")
+) / "local_tables.db"
+
+# Names accepted by --storage and the DELAYCOMPANION_STORAGE environment variable
+STORAGE_BACKENDS = ("dynamodb", "local", "memory")
+
+
+class StorageBackend:
+    """Where the DelayCompanion tables live
+
+    A backend hands out objects with the boto3 DynamoDB resource interface
+    (Table, batch_get_item, meta.client), so DynamoDBService and the setup
+    loaders run unchanged on every backend.
+    """
+
+    name = None
+
+    def resource(self):
+        """Get a DynamoDB resource for the calling thread"""
+        raise NotImplementedError
+
+
+class DynamoDBBackend(StorageBackend):
+    """Amazon DynamoDB through boto3"""
+
+    name = "dynamodb"
+
+    def resource(self):
+        # boto3 resources are not thread-safe, so every caller gets its own
+        return boto3.resource('dynamodb')
+
+
+class LocalBackend(StorageBackend):
+    """In-process tables for development, load tests and benchmarks
+
+    Every caller shares one LocalDynamoDB, which is thread-safe. With a
+    path the tables are persisted to SQLite and shared with other
+    processes using the same file; without one they only live in memory.
+    """
+
+    def __init__(self, path=None):
+        """
+        Initialize the backend
+
+        Args:
+            path: Optional SQLite file the tables are kept in
+        """
+        self.path = path
+        self.name = "local" if path else "memory"
+        self._resource = None
+        self._lock = threading.Lock()
+
+    def resource(self):
+        with self._lock:
+            if self._resource is None:
+                self._resource = LocalDynamoDB(self.path)
+            return self._resource
+
+
+def create_storage_backend(name=None, path=None):
+    """
+    Build a storage backend by name
+
+    Args:
+        name: "dynamodb", "local" (SQLite file) or "memory"; defaults to
+            DELAYCOMPANION_STORAGE, then "dynamodb"
+        path: SQLite file of the local backend; defaults to DELAYCOMPANION_STORAGE_PATH,
+            then local_tables.db in the cache directory
+
+    Returns:
+        StorageBackend
+    """
+    name = name or os.environ.get("DELAYCOMPANION_STORAGE") or "dynamodb"
+    if name == "dynamodb":
+        return DynamoDBBackend()
+    if name == "local":
+        return LocalBackend(path or os.environ.get("DELAYCOMPANION_STORAGE_PATH") or DEFAULT_LOCAL_PATH)
+    if name == "memory":
+        return LocalBackend()
+    raise ValueError(f"Unknown storage backend: {name} (expected one of {', '.join(STORAGE_BACKENDS)})")
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_storage_backend():
+    """Get the process-wide storage backend, chosen from the environment on first use"""
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            _shared_backend = create_storage_backend()
+        return _shared_backend
+
+
+def set_storage_backend(backend):
+    """Replace the process-wide storage backend; services created afterwards use it"""
+    global _shared_backend
+    with _shared_backend_lock:
+        _shared_backend = backend
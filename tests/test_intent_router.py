@@ -0,0 +1,57 @@
+from app.intent_router import IntentRouter
+
+PASSENGER = {'passenger_id': 'P001', 'name': 'John Smith', 'flight_id': 'FL001', 'seat': '12A'}
+
+
+def flight(**fields):
+    return dict({
+        'flight_id': 'FL001',
+        'flight_number': 'AA1234',
+        'origin': 'SFO',
+        'destination': 'JFK',
+        'scheduled_departure': '2025-06-17T08:00:00',
+        'actual_departure': '2025-06-17T08:00:00',
+        'delay_minutes': 0,
+        'gate': 'A12',
+        'terminal': '1',
+        'status': 'On Time'
+    }, **fields)
+
+
+def route_text(query, flight_item, router=None):
+    message = (router or IntentRouter()).route(query, {'passenger': PASSENGER, 'flight': flight_item})
+    return message['content'][0]['text'] if message else None
+
+
+def test_on_time_flight_is_reported_on_time():
+    assert "is on time" in route_text("is my flight delayed", flight())
+
+
+def test_cancelled_flight_is_not_reported_on_time():
+    text = route_text("is my flight delayed", flight(status='Cancelled'))
+    assert "cancelled" in text
+    assert "on time" not in text
+
+
+def test_cancelled_flight_has_no_gate_answer():
+    assert route_text("which gate", flight(status='Cancelled')) is None
+
+
+def test_diverted_flight_falls_through_to_the_agent():
+    assert route_text("is my flight delayed", flight(status='Diverted', delay_minutes=40)) is None
+
+
+def test_lone_keyword_is_answered_and_mixed_topics_fall_through():
+    assert "gate A12" in route_text("gate?", flight())
+    assert route_text("gate and seat", flight()) is None
+
+
+def test_rebooking_options_leave_out_sold_out_flights():
+    options = [
+        {'flight_id': 'FL101', 'flight_number': 'AA1456', 'departure': '12:00', 'arrival': '20:30'},
+        {'flight_id': 'FL102', 'flight_number': 'AA1789', 'departure': '15:45', 'arrival': '00:15'}
+    ]
+    router = IntentRouter(seat_availability=lambda flight_ids: {'FL101': 0, 'FL102': 3})
+    text = route_text("what are my rebooking options", flight(rebooking_options=options), router)
+    assert "AA1456" not in text
+    assert "AA1789 - Departs: 15:45 - Arrives: 00:15 - 3 seats left" in text
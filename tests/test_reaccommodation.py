@@ -0,0 +1,49 @@
+from models.dynamodb import DynamoDBService
+from models.flight_cache import FlightCache
+from models.handoff_contexts import HandoffContextStore
+from models.local_dynamodb import LocalDynamoDB
+from utils.setup_dynamodb import create_flights_table, create_passengers_table, create_seat_inventory_table
+
+PASSENGERS = [
+    # A Bronze traveller outranked by the Gold member of the party below
+    {'passenger_id': 'P001', 'name': 'Sam Solo', 'loyalty_tier': 'Bronze', 'booking_ref': 'SOLO01'},
+    {'passenger_id': 'P002', 'name': 'John Smith', 'loyalty_tier': 'Gold', 'booking_ref': 'DCK7Q2'},
+    {'passenger_id': 'P003', 'name': 'Jane Smith', 'loyalty_tier': 'Bronze', 'booking_ref': 'DCK7Q2'},
+]
+
+
+def build_service(seats):
+    dynamodb = LocalDynamoDB()
+    flights = create_flights_table(dynamodb)
+    passengers = create_passengers_table(dynamodb)
+    inventory = create_seat_inventory_table(dynamodb)
+    flights.put_item(Item={
+        'flight_id': 'FL001', 'status': 'Cancelled',
+        'rebooking_options': [{'flight_id': flight_id} for flight_id in seats]
+    })
+    for passenger in PASSENGERS:
+        passengers.put_item(Item=dict(passenger, flight_id='FL001'))
+    for flight_id, count in seats.items():
+        inventory.put_item(Item={'flight_id': flight_id, 'seats_available': count, 'holds': {}})
+    return DynamoDBService(FlightCache(), HandoffContextStore(), dynamodb=dynamodb)
+
+
+def flight_of(service, passenger_id):
+    return service.get_passenger(passenger_id)['flight_id']
+
+
+def test_a_booked_party_lands_on_the_same_flight():
+    service = build_service({'FL101': 2, 'FL102': 5})
+    report = service.reaccommodate_flight('FL001')
+    assert report['rebooked'] == 3
+    # The party goes first at its Gold rank and fills the first option
+    assert flight_of(service, 'P002') == flight_of(service, 'P003') == 'FL101'
+    assert flight_of(service, 'P001') == 'FL102'
+
+
+def test_a_party_is_never_split_across_flights():
+    service = build_service({'FL101': 1, 'FL102': 1})
+    report = service.reaccommodate_flight('FL001')
+    assert report['unaccommodated'] == ['P002', 'P003']
+    assert flight_of(service, 'P002') == flight_of(service, 'P003') == 'FL001'
+    assert flight_of(service, 'P001') == 'FL101'
@@ -0,0 +1,39 @@
+import pytest
+
+from app.agent import DelayCompanionAgent
+from tests.test_reaccommodation import build_service
+
+
+class IdlePool:
+    """MCP pool stand-in without any servers"""
+    
+    generation = 0
+    
+    def get_tools(self):
+        return []
+    
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv('DELAYCOMPANION_STORAGE', 'memory')
+    agent = DelayCompanionAgent(mcp_pool=IdlePool())
+    agent.db_service = build_service({'FL101': 2})
+    return agent
+
+
+def test_rebooking_onto_the_current_flight_takes_no_seat(agent):
+    assert agent.rebook_passenger('P002', 'FL101')['success']
+    result = agent.rebook_passenger('P002', 'FL101')
+    assert not result['success'] and result['already_booked']
+    assert agent.db_service.get_seat_availability(['FL101']) == {'FL101': 1}
+
+
+def test_a_stale_current_flight_releases_the_hold(agent):
+    assert agent.rebook_passenger('P002', 'FL101')['success']
+    result = agent.rebook_passenger('P002', 'FL101', current_flight_id='FL001')
+    assert result['conflict'] and result['current_flight_id'] == 'FL101'
+    assert agent.db_service.get_seat_availability(['FL101']) == {'FL101': 1}
+    assert len(agent.db_service.get_passenger('P002')['rebooking_history']) == 1
@@ -0,0 +1,35 @@
+from app.response_cache import ResponseCache
+
+FLIGHT = {'flight_id': 'FL001', 'status': 'Delayed', 'delay_minutes': 150}
+QUERY = "what compensation can I get for the delay"
+JOHN = {
+    'passenger_id': 'P001', 'name': 'John Smith', 'seat': '12A', 'booking_ref': 'ABC123',
+    'email': 'john@example.com', 'phone': '555-0100', 'loyalty_tier': 'Gold'
+}
+ANN = {
+    'passenger_id': 'P002', 'name': 'Ann Lee', 'seat': '3C', 'booking_ref': 'XYZ789',
+    'email': 'ann@example.com', 'loyalty_tier': 'Gold'
+}
+
+
+def test_personal_values_are_replaced_in_any_case():
+    cache = ResponseCache()
+    answer = ("Dear Mr. SMITH (john), seat 12a on booking abc123 keeps its meal voucher; "
+              "details go to John@Example.com. Alaska lounge is near gate 2A.")
+    assert cache.put(QUERY, JOHN, FLIGHT, answer)
+    assert cache.get(QUERY, ANN, FLIGHT) == (
+        "Dear Mr. Lee (Ann), seat 3C on booking XYZ789 keeps its meal voucher; "
+        "details go to ann@example.com. Alaska lounge is near gate 2A."
+    )
+
+
+def test_answers_with_a_private_value_are_not_stored():
+    cache = ResponseCache()
+    assert not cache.put(QUERY, JOHN, FLIGHT, "We will call you at 555-0100.")
+    assert cache.get(QUERY, ANN, FLIGHT) is None
+
+
+def test_answers_are_not_shared_across_tiers():
+    cache = ResponseCache()
+    assert cache.put(QUERY, JOHN, FLIGHT, "Gold members get lounge access.")
+    assert cache.get(QUERY, dict(ANN, loyalty_tier='Silver'), FLIGHT) is None
@@ -1,14 +1,109 @@
-import boto3
 import json
 import csv
 import os
+import random
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from models.passenger_lookup import (
+    BOOKING_REF_INDEX, EMAIL_INDEX, LOOKUP_ATTRIBUTES, NAME_INDEX, search_keys
+)
+from models.storage import get_storage_backend
+
+# Flights by status, sorted by departure so a single day can be queried with begins_with
+FLIGHT_STATUS_INDEX = {
+    'IndexName': 'StatusIndex',
+    'KeySchema': [
+        {
+            'AttributeName': 'status',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'scheduled_departure',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+FLIGHT_STATUS_INDEX_ATTRIBUTES = [
+    {
+        'AttributeName': 'status',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'scheduled_departure',
+        'AttributeType': 'S'
+    }
+]
+
+# Compact passenger login indexes; they only carry what a login result shows
+PASSENGER_LOOKUP_INDEXES = [
+    {
+        'IndexName': EMAIL_INDEX,
+        'KeySchema': [
+            {
+                'AttributeName': 'email_key',
+                'KeyType': 'HASH'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'INCLUDE',
+            'NonKeyAttributes': LOOKUP_ATTRIBUTES
+        }
+    },
+    {
+        'IndexName': BOOKING_REF_INDEX,
+        'KeySchema': [
+            {
+                'AttributeName': 'booking_ref',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'passenger_id',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'INCLUDE',
+            'NonKeyAttributes': LOOKUP_ATTRIBUTES
+        }
+    },
+    {
+        'IndexName': NAME_INDEX,
+        'KeySchema': [
+            {
+                'AttributeName': 'name_prefix',
+                'KeyType': 'HASH'
+            },
+            {
+                'AttributeName': 'name_key',
+                'KeyType': 'RANGE'
+            }
+        ],
+        'Projection': {
+            'ProjectionType': 'INCLUDE',
+            'NonKeyAttributes': LOOKUP_ATTRIBUTES
+        }
+    }
+]
+
+PASSENGER_LOOKUP_ATTRIBUTES = [
+    {
+        'AttributeName': name,
+        'AttributeType': 'S'
+    }
+    for name in ('email_key', 'booking_ref', 'name_prefix', 'name_key')
+]
+
 def create_flights_table(dynamodb):
     """Create the flights table in DynamoDB"""
     try:
@@ -20,12 +115,13 @@ def create_flights_table(dynamodb):
                     'KeyType': 'HASH'  # Partition key
                 }
             ],
-            AttributeDefinitions=[
+            AttributeDefinitions=FLIGHT_STATUS_INDEX_ATTRIBUTES + [
                 {
                     'AttributeName': 'flight_id',
                     'AttributeType': 'S'
                 }
             ],
+            GlobalSecondaryIndexes=[FLIGHT_STATUS_INDEX],
             BillingMode='PAY_PER_REQUEST'
         )
         print(f"Creating table DelayCompanion_Flights...")
@@ -34,7 +130,24 @@ def create_flights_table(dynamodb):
         return table
     except dynamodb.meta.client.exceptions.ResourceInUseException:
         print(f"Table DelayCompanion_Flights already exists.")
-        return dynamodb.Table('DelayCompanion_Flights')
+        table = dynamodb.Table('DelayCompanion_Flights')
+        ensure_status_index(table)
+        return table
+
+def ensure_status_index(table):
+    """Add the StatusIndex GSI to a flights table created before it existed"""
+    index_names = [index['IndexName'] for index in table.global_secondary_indexes or []]
+    if FLIGHT_STATUS_INDEX['IndexName'] in index_names:
+        return
+    
+    print(f"Adding StatusIndex to DelayCompanion_Flights...")
+    table.meta.client.update_table(
+        TableName=table.name,
+        AttributeDefinitions=FLIGHT_STATUS_INDEX_ATTRIBUTES,
+        GlobalSecondaryIndexUpdates=[{'Create': FLIGHT_STATUS_INDEX}]
+    )
+    # The index backfills in the background; queries work once it is ACTIVE
+    print(f"StatusIndex is being created on DelayCompanion_Flights.")
 
 def create_passengers_table(dynamodb):
     """Create the passengers table in DynamoDB"""
@@ -47,7 +160,7 @@ def create_passengers_table(dynamodb):
                     'KeyType': 'HASH'  # Partition key
                 }
             ],
-            AttributeDefinitions=[
+            AttributeDefinitions=PASSENGER_LOOKUP_ATTRIBUTES + [
                 {
                     'AttributeName': 'passenger_id',
                     'AttributeType': 'S'
@@ -70,7 +183,7 @@ def create_passengers_table(dynamodb):
                         'ProjectionType': 'ALL'
                     }
                 }
-            ],
+            ] + PASSENGER_LOOKUP_INDEXES,
             BillingMode='PAY_PER_REQUEST'
         )
         print(f"Creating table DelayCompanion_Passengers...")
@@ -79,169 +192,437 @@ def create_passengers_table(dynamodb):
         return table
     except dynamodb.meta.client.exceptions.ResourceInUseException:
         print(f"Table DelayCompanion_Passengers already exists.")
-        return dynamodb.Table('DelayCompanion_Passengers')
+        table = dynamodb.Table('DelayCompanion_Passengers')
+        ensure_passenger_lookup_indexes(table)
+        return table
 
-def load_flights_data(flights_table, csv_file):
-    """Load flight data from CSV into DynamoDB"""
-    with open(csv_file, mode='r', encoding='utf-8') as file:
-        # Read the entire file content
-        content = file.read()
+def ensure_passenger_lookup_indexes(table, poll_interval=10):
+    """
+    Add the passenger lookup GSIs to a passengers table created before they existed
+    
+    DynamoDB builds one new index at a time, so each one is waited on before
+    the next is requested. Once an index was added, the rows already in the
+    table get their index keys from backfill_passenger_lookup_keys.
+    """
+    added = False
+    for index in PASSENGER_LOOKUP_INDEXES:
+        table.reload()
+        index_names = [existing['IndexName'] for existing in table.global_secondary_indexes or []]
+        if index['IndexName'] in index_names:
+            continue
         
-        # Split by lines and skip header
-        lines = content.strip().split('\n')
-        header = lines[0].split(',')
+        print(f"Adding {index['IndexName']} to {table.name}...")
+        # passenger_id is already defined as the table key
+        key_names = {key['AttributeName'] for key in index['KeySchema']}
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=[
+                attribute for attribute in PASSENGER_LOOKUP_ATTRIBUTES if attribute['AttributeName'] in key_names
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        while True:
+            table.reload()
+            statuses = {existing['IndexName']: existing.get('IndexStatus')
+                        for existing in table.global_secondary_indexes or []}
+            if statuses.get(index['IndexName']) in (None, 'ACTIVE'):
+                break
+            time.sleep(poll_interval)
+        print(f"{index['IndexName']} is active on {table.name}.")
+        added = True
+    
+    if added:
+        backfill_passenger_lookup_keys(table)
+
+def backfill_passenger_lookup_keys(table, workers=8):
+    """
+    Derive the lookup index keys of passengers stored without them
+    
+    The table is read with a parallel scan, one segment per worker, and only
+    rows whose keys are missing or stale are updated. Each update sets just
+    the key attributes, so it never overwrites a concurrent rebooking, and
+    is skipped for a row deleted since the scan. Safe to run again. Workers
+    use the resource's client, which unlike the Table resource is thread-safe.
+    
+    Args:
+        table: Passengers table resource
+        workers: Number of parallel scan segments
+    
+    Returns:
+        Number of rows updated
+    """
+    source_names = ['passenger_id', 'email', 'booking_ref', 'name', 'email_key', 'name_prefix', 'name_key']
+    projection = {
+        'ProjectionExpression': ", ".join(f"#a{i}" for i in range(len(source_names))),
+        'ExpressionAttributeNames': {f"#a{i}": name for i, name in enumerate(source_names)}
+    }
+    
+    client = table.meta.client
+    
+    def update(item):
+        keys = {name: value for name, value in search_keys(item).items() if item.get(name) != value}
+        if not keys:
+            return 0
+        try:
+            client.update_item(
+                TableName=table.name,
+                Key={'passenger_id': item['passenger_id']},
+                UpdateExpression="SET " + ", ".join(f"#k{i} = :k{i}" for i in range(len(keys))),
+                ConditionExpression="attribute_exists(passenger_id)",
+                ExpressionAttributeNames={f"#k{i}": name for i, name in enumerate(keys)},
+                ExpressionAttributeValues={f":k{i}": value for i, value in enumerate(keys.values())}
+            )
+            return 1
+        except client.exceptions.ConditionalCheckFailedException:
+            return 0
+    
+    def backfill_segment(segment):
+        updated = 0
+        scan_args = dict(projection, TableName=table.name, Segment=segment, TotalSegments=workers)
+        while True:
+            response = client.scan(**scan_args)
+            updated += sum(update(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return updated
+            scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        updated = sum(executor.map(backfill_segment, range(workers)))
+    
+    print(f"{table.name}: lookup keys backfilled on {updated} rows")
+    return updated
+
+def create_seat_inventory_table(dynamodb):
+    """Create the seat inventory table for rebooking flights in DynamoDB"""
+    try:
+        table = dynamodb.create_table(
+            TableName='DelayCompanion_SeatInventory',
+            KeySchema=[
+                {
+                    'AttributeName': 'flight_id',
+                    'KeyType': 'HASH'  # Partition key
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'flight_id',
+                    'AttributeType': 'S'
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print(f"Creating table DelayCompanion_SeatInventory...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='DelayCompanion_SeatInventory')
+        print(f"Table DelayCompanion_SeatInventory created successfully!")
+        return table
+    except dynamodb.meta.client.exceptions.ResourceInUseException:
+        print(f"Table DelayCompanion_SeatInventory already exists.")
+        return dynamodb.Table('DelayCompanion_SeatInventory')
+
+# Open seats given to a rebooking flight whose option does not list seats_available
+DEFAULT_REBOOKING_SEATS = 20
+
+# BatchWriteItem accepts at most 25 put requests
+BATCH_WRITE_LIMIT = 25
+# Rows handed to a writer thread at a time (also the checkpoint granularity)
+CHUNK_ROWS = 500
+
+def parse_flight_row(row):
+    """Convert a flights CSV row into a DynamoDB item, or None if it has no flight_id"""
+    item = {}
+    for key, value in row.items():
+        value = (value or '').strip()
         
-        for i, line in enumerate(lines[1:], 1):
-            # Create a clean item dictionary
-            item = {}
-            
-            # Split the line by comma, but be careful with the JSON part
-            parts = []
-            in_quotes = False
-            current_part = ""
-            
-            for char in line:
-                if char == '"' and not in_quotes:
-                    in_quotes = True
-                    current_part += char
-                elif char == '"' and in_quotes:
-                    in_quotes = False
-                    current_part += char
-                elif char == ',' and not in_quotes:
-                    parts.append(current_part)
-                    current_part = ""
-                else:
-                    current_part += char
-            
-            # Add the last part
-            if current_part:
-                parts.append(current_part)
-            
-            # Map header to values
-            for j, key in enumerate(header):
-                if j < len(parts):
-                    value = parts[j].strip()
-                    
-                    # Skip empty values
-                    if not value:
-                        continue
-                    
-                    # Handle special fields
-                    if key == 'delay_minutes':
-                        item[key] = int(value) if value else 0
-                    elif key == 'rebooking_options':
-                        if value.startswith('"') and value.endswith('"'):
-                            # Remove the outer quotes
-                            value = value[1:-1]
-                        
-                        if value:
-                            try:
-                                # Replace escaped quotes with regular quotes
-                                value = value.replace('\\"', '"')
-                                item[key] = json.loads(value)
-                            except json.JSONDecodeError as e:
-                                print(f"Error parsing JSON for row {i}: {e}")
-                                print(f"JSON string: {value}")
-                                item[key] = []
-                        else:
-                            item[key] = []
-                    else:
-                        item[key] = value
-            
-            # Debug print
-            print(f"Row {i}: {item}")
-            
-            # Make sure flight_id is present
-            if 'flight_id' not in item or not item['flight_id']:
-                print(f"Skipping row {i} due to missing flight_id")
-                continue
-                
-            # Add item to DynamoDB
-            flights_table.put_item(Item=item)
+        if key == 'rebooking_options':
+            # Flights without options still get an empty list
+            try:
+                item[key] = json.loads(value) if value else []
+            except json.JSONDecodeError as e:
+                print(f"Error parsing rebooking_options for flight {row.get('flight_id')}: {e}")
+                item[key] = []
+            continue
+        
+        # Skip empty values
+        if not value:
+            continue
+        
+        if key == 'delay_minutes':
+            item[key] = int(value)
+        else:
+            item[key] = value
     
-    print(f"Loaded flight data into DelayCompanion_Flights table")
+    return item if item.get('flight_id') else None
 
-def load_passengers_data(passengers_table, csv_file):
-    """Load passenger data from CSV into DynamoDB"""
-    with open(csv_file, mode='r', encoding='utf-8') as file:
-        # Read the entire file content
-        content = file.read()
+def parse_passenger_row(row):
+    """Convert a passengers CSV row into a DynamoDB item, or None if it has no passenger_id"""
+    item = {key: value.strip() for key, value in row.items() if value and value.strip()}
+    if not item.get('passenger_id'):
+        return None
+    # Keys of the EmailIndex, BookingRefIndex and NameIndex lookups
+    item.update(search_keys(item))
+    return item
+
+def write_batch(table, items, max_attempts=8):
+    """
+    Write up to 25 items with BatchWriteItem, retrying unprocessed items
+    
+    Args:
+        table: DynamoDB table resource
+        items: Items to put
+        max_attempts: Maximum number of attempts before giving up
+    
+    Returns:
+        Tuple of (consumed capacity units, number of retries)
+    """
+    request_items = {table.name: [{'PutRequest': {'Item': item}} for item in items]}
+    consumed = 0.0
+    
+    for attempt in range(max_attempts):
+        response = table.meta.client.batch_write_item(
+            RequestItems=request_items,
+            ReturnConsumedCapacity='TOTAL'
+        )
+        consumed += sum(c.get('CapacityUnits', 0) for c in response.get('ConsumedCapacity', []))
         
-        # Split by lines and skip header
-        lines = content.strip().split('\n')
-        header = lines[0].split(',')
+        request_items = response.get('UnprocessedItems') or {}
+        if not request_items:
+            return consumed, attempt
         
-        for i, line in enumerate(lines[1:], 1):
-            # Create a clean item dictionary
-            item = {}
-            
-            # Split the line by comma, but be careful with quoted values
-            parts = []
-            in_quotes = False
-            current_part = ""
-            
-            for char in line:
-                if char == '"' and not in_quotes:
-                    in_quotes = True
-                    current_part += char
-                elif char == '"' and in_quotes:
-                    in_quotes = False
-                    current_part += char
-                elif char == ',' and not in_quotes:
-                    parts.append(current_part)
-                    current_part = ""
-                else:
-                    current_part += char
-            
-            # Add the last part
-            if current_part:
-                parts.append(current_part)
-            
-            # Map header to values
-            for j, key in enumerate(header):
-                if j < len(parts):
-                    value = parts[j].strip()
-                    
-                    # Skip empty values
-                    if not value:
-                        continue
-                    
-                    # Remove quotes if present
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    
-                    item[key] = value
+        # Back off with jitter before retrying throttled items
+        time.sleep(min(0.05 * (2 ** attempt), 2.0) * (0.5 + random.random()))
+    
+    raise RuntimeError(f"Gave up writing {len(request_items[table.name])} items to {table.name}")
+
+def write_chunk(table, items, key_name):
+    """Write a chunk of items in BatchWriteItem-sized batches"""
+    # Duplicate keys in one batch are rejected, so the last row for a key wins
+    items = list({item[key_name]: item for item in items}.values())
+    consumed = 0.0
+    retries = 0
+    
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        batch_consumed, batch_retries = write_batch(table, items[start:start + BATCH_WRITE_LIMIT])
+        consumed += batch_consumed
+        retries += batch_retries
+    
+    return len(items), consumed, retries
+
+def read_checkpoint(checkpoint_file):
+    """Get the number of rows already committed by a previous run"""
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return 0
+    with open(checkpoint_file, mode='r', encoding='utf-8') as file:
+        return json.load(file).get('committed_rows', 0)
+
+def write_checkpoint(checkpoint_file, committed_rows):
+    """Record the number of rows committed so far"""
+    if not checkpoint_file:
+        return
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, mode='w', encoding='utf-8') as file:
+        json.dump({'committed_rows': committed_rows, 'updated_at': time.time()}, file)
+    os.replace(tmp_file, checkpoint_file)
+
+def bulk_load(table, csv_file, parse_row, key_name, workers=8, checkpoint_file=None, progress_every=20):
+    """
+    Stream a CSV file into a DynamoDB table with parallel batch writers
+    
+    Rows are parsed with the csv module and grouped into chunks that a pool of
+    writer threads sends with BatchWriteItem. Only a bounded number of chunks
+    is held in memory. The checkpoint records how many leading rows are fully
+    committed, so an interrupted load resumes after them; puts are idempotent,
+    so rows written after that point are simply written again.
+    
+    Args:
+        table: DynamoDB table resource
+        csv_file: Path to the CSV file
+        parse_row: Callable turning a CSV row dict into an item (or None to skip)
+        key_name: Partition key attribute of the table
+        workers: Number of parallel writer threads
+        checkpoint_file: Optional path of the checkpoint file
+        progress_every: Print progress every this many chunks
+    
+    Returns:
+        Dict with row, capacity and throughput statistics
+    """
+    skip_rows = read_checkpoint(checkpoint_file)
+    if skip_rows:
+        print(f"Resuming {table.name} load after {skip_rows} committed rows")
+    
+    stats = {'rows': 0, 'skipped': 0, 'written': 0, 'consumed_capacity': 0.0, 'retries': 0}
+    started = time.perf_counter()
+    
+    # Chunk index -> row count, used to advance the checkpoint over contiguous chunks
+    completed = {}
+    next_chunk_to_commit = 0
+    committed_rows = skip_rows
+    in_flight = set()
+    
+    def handle_done(futures):
+        nonlocal next_chunk_to_commit, committed_rows
+        for future in futures:
+            in_flight.discard(future)
+            chunk_index, row_count = future.chunk_info
+            written, consumed, retries = future.result()
+            stats['written'] += written
+            stats['consumed_capacity'] += consumed
+            stats['retries'] += retries
+            completed[chunk_index] = row_count
+        
+        while next_chunk_to_commit in completed:
+            committed_rows += completed.pop(next_chunk_to_commit)
+            next_chunk_to_commit += 1
+            if next_chunk_to_commit % progress_every == 0:
+                write_checkpoint(checkpoint_file, committed_rows)
+                elapsed = time.perf_counter() - started
+                print(f"{table.name}: {committed_rows} rows committed "
+                      f"({stats['written'] / elapsed:,.0f} rows/sec)")
+    
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as file, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        # The rebooking_options JSON escapes its quotes with backslashes
+        reader = csv.DictReader(file, escapechar='\\')
+        chunk = []
+        chunk_rows = 0
+        chunk_index = 0
+        
+        def submit_chunk():
+            nonlocal chunk, chunk_rows, chunk_index
+            future = executor.submit(write_chunk, table, chunk, key_name)
+            future.chunk_info = (chunk_index, chunk_rows)
+            in_flight.add(future)
+            chunk, chunk_rows = [], 0
+            chunk_index += 1
+            # Bound memory by waiting once enough chunks are queued
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                handle_done(done)
+        
+        for row_number, row in enumerate(reader, 1):
+            if row_number <= skip_rows:
+                continue
             
-            # Debug print
-            print(f"Passenger Row {i}: {item}")
+            stats['rows'] += 1
+            chunk_rows += 1
+            item = parse_row(row)
+            if item is None:
+                stats['skipped'] += 1
+            else:
+                chunk.append(item)
             
-            # Make sure passenger_id is present
-            if 'passenger_id' not in item or not item['passenger_id']:
-                print(f"Skipping passenger row {i} due to missing passenger_id")
-                continue
-                
-            # Add item to DynamoDB
-            passengers_table.put_item(Item=item)
+            if chunk_rows >= CHUNK_ROWS:
+                submit_chunk()
+        
+        if chunk_rows:
+            submit_chunk()
+        
+        handle_done(wait(in_flight).done)
+    
+    # A finished load needs no resume point
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = elapsed
+    stats['rows_per_sec'] = stats['written'] / elapsed if elapsed else 0.0
+    print(f"Loaded {stats['written']} items into {table.name} in {elapsed:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['consumed_capacity']:.1f} capacity units, "
+          f"{stats['skipped']} rows skipped, {stats['retries']} retries)")
+    return stats
+
+def load_flights_data(flights_table, csv_file, workers=8, checkpoint_file=None):
+    """Load flight data from CSV into DynamoDB"""
+    return bulk_load(flights_table, csv_file, parse_flight_row, 'flight_id',
+                     workers=workers, checkpoint_file=checkpoint_file)
+
+def load_passengers_data(passengers_table, csv_file, workers=8, checkpoint_file=None):
+    """Load passenger data from CSV into DynamoDB"""
+    return bulk_load(passengers_table, csv_file, parse_passenger_row, 'passenger_id',
+                     workers=workers, checkpoint_file=checkpoint_file)
+
+def seed_seat_inventory(inventory_table, csv_file, workers=8):
+    """
+    Create seat inventory for every rebooking flight listed in the flights CSV
+    
+    Existing inventory is left alone, so reloading the flights does not
+    hand out seats that are already sold or held.
+    """
+    capacities = {}
+    with open(csv_file, mode='r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file, escapechar='\\'):
+            item = parse_flight_row(row)
+            for option in (item or {}).get('rebooking_options', []):
+                if option.get('flight_id'):
+                    capacities.setdefault(
+                        option['flight_id'], int(option.get('seats_available', DEFAULT_REBOOKING_SEATS))
+                    )
     
-    print(f"Loaded passenger data into DelayCompanion_Passengers table")
+    def create(flight_id):
+        try:
+            inventory_table.put_item(
+                Item={
+                    'flight_id': flight_id,
+                    'capacity': capacities[flight_id],
+                    'seats_available': capacities[flight_id],
+                    'seats_sold': 0,
+                    'holds': {}
+                },
+                ConditionExpression="attribute_not_exists(flight_id)"
+            )
+            return 1
+        except inventory_table.meta.client.exceptions.ConditionalCheckFailedException:
+            return 0
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        created = sum(executor.map(create, capacities))
+    
+    print(f"Seat inventory: {created} rebooking flights added, {len(capacities) - created} already present")
+    return created
 
-def main():
-    """Main function to set up DynamoDB tables and load data"""
+def main(flights_csv=None, passengers_csv=None, workers=8, checkpoint_dir=None, dynamodb=None):
+    """
+    Main function to set up DynamoDB tables and load data
+    
+    Args:
+        flights_csv: Optional flights CSV path; defaults to the sample data
+        passengers_csv: Optional passengers CSV path; defaults to the sample data
+        workers: Number of parallel writer threads per table
+        checkpoint_dir: Optional directory for resumable load checkpoints
+        dynamodb: Optional DynamoDB resource; defaults to the configured storage backend's
+    """
     # Initialize DynamoDB resource
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = dynamodb or get_storage_backend().resource()
     
     # Create tables
     flights_table = create_flights_table(dynamodb)
     passengers_table = create_passengers_table(dynamodb)
+    inventory_table = create_seat_inventory_table(dynamodb)
     
     # Load data from CSV files
-    flights_csv = os.path.join(project_root, 'data', 'flightdelays.csv')
-    passengers_csv = os.path.join(project_root, 'data', 'passengers.csv')
+    flights_csv = flights_csv or os.path.join(project_root, 'data', 'flightdelays.csv')
+    passengers_csv = passengers_csv or os.path.join(project_root, 'data', 'passengers.csv')
     
-    load_flights_data(flights_table, flights_csv)
-    load_passengers_data(passengers_table, passengers_csv)
+    flights_checkpoint = None
+    passengers_checkpoint = None
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        flights_checkpoint = os.path.join(checkpoint_dir, 'flights.checkpoint.json')
+        passengers_checkpoint = os.path.join(checkpoint_dir, 'passengers.checkpoint.json')
+    
+    load_flights_data(flights_table, flights_csv, workers=workers, checkpoint_file=flights_checkpoint)
+    load_passengers_data(passengers_table, passengers_csv, workers=workers, checkpoint_file=passengers_checkpoint)
+    seed_seat_inventory(inventory_table, flights_csv, workers=workers)
     
     print("DynamoDB setup complete!")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Create the DelayCompanion tables and bulk load CSV data")
+    parser.add_argument("--flights-csv", type=str, help="Flights CSV file (defaults to data/flightdelays.csv)")
+    parser.add_argument("--passengers-csv", type=str, help="Passengers CSV file (defaults to data/passengers.csv)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel writer threads per table")
+    parser.add_argument("--checkpoint-dir", type=str, help="Directory for resumable load checkpoints")
+    args = parser.parse_args()
+    
+    main(args.flights_csv, args.passengers_csv, args.workers, args.checkpoint_dir)